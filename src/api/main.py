@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 from fastapi import FastAPI
 import os
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes.topic import router as topic_router
 from api.routes.search import router as search_router
@@ -9,11 +10,24 @@ from api.routes.generate import router as generate_router
 from api.routes.introduction import router as introduction_router
 from api.routes.adapt import router as adapt_router
 from api.routes.ocr import router as ocr_router
+from graph import graph_registry
+from helpers import job_manager, aclose_vector_stores
 load_dotenv()
 port = os.getenv("PORT")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Compile the shared graphs and start the ingestion workers before the app starts serving requests."""
+    await graph_registry.warm_up()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    await aclose_vector_stores()
+
 app = FastAPI(
     title="Paperal",
     description="This is the FastAPI backend for Paperal",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -1,11 +1,16 @@
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from models import APIResponse
 from http import HTTPStatus
 import logging
-from graph import query_graph
-from models import GraphQueryRequest
+from graph import query_graph, stream_query_graph, batch_query_graph, response_cache
+from models import GraphQueryRequest, BatchGraphQueryRequest
+from helpers import rerank_policy, result_cache
 import json
+import os
+
+BATCH_MAX_QUERIES = int(os.getenv("GENERATE_BATCH_MAX_QUERIES", "20"))
+BATCH_CONCURRENCY = int(os.getenv("GENERATE_BATCH_CONCURRENCY", "4"))
 
 router = APIRouter()
 
@@ -74,3 +79,147 @@ async def generate_route(request: GraphQueryRequest):
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
             content=response.model_dump()
         )
+
+
+@router.post("/generate/batch", response_model=APIResponse)
+async def generate_batch_route(request: BatchGraphQueryRequest):
+    """
+    Generate responses for several queries at once, sharing retrieval between them
+    
+    Args:
+        Object containing a key-value pair of "queries"
+
+    Returns: 
+        A success boolean and a data field with one result per query in input order, each with its
+        own success boolean, response and error.
+    """
+    try:
+        if not request.queries:
+            response = APIResponse(
+                success=False,
+                error="Query list cannot be empty"
+            )
+            return JSONResponse(
+                status_code=HTTPStatus.BAD_REQUEST,
+                content=response.model_dump()
+            )
+
+        if len(request.queries) > BATCH_MAX_QUERIES:
+            response = APIResponse(
+                success=False,
+                error=f"At most {BATCH_MAX_QUERIES} queries can be sent in one batch"
+            )
+            return JSONResponse(
+                status_code=HTTPStatus.BAD_REQUEST,
+                content=response.model_dump()
+            )
+
+        valid = [i for i, query in enumerate(request.queries) if query.strip()]
+        results = await batch_query_graph([request.queries[i] for i in valid], max_concurrency=BATCH_CONCURRENCY)
+        by_index = dict(zip(valid, results))
+
+        items = []
+        for i in range(len(request.queries)):
+            if i not in by_index:
+                items.append({"success": False, "response": None, "error": "Query cannot be empty"})
+                continue
+
+            content, error = by_index[i]
+            if error or not content:
+                items.append({"success": False, "response": None, "error": error or "No response generated from the graph"})
+            else:
+                items.append({"success": True, "response": json.loads(content), "error": None})
+
+        response = APIResponse(
+            success=True,
+            data={"responses": items}
+        )
+        return JSONResponse(
+            status_code=HTTPStatus.OK,
+            content=response.model_dump()
+        )
+
+    except Exception as e:
+        logging.error(f"Error in generate_batch_route: {str(e)}")
+        response = APIResponse(
+            success=False,
+            error="An internal server error occurred"
+        )
+        return JSONResponse(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            content=response.model_dump()
+        )
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a single server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/generate/stream")
+async def generate_stream_route(request: GraphQueryRequest):
+    """
+    Generate a response using the RAG graph, streamed as server-sent events
+    
+    Args:
+        Object containing a key-value pair of "query"
+
+    Returns: 
+        A text/event-stream of "stage" and "token" events followed by a closing "result" event
+        with the structured response, or an "error" event if the graph fails.
+    """
+    if not request.query.strip():
+        response = APIResponse(
+            success=False,
+            error="Query cannot be empty"
+        )
+        return JSONResponse(
+            status_code=HTTPStatus.BAD_REQUEST,
+            content=response.model_dump()
+        )
+
+    async def event_stream():
+        try:
+            async for event, data in stream_query_graph(request.query):
+                yield format_sse(event, data)
+        except Exception as e:
+            logging.error(f"Error in streamed graph query flow: {str(e)}")
+            yield format_sse("error", {"error": "Failed to execute graph query flow"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/generate/cache", response_model=APIResponse)
+async def generate_cache_stats_route():
+    """
+    Report the hit/miss counters of the /generate semantic response cache
+
+    Returns: 
+        A success boolean and the cache counters.
+    """
+    response = APIResponse(
+        success=True,
+        data=response_cache.stats()
+    )
+    return JSONResponse(
+        status_code=HTTPStatus.OK,
+        content=response.model_dump()
+    )
+
+@router.get("/generate/rerank", response_model=APIResponse)
+async def generate_rerank_stats_route():
+    """
+    Report how often the hosted rerank call was skipped by the rerank policy or served from the result cache
+
+    Returns: 
+        A success boolean, the rerank decision counters and the query/rerank result cache counters.
+    """
+    response = APIResponse(
+        success=True,
+        data={**rerank_policy.stats(), "result_cache": result_cache.stats()}
+    )
+    return JSONResponse(
+        status_code=HTTPStatus.OK,
+        content=response.model_dump()
+    )
@@ -1,12 +1,14 @@
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
-from models import ProcessRequest, ProcessResponse, APIResponse
+from models import ProcessRequest, ProcessTaskResponse, ProcessStatusResponse, APIResponse
+from helpers import job_manager
+from graph import LIBRARY_NAMESPACE
 from http import HTTPStatus
 import logging
 
 router = APIRouter()
 
-@router.post("/process", response_model=APIResponse[ProcessResponse])
+@router.post("/process", response_model=APIResponse[ProcessTaskResponse])
 async def process_papers(request: ProcessRequest):
     """
     Process a research paper by chunking it into sections and storing the vector embeddings.
@@ -15,7 +17,7 @@ async def process_papers(request: ProcessRequest):
         request: Object containing a list of URLs to process
         
     Returns:
-        A success response indicating the task was queued with the task ID.
+        A success response indicating the task was queued with the task ID, poll GET /process/{task_id} for progress.
     """
     try:
         if not request.urls:
@@ -28,13 +30,15 @@ async def process_papers(request: ProcessRequest):
                 content=response.model_dump()
             )
 
-    
         logging.info(f"Processing {len(request.urls)} URLs.")
 
+        task_id = await job_manager.submit(request.urls, request.strategy, LIBRARY_NAMESPACE)
+
         response = APIResponse(
             success=True,
             data={
                 "message": "Processing started in background",
+                "task_id": task_id,
             }
         )
         return JSONResponse(
@@ -52,3 +56,46 @@ async def process_papers(request: ProcessRequest):
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
             content=response.model_dump()
         )
+
+@router.get("/process/{task_id}", response_model=APIResponse[ProcessStatusResponse])
+async def process_status(task_id: str):
+    """
+    Report the progress of a processing task.
+
+    Args:
+        task_id: The task ID returned by POST /process
+
+    Returns:
+        The task status with the progress of every URL.
+    """
+    try:
+        status = await job_manager.get(task_id)
+        if status is None:
+            response = APIResponse(
+                success=False,
+                error="Task not found"
+            )
+            return JSONResponse(
+                status_code=HTTPStatus.NOT_FOUND,
+                content=response.model_dump()
+            )
+
+        response = APIResponse(
+            success=True,
+            data=status
+        )
+        return JSONResponse(
+            status_code=HTTPStatus.OK,
+            content=response.model_dump()
+        )
+
+    except Exception as e:
+        logging.error(f"Error in process_status: {str(e)}")
+        response = APIResponse(
+            success=False,
+            error="An internal server error occurred"
+        )
+        return JSONResponse(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            content=response.model_dump()
+        )
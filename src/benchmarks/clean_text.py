@@ -0,0 +1,99 @@
+"""
+Microbenchmark of `utils.text.clean_split_text` against the previous sequential-replace implementation.
+
+The corpus is the sample LangChain chunks with the typographic characters PDF extraction leaves
+behind (curly quotes, dashes, ligatures, odd spaces, line breaks) put back in. Run from `src`:
+
+    python -m benchmarks.clean_text [repeat]
+"""
+import sys
+import json
+import time
+import random
+import regex
+import unicodedata
+from unidecode import unidecode
+from utils.text import clean_split_text, clean_many
+
+CORPUS_PATH = "sample/langchain/langchain_chunks.json"
+
+PDF_ARTIFACTS = {
+    " ": [" ", " ", "\n", " \n"],
+    "'": ["‘", "’"],
+    '"': ["“", "”"],
+    "-": ["–", "—", "‐"],
+    "fi": ["ﬁ"],
+    "fl": ["ﬂ"],
+    "...": ["…"],
+}
+
+def legacy_clean_split_text(text: str, preserve_unicode: bool = False) -> str:
+    """The previous implementation, kept here as the baseline."""
+    if not text:
+        return ""
+
+    text = unicodedata.normalize('NFKC', text)
+
+    char_mappings = {
+        ': "\'",  # U+2018 LEFT SINGLE QUOTATION MARK\n        ': "'",
+        '‚': ',', '„': '"',
+        '—': '-', '–': '-', '‐': '-', '‑': '-', '−': '-',
+        ' ': ' ', ' ': ' ', ' ': ' ', ' ': ' ', ' ': ' ', ' ': ' ',
+        ' ': ' ', ' ': ' ', ' ': ' ', ' ': ' ', ' ': ' ', ' ': ' ',
+        '​': '', '‌': '', '‍': '', ' ': ' ', ' ': ' ',
+        '…': '...', '•': '*', '·': '*', '‹': '<', '›': '>', '«': '<<', '»': '>>',
+        '™': '(TM)', '®': '(R)', '©': '(C)',
+    }
+
+    for old, new in char_mappings.items():
+        text = text.replace(old, new)
+
+    if not preserve_unicode:
+        text = unidecode(text)
+
+    text = regex.sub(r'\r\n|\r|\n', ' ', text)
+    text = regex.sub(r'\s+', ' ', text)
+    text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C' or char in ('\n', '\t'))
+
+    if not preserve_unicode:
+        text = regex.sub(r'[\p{S}]', '', text)
+
+    return text.strip()
+
+def load_corpus(seed: int = 0) -> list[str]:
+    """Load the sample chunks and put PDF extraction artifacts back into them."""
+    rng = random.Random(seed)
+    with open(CORPUS_PATH, "r") as f:
+        chunks = [chunk["text"] for chunk in json.load(f)]
+
+    pattern = regex.compile("|".join(regex.escape(key) for key in PDF_ARTIFACTS))
+    corrupt = lambda match: rng.choice(PDF_ARTIFACTS[match.group(0)]) if rng.random() < 0.3 else match.group(0)
+    return [pattern.sub(corrupt, chunk) for chunk in chunks]
+
+def timed(function, texts: list[str], repeat: int) -> float:
+    """Best wall time of `repeat` runs of `function` over all texts."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(texts)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    corpus = load_corpus()
+    characters = sum(len(text) for text in corpus)
+
+    for preserve_unicode in (False, True):
+        assert [legacy_clean_split_text(text, preserve_unicode) for text in corpus] == [clean_split_text(text, preserve_unicode) for text in corpus]
+
+    legacy = timed(lambda texts: [legacy_clean_split_text(text) for text in texts], corpus, repeat)
+    current = timed(lambda texts: [clean_split_text(text) for text in texts], corpus, repeat)
+    print(f"{len(corpus)} chunks, {characters} characters, outputs identical")
+    print(f"legacy  {legacy * 1000:8.2f} ms")
+    print(f"current {current * 1000:8.2f} ms  ({legacy / current:.1f}x)")
+
+    large = corpus * 100
+    serial = timed(lambda texts: clean_many(texts, workers=1), large, 1)
+    parallel = timed(lambda texts: clean_many(texts, min_parallel=0), large, 1)
+    print(f"clean_many on {len(large)} chunks: serial {serial:.2f} s, process pool {parallel:.2f} s ({serial / parallel:.1f}x)")
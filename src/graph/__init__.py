@@ -1,2 +1,3 @@
+from .registry import *
 from .vector_search import *
 from .main import *
\ No newline at end of file
@@ -1,12 +1,17 @@
 import os
+import asyncio
 import logging
 from typing import Literal
 import json
 from langgraph.graph import MessagesState, StateGraph, END
+from langgraph.config import get_stream_writer
 from langchain.chat_models import init_chat_model
-from graph.vector_search import VectorSearchTool
+from langchain.embeddings import init_embeddings
+from graph.vector_search import VectorSearchTool, LIBRARY_NAMESPACE
+from helpers import aget_vector_store, rerank_policy, result_cache
+from graph.registry import graph_registry
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
-from utils import serialize_tool_result, format_structured_response
+from utils import serialize_tool_result, format_structured_response, SemanticCache, pack_context
 from models import PaperState, GradeDocuments
 from IPython.display import Image, display
 
@@ -19,6 +24,37 @@ response_model = init_chat_model("openai:gpt-4o-mini", temperature=0.7)
 grader_model = init_chat_model("openai:gpt-4.1", temperature=0)
 vector_search_tool = VectorSearchTool()
 
+# "direct" sends the generated query straight to the vector search, "tool_calling" lets the model issue the tool call
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "direct").lower()
+DIRECT_TOOL_CALL_ID = "direct_vector_search"
+
+# "score" decides relevance from the rerank scores and only asks the LLM grader inside the uncertain band, "llm" always asks the LLM grader
+GRADER_MODE = os.getenv("RAG_GRADER_MODE", "score").lower()
+RELEVANCE_SCORE_LOWER = float(os.getenv("RAG_RELEVANCE_SCORE_LOWER", "0.1"))
+RELEVANCE_SCORE_UPPER = float(os.getenv("RAG_RELEVANCE_SCORE_UPPER", "0.5"))
+# skipped reranks leave hits without a rerank score, which the score grader hands to the LLM grader,
+# set to true to always rerank instead when grading by score
+RERANK_FOR_SCORE_GRADER = os.getenv("RAG_RERANK_FOR_SCORE_GRADER", "false").lower() == "true"
+rerank_policy.scores_required = GRADER_MODE == "score" and RERANK_FOR_SCORE_GRADER
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_TRIM = os.getenv("RAG_CONTEXT_TRIM", "false").lower() == "true"
+
+# "sequential" waits for the relevance grade before generating, "speculative" generates the no-citation sentence while retrieval and grading run
+GENERATION_MODE = os.getenv("RAG_GENERATION_MODE", "sequential").lower()
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+cache_embeddings = init_embeddings(os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "openai:text-embedding-3-small"))
+response_cache = SemanticCache(
+    embed=cache_embeddings.aembed_query,
+    embed_many=cache_embeddings.aembed_documents,
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600")),
+    # shares the namespace generation of the result cache, so ingests by other workers invalidate it through Redis
+    generation=result_cache.ageneration,
+)
+
 GRADE_PROMPT = (
     "You are a grader assessing relevance of a retrieved text chunks to the previous sentences written so far in a research paper draft. \n "
     "Here are the retrieved text chunks: \n\n {context} \n\n"
@@ -26,6 +62,12 @@ GRADE_PROMPT = (
     "Give a binary score 'yes' or 'no' score to indicate whether the text chunks are relevant."
 )
 
+RAG_QUESTION_PROMPT = (
+    "You are an academic writing assistant that generates search queries for vector search. "
+    "Given the previous 2-3 sentences from a research paper draft, generate a specific question that will help find relevant chunks of text to continue the academic writing. "
+    "Only return the question itself."
+)
+
 def _set_env(key: str):
     if key not in os.environ:
         raise ValueError(f"{key} environment variable is not set")
@@ -33,6 +75,35 @@ def _set_env(key: str):
 _set_env("GOOGLE_API_KEY")
 _set_env("OPENAI_API_KEY")
 
+def emit_event(event: str, **data) -> None:
+    """
+    Send an event to consumers of a streamed graph run, a no-op when the graph is not streamed.
+    
+    Args:
+        event (str): Event name, one of "stage" or "token"
+        data: JSON serializable event payload
+    """
+    get_stream_writer()({"event": event, **data})
+
+async def astream_sentence(messages: list, stream_tokens: bool = True) -> str:
+    """
+    Generate a sentence with the response model, emitting every token as it arrives.
+    
+    Args:
+        messages (list): The prompt messages
+        stream_tokens (bool): Whether to emit "token" events
+        
+    Returns:
+        str: The full generated sentence
+    """
+    parts = []
+    async for chunk in response_model.astream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            if stream_tokens:
+                emit_event("token", text=chunk.content)
+    return "".join(parts)
+
 def generate_question_for_rag(content: str) -> str:
     """
     Generate a specific question for vector search based on the previous sentences.
@@ -44,12 +115,29 @@ def generate_question_for_rag(content: str) -> str:
         str: A focused question for vector search
     """
     messages = [
-        SystemMessage(content="You are an academic writing assistant that generates search queries for vector search. Given the previous 2-3 sentences from a research paper draft, generate a specific question that will help find relevant chunks of text to continue the academic writing. Only return the question itself."),
+        SystemMessage(content=RAG_QUESTION_PROMPT),
         HumanMessage(content=content)
     ]
     response = response_model.invoke(messages)
     return response.content
 
+async def agenerate_question_for_rag(content: str) -> str:
+    """
+    Async version of `generate_question_for_rag`.
+    
+    Args:
+        content (str): The previous 2-3 sentences from the research paper
+        
+    Returns:
+        str: A focused question for vector search
+    """
+    messages = [
+        SystemMessage(content=RAG_QUESTION_PROMPT),
+        HumanMessage(content=content)
+    ]
+    response = await response_model.ainvoke(messages)
+    return response.content
+
 def evaluate_rag_necessity(content: str) -> bool:
     """
     Evaluate whether the next sentence in the academic writing requires citation.
@@ -81,56 +169,124 @@ def execute_tool_call(tool_call):
         return result
     return None
 
-def retrieve_relevant_documents(state: MessagesState):
+async def aexecute_tool_call(tool_call):
+    """Execute a tool call asynchronously and return its result."""
+    tool_name = tool_call["function"]["name"]
+    tool_args = json.loads(tool_call["function"]["arguments"])
+    if tool_name == "vector_search":
+        result = await vector_search_tool._arun(**tool_args)
+        return result
+    return None
+
+async def retrieve_with_tool_call(search_query: str):
     """
-    Retrieves documents relevant to continuing the academic writing
+    Let the model issue the vector_search tool call for the search query and execute it.
     
     Args:
-        state (MessagesState): The current conversation state with previous sentences
+        search_query (str): The generated search query
     
     Returns:
-        MessagesState: Updated state with retrieved documents
+        tuple: Serialized tool results and the id of the first tool call, or (None, None) if the model made no tool call
     """
-    content = state["messages"][0].content
-    search_query = generate_question_for_rag(content)
-    
     model = response_model.bind_tools([vector_search_tool])
-    initial_response = model.invoke([
+    initial_response = await model.ainvoke([
         SystemMessage(content="Use the vector_search tool with the given query."),
         HumanMessage(content=f"Using the following search query: '{search_query}")
     ])
     
+    if not (hasattr(initial_response, 'additional_kwargs') and 'tool_calls' in initial_response.additional_kwargs):
+        return None, None
+
     retrieved_documents = []
-    if hasattr(initial_response, 'additional_kwargs') and 'tool_calls' in initial_response.additional_kwargs:
-        for tool_call in initial_response.additional_kwargs['tool_calls']:
-            tool_result = execute_tool_call(tool_call)
-            if tool_result:
-                serialized_tool_result = serialize_tool_result(tool_result)
-                retrieved_documents.append(serialized_tool_result)
-        
-        retrieved_context = json.dumps(retrieved_documents)
-
-        return {
-            "messages": state["messages"] + [
-                ToolMessage(
-                    content=retrieved_context,
-                    tool_name="vector_search",
-                    tool_call_id=initial_response.additional_kwargs['tool_calls'][0]['id']
-                )
-            ]
-        }
+    for tool_call in initial_response.additional_kwargs['tool_calls']:
+        tool_result = await aexecute_tool_call(tool_call)
+        if tool_result:
+            serialized_tool_result = serialize_tool_result(tool_result)
+            retrieved_documents.append(serialized_tool_result)
+
+    return retrieved_documents, initial_response.additional_kwargs['tool_calls'][0]['id']
+
+async def retrieve_direct(search_query: str):
+    """
+    Send the search query straight to the vector search without a tool-calling round trip.
     
-    return {
-        "messages": state["messages"] + [
-            ToolMessage(
-                content="No relevant documents found.",
-                tool_name="vector_search",
-                tool_call_id="no_results"
-            )
-        ]
-    }
+    Args:
+        search_query (str): The generated search query
+    
+    Returns:
+        tuple: Serialized tool results and a synthetic tool call id
+    """
+    tool_result = await vector_search_tool._arun(query=search_query)
+    retrieved_documents = [serialize_tool_result(tool_result)] if tool_result else []
+    return retrieved_documents, DIRECT_TOOL_CALL_ID
 
-def generate_response_with_rag(state: MessagesState):
+def retrieval_message(retrieved_documents, tool_call_id):
+    """
+    Wrap retrieved documents in the vector_search ToolMessage the downstream nodes expect.
+    
+    Args:
+        retrieved_documents (list): Serialized tool results, or None if no search was made
+        tool_call_id (str): Id of the tool call that produced the results
+    
+    Returns:
+        ToolMessage: The message carrying the JSON encoded results
+    """
+    if retrieved_documents is None:
+        return ToolMessage(
+            content="No relevant documents found.",
+            tool_name="vector_search",
+            tool_call_id="no_results"
+        )
+
+    return ToolMessage(
+        content=json.dumps(retrieved_documents),
+        tool_name="vector_search",
+        tool_call_id=tool_call_id
+    )
+
+async def retrieve_relevant_documents(state: MessagesState):
+    """
+    Retrieves documents relevant to continuing the academic writing
+    
+    Args:
+        state (MessagesState): The current conversation state with previous sentences
+    
+    Returns:
+        MessagesState: Updated state with retrieved documents
+    """
+    emit_event("stage", stage="retrieving")
+    content = state["messages"][0].content
+    search_query = await agenerate_question_for_rag(content)
+    
+    if RETRIEVAL_MODE == "tool_calling":
+        retrieved_documents, tool_call_id = await retrieve_with_tool_call(search_query)
+    else:
+        retrieved_documents, tool_call_id = await retrieve_direct(search_query)
+    
+    return {"messages": state["messages"] + [retrieval_message(retrieved_documents, tool_call_id)]}
+
+def build_prompt_context(retrieved_context: str, previous_sentences: str) -> str:
+    """
+    Pack the retrieved documents into the token-budgeted text that goes into the prompts.
+    
+    Args:
+        retrieved_context (str): JSON encoded list of serialized tool results
+        previous_sentences (str): The previous sentences, used to trim chunks when enabled
+        
+    Returns:
+        str: The packed context, or the raw retrieved context if it cannot be packed
+    """
+    try:
+        retrieved_documents = json.loads(retrieved_context)
+    except (json.JSONDecodeError, TypeError):
+        return retrieved_context
+    if not isinstance(retrieved_documents, list):
+        return retrieved_context
+
+    packed = pack_context(retrieved_documents, previous_sentences, token_budget=CONTEXT_TOKEN_BUDGET, trim=CONTEXT_TRIM)
+    return packed or retrieved_context
+
+async def generate_response_with_rag(state: MessagesState):
     """
     Generates the next sentence for the academic paper using the retrieved documents
     
@@ -171,35 +327,80 @@ def generate_response_with_rag(state: MessagesState):
         Your sentence should maintain the academic tone and flow naturally from the previous sentences.
         Do not include any form of citation in the final sentence. 
         Generate ONLY ONE sentence - do not write an entire paragraph or multiple sentences."""),
-        HumanMessage(content=f"PREVIOUS SENTENCES: {previous_sentences}\n\nRETRIEVED DOCUMENTS:\n{retrieved_context}")
+        HumanMessage(content=f"PREVIOUS SENTENCES: {previous_sentences}\n\nRETRIEVED DOCUMENTS:\n{build_prompt_context(retrieved_context, previous_sentences)}")
     ]
     
-    response = response_model.invoke(messages)
-    structured_response = format_structured_response(response.content, citation_info)
+    emit_event("stage", stage="generating", cited=True)
+    sentence = await astream_sentence(messages)
+    structured_response = format_structured_response(sentence, citation_info)
     return {"messages": state["messages"] + [AIMessage(content=json.dumps(structured_response))]}
 
-def generate_normal_response(state: MessagesState):
+async def generate_normal_response(state: MessagesState, stream_tokens: bool = True):
     """
     Generates the next sentence for the academic paper without using retrieved documents
     
     Args:
         state (MessagesState): The current conversation state with previous sentences
+        stream_tokens (bool): Whether to emit stage and token events while generating
     
     Returns:
         MessagesState: Updated state with the generated next sentence
     """
     previous_sentences = state["messages"][0].content
-    response = response_model.invoke([
+    if stream_tokens:
+        emit_event("stage", stage="generating", cited=False)
+    sentence = await astream_sentence([
         SystemMessage(content="""You are an academic writing assistant.
         Generate ONLY the next single sentence that continues the academic writing based on the previous sentences.
         Your sentence should maintain the academic tone and flow naturally from the previous sentences.
         Generate ONLY ONE sentence - do not write an entire paragraph or multiple sentences."""),
         HumanMessage(content=previous_sentences)
-    ])
-    structured_response = format_structured_response(response.content)
+    ], stream_tokens=stream_tokens)
+    structured_response = format_structured_response(sentence)
     return {"messages": state["messages"] + [AIMessage(content=json.dumps(structured_response))]}
 
-def check_relevance(
+def top_rerank_score(retrieved_context: str):
+    """
+    Get the highest rerank score among the retrieved documents.
+    
+    Args:
+        retrieved_context (str): JSON encoded list of serialized tool results
+        
+    Returns:
+        float: The highest `_score` of any hit, or None if no hit carries a score
+    """
+    try:
+        context_data = json.loads(retrieved_context)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+    scores = [
+        hit["_score"]
+        for doc in context_data if isinstance(doc, dict)
+        for hit in doc.get("results", []) if isinstance(hit, dict) and hit.get("_score") is not None
+    ]
+    return max(scores) if scores else None
+
+def grade_by_score(retrieved_context: str):
+    """
+    Grade the retrieved documents from their rerank scores without calling a model.
+    
+    Args:
+        retrieved_context (str): JSON encoded list of serialized tool results
+        
+    Returns:
+        str: "yes" or "no" when the top score is outside the uncertain band, None otherwise
+    """
+    score = top_rerank_score(retrieved_context)
+    if score is None:
+        return None
+    if score >= RELEVANCE_SCORE_UPPER:
+        return "yes"
+    if score < RELEVANCE_SCORE_LOWER:
+        return "no"
+    return None
+
+async def check_relevance(
     state: MessagesState,
 ) -> Literal["generate_with_rag", "generate_normal"]:
     """Determine whether the retrieved documents are relevant to the previous sentences written so far."""
@@ -207,23 +408,28 @@ def check_relevance(
     tool_message = state["messages"][-1]
  
     if not isinstance(tool_message, ToolMessage) or tool_message.tool_name != "vector_search":       
+        emit_event("stage", stage="graded", relevant=False)
         return {"check_relevance": "generate_normal"}
     
     retrieved_context = tool_message.content
     if retrieved_context == "No relevant documents found.":
+        emit_event("stage", stage="graded", relevant=False)
         return {"check_relevance": "generate_normal"}
 
-    prompt = GRADE_PROMPT.format(question=previous_sentences, context=retrieved_context)
-    
-    
-    response = (
-        grader_model
-        .with_structured_output(GradeDocuments).invoke(
-            [{"role": "user", "content": prompt}]
+    score = grade_by_score(retrieved_context) if GRADER_MODE == "score" else None
+
+    if score is None:
+        prompt = GRADE_PROMPT.format(question=previous_sentences, context=build_prompt_context(retrieved_context, previous_sentences))
+        
+        response = await (
+            grader_model
+            .with_structured_output(GradeDocuments).ainvoke(
+                [{"role": "user", "content": prompt}]
+            )
         )
-    )
-    score = response.binary_score
+        score = response.binary_score
     
+    emit_event("stage", stage="graded", relevant=score == "yes")
 
     if score == "yes":
         return {"check_relevance": "generate_with_rag"}
@@ -285,21 +491,80 @@ def generate_query_or_respond(state: PaperState):
     
     return {"messages": [response]}
 
-async def build_rag_graph(save_graph: bool = False):
+def _discard_task(task: asyncio.Task) -> None:
+    """Cancel a task whose result is no longer needed and swallow whatever it ends with."""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+async def _keep_speculative(task: asyncio.Task):
+    """Wait for the speculative normal response and emit it as a single token once it is chosen."""
+    emit_event("stage", stage="generating", cited=False)
+    result = await task
+    emit_event("token", text=json.loads(result["messages"][-1].content)["text"])
+    return result
+
+async def speculative_generate(state: MessagesState):
     """
-    Build the RAG workflow graph with relevance checking
+    Generates the next sentence while speculatively running the no-citation path
+    
+    The normal response is started at the same time as retrieval and relevance grading. If the
+    grade says the documents are not relevant the already running normal response is used,
+    otherwise it is cancelled and the sentence is generated with the retrieved documents.
+    
+    Args:
+        state (MessagesState): The current conversation state with previous sentences
     
     Returns:
-        StateGraph: The configured workflow graph
+        MessagesState: Updated state with the generated next sentence
     """
-    workflow = StateGraph(MessagesState)
-    
-    workflow.add_node("retrieve_documents", retrieve_relevant_documents)
-    workflow.add_node("check_relevance", check_relevance)
-    workflow.add_node("generate_with_rag", generate_response_with_rag)
-    workflow.add_node("generate_normal", generate_normal_response)
+    normal_task = asyncio.create_task(generate_normal_response(state, stream_tokens=False))
+    try:
+        try:
+            retrieved_state = await retrieve_relevant_documents(state)
+            decision = await check_relevance(retrieved_state)
+        except Exception as e:
+            logging.error(f"Retrieval failed during speculative generation, keeping the normal response: {str(e)}")
+            return await _keep_speculative(normal_task)
+
+        if decision["check_relevance"] == "generate_with_rag":
+            _discard_task(normal_task)
+            return await generate_response_with_rag(retrieved_state)
+
+        return await _keep_speculative(normal_task)
+    finally:
+        if not normal_task.done():
+            _discard_task(normal_task)
+
+RAG_GRAPH = "rag"
+SPECULATIVE_RAG_GRAPH = "rag_speculative"
+GENERATION_GRAPH = "rag_generation"
+
+def rag_graph_nodes():
+    """
+    Node functions of the RAG workflow graph, looked up at call time so changes are picked up by the registry.
+
+    Returns:
+        dict: Mapping of node name to node function
+    """
+    return {
+        "retrieve_documents": retrieve_relevant_documents,
+        "check_relevance": check_relevance,
+        "generate_with_rag": generate_response_with_rag,
+        "generate_normal": generate_normal_response,
+    }
+
+def add_generation_nodes(workflow: StateGraph, nodes: dict) -> None:
+    """
+    Add the relevance check and both generation nodes, wired through the conditional edge, to a workflow.
     
-    workflow.add_edge("retrieve_documents", "check_relevance")
+    Args:
+        workflow (StateGraph): The workflow being built
+        nodes (dict): Mapping of node name to node function
+    """
+    workflow.add_node("check_relevance", nodes["check_relevance"])
+    workflow.add_node("generate_with_rag", nodes["generate_with_rag"])
+    workflow.add_node("generate_normal", nodes["generate_normal"])
+
     workflow.add_conditional_edges(
         "check_relevance",
         lambda x: x["check_relevance"],
@@ -310,6 +575,21 @@ async def build_rag_graph(save_graph: bool = False):
     )
     workflow.add_edge("generate_with_rag", END)
     workflow.add_edge("generate_normal", END)
+
+async def build_rag_graph(save_graph: bool = False):
+    """
+    Build the RAG workflow graph with relevance checking
+    
+    Returns:
+        StateGraph: The configured workflow graph
+    """
+    workflow = StateGraph(MessagesState)
+    nodes = rag_graph_nodes()
+    
+    workflow.add_node("retrieve_documents", nodes["retrieve_documents"])
+    add_generation_nodes(workflow, nodes)
+    
+    workflow.add_edge("retrieve_documents", "check_relevance")
     
     workflow.set_entry_point("retrieve_documents")
     
@@ -321,15 +601,205 @@ async def build_rag_graph(save_graph: bool = False):
 
     return graph
 
-async def query_graph(query: str):
+graph_registry.register(RAG_GRAPH, build_rag_graph, nodes=rag_graph_nodes)
+
+def generation_graph_nodes():
+    """
+    Node functions of the generation-only graph, which starts from already retrieved documents.
+
+    Returns:
+        dict: Mapping of node name to node function
     """
-    Build the query workflow graph
+    nodes = rag_graph_nodes()
+    nodes.pop("retrieve_documents")
+    return nodes
+
+async def build_generation_graph():
+    """
+    Build the graph that grades already retrieved documents and generates the next sentence
     
     Returns:
         StateGraph: The configured workflow graph
     """
-    workflow = await build_rag_graph()
+    workflow = StateGraph(MessagesState)
+
+    add_generation_nodes(workflow, generation_graph_nodes())
+
+    workflow.set_entry_point("check_relevance")
+
+    return workflow.compile()
+
+graph_registry.register(GENERATION_GRAPH, build_generation_graph, nodes=generation_graph_nodes)
+
+def speculative_rag_graph_nodes():
+    """
+    Node functions the speculative RAG workflow graph runs, directly or through `speculative_generate`.
+
+    Returns:
+        dict: Mapping of node name to node function
+    """
+    return {
+        "speculative_generate": speculative_generate,
+        **rag_graph_nodes(),
+    }
+
+async def build_speculative_rag_graph():
+    """
+    Build the RAG workflow graph that runs the no-citation path speculatively
+    
+    Returns:
+        StateGraph: The configured workflow graph
+    """
+    workflow = StateGraph(MessagesState)
+
+    workflow.add_node("speculative_generate", speculative_rag_graph_nodes()["speculative_generate"])
+    workflow.add_edge("speculative_generate", END)
+
+    workflow.set_entry_point("speculative_generate")
+
+    return workflow.compile()
+
+graph_registry.register(SPECULATIVE_RAG_GRAPH, build_speculative_rag_graph, nodes=speculative_rag_graph_nodes)
+
+async def query_graph(query: str):
+    """
+    Run a query through the shared, already compiled RAG workflow graph, serving near-duplicate
+    queries from the semantic response cache
+    
+    Returns:
+        str: Content of the final message produced by the graph
+    """
+    vector = None
+    if SEMANTIC_CACHE_ENABLED:
+        cached, vector = await response_cache.lookup(query, LIBRARY_NAMESPACE)
+        if cached is not None:
+            return cached
+
+    workflow = await graph_registry.get(SPECULATIVE_RAG_GRAPH if GENERATION_MODE == "speculative" else RAG_GRAPH)
+    
+    result = await workflow.ainvoke({"messages": [HumanMessage(content=query)]})
+    content = result["messages"][-1].content
+
+    if SEMANTIC_CACHE_ENABLED and content:
+        await response_cache.store(query, LIBRARY_NAMESPACE, content, vector=vector)
+    
+    return content
+
+async def batch_query_graph(queries: list[str], max_concurrency: int = 4):
+    """
+    Run several queries through the RAG workflow, sharing retrieval across them
     
-    result = workflow.invoke({"messages": [HumanMessage(content=query)]})
+    Search queries are generated for every query, identical search queries are searched only
+    once and all searches run concurrently against the shared vector store. Grading and generation
+    then run per query through the generation graph, at most `max_concurrency` at a time.
+    Retrieval always uses the direct mode here since the point is to share the searches.
+    
+    Args:
+        queries (list[str]): The previous sentences of every suggestion
+        max_concurrency (int): Maximum number of queries generating at the same time
+    
+    Returns:
+        list: One (content, error) pair per query in input order, exactly one of them is None
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = [None] * len(queries)
+    vectors = [None] * len(queries)
+    pending = []
+
+    lookups = await response_cache.lookup_many(queries, LIBRARY_NAMESPACE) if SEMANTIC_CACHE_ENABLED else [(None, None)] * len(queries)
+    for i, (cached, vectors[i]) in enumerate(lookups):
+        if cached is not None:
+            results[i] = (cached, None)
+            continue
+        pending.append(i)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    search_queries = await asyncio.gather(
+        *(bounded(agenerate_question_for_rag(queries[i])) for i in pending),
+        return_exceptions=True,
+    )
+
+    unique_searches = {}
+    for search_query in search_queries:
+        if not isinstance(search_query, BaseException):
+            unique_searches.setdefault(" ".join(search_query.split()).lower(), search_query)
+
+    searched = {}
+    if unique_searches:
+        vector_store = await aget_vector_store()
+        responses = await asyncio.gather(
+            *(vector_store.aquery(namespace=LIBRARY_NAMESPACE, query=search_query) for search_query in unique_searches.values()),
+            return_exceptions=True,
+        )
+        for key, search_query, response in zip(unique_searches, unique_searches.values(), responses):
+            searched[key] = response if isinstance(response, BaseException) else [
+                serialize_tool_result({"query": search_query, "results": response})
+            ]
+
+    workflow = await graph_registry.get(GENERATION_GRAPH)
+
+    async def generate(i, search_query):
+        try:
+            if isinstance(search_query, BaseException):
+                raise search_query
+            retrieved_documents = searched[" ".join(search_query.split()).lower()]
+            if isinstance(retrieved_documents, BaseException):
+                raise retrieved_documents
+
+            async with semaphore:
+                result = await workflow.ainvoke({"messages": [
+                    HumanMessage(content=queries[i]),
+                    retrieval_message(retrieved_documents, DIRECT_TOOL_CALL_ID),
+                ]})
+            content = result["messages"][-1].content
+
+            if SEMANTIC_CACHE_ENABLED and content:
+                await response_cache.store(queries[i], LIBRARY_NAMESPACE, content, vector=vectors[i])
+            results[i] = (content, None)
+        except Exception as e:
+            logging.error(f"Error in batch graph query {i}: {str(e)}")
+            results[i] = (None, str(e))
+
+    await asyncio.gather(*(generate(i, search_query) for i, search_query in zip(pending, search_queries)))
+
+    return results
+
+async def stream_query_graph(query: str):
+    """
+    Run a query through the shared RAG workflow graph, yielding events as the graph progresses
     
-    return result["messages"][-1].content
\ No newline at end of file
+    Yields:
+        tuple: (event, data) pairs. "stage" events report retrieving, graded and generating, "token"
+            events carry pieces of the generated sentence and a closing "result" event carries the
+            structured response with its citation
+    """
+    vector = None
+    if SEMANTIC_CACHE_ENABLED:
+        cached, vector = await response_cache.lookup(query, LIBRARY_NAMESPACE)
+        if cached is not None:
+            structured_response = json.loads(cached)
+            yield "stage", {"stage": "cached"}
+            yield "token", {"text": structured_response["text"]}
+            yield "result", structured_response
+            return
+
+    workflow = await graph_registry.get(SPECULATIVE_RAG_GRAPH if GENERATION_MODE == "speculative" else RAG_GRAPH)
+
+    content = None
+    async for mode, chunk in workflow.astream(
+        {"messages": [HumanMessage(content=query)]},
+        stream_mode=["custom", "values"],
+    ):
+        if mode == "custom":
+            event = chunk.pop("event")
+            yield event, chunk
+        elif chunk.get("messages"):
+            content = chunk["messages"][-1].content
+
+    if SEMANTIC_CACHE_ENABLED and content:
+        await response_cache.store(query, LIBRARY_NAMESPACE, content, vector=vector)
+
+    yield "result", json.loads(content)
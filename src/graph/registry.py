@@ -0,0 +1,129 @@
+import os
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+REBUILD_GRAPH_ON_CHANGE = os.getenv("GRAPH_REBUILD_ON_CHANGE", "false").lower() == "true"
+
+GraphBuilder = Callable[[], Awaitable[Any]]
+NodeProvider = Callable[[], Dict[str, Callable]]
+
+def node_signature(nodes: Dict[str, Callable]) -> str:
+    """
+    Compute a fingerprint of the node definitions of a graph.
+
+    Args:
+        nodes: Mapping of node name to node function
+
+    Returns:
+        str: Hex digest that changes whenever a node is added, removed, renamed or its code changes
+    """
+    digest = hashlib.sha256()
+    for name in sorted(nodes):
+        func = nodes[name]
+        code = getattr(func, "__code__", None)
+        digest.update(name.encode())
+        digest.update(getattr(func, "__qualname__", repr(func)).encode())
+        if code is not None:
+            digest.update(code.co_code)
+            digest.update(repr(code.co_consts).encode())
+    return digest.hexdigest()
+
+class GraphRegistry:
+    """
+    A process-wide registry of compiled LangGraph workflows.
+
+    Graphs are built once, either eagerly at app startup through `warm_up` or lazily on the
+    first `get`, and the compiled graph is shared by every request afterwards.
+
+    Attributes:
+        rebuild_on_change (bool): Recompile a graph when its node definitions change
+    """
+
+    def __init__(self, rebuild_on_change: bool = REBUILD_GRAPH_ON_CHANGE):
+        """
+        Initialize an empty registry.
+
+        Args:
+            rebuild_on_change (bool): Check the node fingerprint on every `get` and recompile on change.
+                Defaults to the GRAPH_REBUILD_ON_CHANGE environment variable.
+        """
+        self.rebuild_on_change = rebuild_on_change
+        self._builders: Dict[str, GraphBuilder] = {}
+        self._node_providers: Dict[str, Optional[NodeProvider]] = {}
+        self._graphs: Dict[str, Any] = {}
+        self._signatures: Dict[str, Optional[str]] = {}
+        self._lock = asyncio.Lock()
+
+    def register(self, name: str, builder: GraphBuilder, nodes: Optional[NodeProvider] = None) -> None:
+        """
+        Register a graph builder under a name.
+
+        Args:
+            name: Name used to look the compiled graph up
+            builder: Coroutine function returning the compiled graph
+            nodes: Optional callable returning the current node functions, used for change detection
+        """
+        self._builders[name] = builder
+        self._node_providers[name] = nodes
+        self._graphs.pop(name, None)
+        self._signatures.pop(name, None)
+
+    def _current_signature(self, name: str) -> Optional[str]:
+        provider = self._node_providers.get(name)
+        return node_signature(provider()) if provider else None
+
+    def _is_stale(self, name: str) -> bool:
+        if name not in self._graphs:
+            return True
+        if not self.rebuild_on_change:
+            return False
+        return self._signatures.get(name) != self._current_signature(name)
+
+    async def get(self, name: str) -> Any:
+        """
+        Get a compiled graph, building it if it has not been built yet.
+
+        Args:
+            name: Name the graph was registered under
+
+        Returns:
+            The compiled graph
+
+        Raises:
+            KeyError: If no builder is registered under the name
+        """
+        if name not in self._builders:
+            raise KeyError(f"No graph registered under '{name}'")
+
+        if not self._is_stale(name):
+            return self._graphs[name]
+
+        async with self._lock:
+            if self._is_stale(name):
+                logging.info(f"Compiling graph '{name}'")
+                self._graphs[name] = await self._builders[name]()
+                self._signatures[name] = self._current_signature(name)
+            return self._graphs[name]
+
+    async def warm_up(self) -> None:
+        """Compile every registered graph, meant to be called once during app startup."""
+        for name in self._builders:
+            await self.get(name)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        Drop compiled graphs so they are rebuilt on the next `get`.
+
+        Args:
+            name: Graph to drop, or None to drop all of them
+        """
+        if name is None:
+            self._graphs.clear()
+            self._signatures.clear()
+        else:
+            self._graphs.pop(name, None)
+            self._signatures.pop(name, None)
+
+graph_registry = GraphRegistry()
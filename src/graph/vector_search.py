@@ -1,8 +1,10 @@
 from typing import Optional, Dict, Any
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
-from helpers import PineconeManager
+from helpers import get_vector_store, aget_vector_store
+
+LIBRARY_NAMESPACE = "library"
 
 class VectorSearchInput(BaseModel):
     query: str = Field(description="The search query to find relevant papers")
@@ -19,8 +21,8 @@ class VectorSearchTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         """Use the tool to search through papers."""
-        pinecone_manager = PineconeManager()
-        response = pinecone_manager.query(namespace="library", query=query)
+        vector_store = get_vector_store()
+        response = vector_store.query(namespace=LIBRARY_NAMESPACE, query=query)
 
         result = {
             "query": query,
@@ -32,7 +34,15 @@ class VectorSearchTool(BaseTool):
     async def _arun(
         self,
         query: str,
-        run_manager: Optional[CallbackManagerForToolRun] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
         """Use the tool asynchronously."""
-        return self._run(query, run_manager=run_manager.get_sync() if run_manager else None)
\ No newline at end of file
+        vector_store = await aget_vector_store()
+        response = await vector_store.aquery(namespace=LIBRARY_NAMESPACE, query=query)
+
+        result = {
+            "query": query,
+            "results": response
+        }
+
+        return result
\ No newline at end of file
@@ -1,4 +1,7 @@
+from .managers.vector_store import *
 from .managers.pinecone_manager import *
+from .managers.local_vector_store import *
+from .managers.job_manager import *
 from .managers.supabase_manager import *
 from .search.tavily_helper import *
 from .search.sonar_helper import *
@@ -1,7 +1,9 @@
 import requests
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from utils import parse_json_safely
+from utils.metadata import extract_local_metadata, METADATA_CONFIDENCE_THRESHOLD
 import logging
 from models import TopicMetadata, DocumentMetadata
 load_dotenv()
@@ -133,6 +135,45 @@ async def extract_metadata(doc_info: str) -> DocumentMetadata:
             }
         )
 
+async def resolve_metadata(
+    doc_info: str,
+    local: Optional[DocumentMetadata] = None,
+    confidence: float = 0.0,
+    title: str = "",
+    byline: str = "",
+    threshold: float = METADATA_CONFIDENCE_THRESHOLD,
+) -> DocumentMetadata:
+    """
+    Get the metadata of a document, calling Gemini only when the local extraction is not confident enough
+
+    Args:
+        doc_info: Text content from document chunks
+        local: Metadata extracted locally while chunking, extracted from `doc_info` and `title` when None
+        confidence: Confidence of `local`
+        title: Title segment found by Chunkr
+        byline: Segment following the Chunkr title
+        threshold: Confidence from which the local metadata is used as is
+
+    Returns:
+        DocumentMetadata, the fields Gemini leaves empty are filled in from the local metadata
+    """
+    if local is None:
+        local, confidence = extract_local_metadata(doc_info, title, byline)
+    if confidence >= threshold:
+        logging.info(f"Using local metadata with confidence {confidence}")
+        return local
+
+    logging.info(f"Local metadata confidence {confidence} is below {threshold}, asking Gemini")
+    metadata = await extract_metadata(doc_info)
+    for key in ("title", "description", "year", "authors"):
+        if not metadata.get(key):
+            metadata[key] = local.get(key) or metadata.get(key)
+    if not (metadata.get("citations") or {}).get("in_text"):
+        metadata["citations"] = local["citations"]
+    if local.get("identifier"):
+        metadata["identifier"] = local["identifier"]
+    return metadata
+
 async def extract_research_topic(user_query: str) -> TopicMetadata:
     """
     Extract research topic information from a user query using Gemini
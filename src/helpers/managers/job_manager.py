@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from functools import partial
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from helpers.managers.vector_store import aget_vector_store
+from helpers.gemini_helper import resolve_metadata
+from utils.ingestion_pipeline import IngestionPipeline, DocumentProgress, STRATEGIES
+
+load_dotenv()
+
+# number of ingestion jobs run concurrently by each API process
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", "2"))
+# seconds a finished job's status stays queryable
+PROCESS_JOB_TTL = int(os.getenv("PROCESS_JOB_TTL", "86400"))
+
+JOB_PREFIX = "paperal:jobs"
+
+class JobStore(ABC):
+    """
+    Storage of ingestion job states plus the queue of job ids waiting for a worker.
+
+    A job state is a JSON serializable dict, see `new_job_state`.
+    """
+
+    @abstractmethod
+    async def save(self, state: Dict[str, Any]) -> None:
+        """Create or replace the state of a job."""
+
+    @abstractmethod
+    async def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Get the state of a job, None if it is unknown or expired."""
+
+    @abstractmethod
+    async def push(self, task_id: str) -> None:
+        """Queue a job id."""
+
+    @abstractmethod
+    async def pop(self, timeout: float) -> Optional[str]:
+        """Take the next queued job id, waiting at most `timeout` seconds."""
+
+class InMemoryJobStore(JobStore):
+    """Job store local to this process, used when Redis is not configured or unreachable."""
+
+    def __init__(self, ttl: int = PROCESS_JOB_TTL):
+        self.ttl = ttl
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def _expire(self) -> None:
+        now = time.time()
+        for task_id in [task_id for task_id, state in self._states.items() if state.get("finished_at") and state["finished_at"] + self.ttl <= now]:
+            del self._states[task_id]
+
+    async def save(self, state: Dict[str, Any]) -> None:
+        self._expire()
+        self._states[state["task_id"]] = json.loads(json.dumps(state))
+
+    async def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        state = self._states.get(task_id)
+        return json.loads(json.dumps(state)) if state is not None else None
+
+    async def push(self, task_id: str) -> None:
+        await self._queue.put(task_id)
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class RedisJobStore(JobStore):
+    """Job store shared by every API process through Redis, jobs queued by one process can be run by another."""
+
+    def __init__(self, client: Any, ttl: int = PROCESS_JOB_TTL):
+        self.client = client
+        self.ttl = ttl
+
+    async def save(self, state: Dict[str, Any]) -> None:
+        await self.client.set(f"{JOB_PREFIX}:{state['task_id']}", json.dumps(state), ex=self.ttl)
+
+    async def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(f"{JOB_PREFIX}:{task_id}")
+        return json.loads(raw) if raw is not None else None
+
+    async def push(self, task_id: str) -> None:
+        await self.client.lpush(f"{JOB_PREFIX}:queue", task_id)
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        item = await self.client.brpop(f"{JOB_PREFIX}:queue", timeout=max(1, int(timeout)))
+        if item is None:
+            return None
+        _, task_id = item
+        return task_id.decode() if isinstance(task_id, bytes) else task_id
+
+async def create_job_store() -> JobStore:
+    """
+    Create the Redis job store if REDIS_URL is set and answers, otherwise the in-memory one.
+
+    Returns:
+        JobStore: The job store
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        try:
+            import redis.asyncio
+            client = redis.asyncio.Redis.from_url(redis_url, socket_connect_timeout=2)
+            await client.ping()
+            logging.info("Using Redis for the ingestion job queue")
+            return RedisJobStore(client)
+        except Exception as e:
+            logging.warning(f"Redis unavailable for the ingestion job queue, using in-memory queue: {str(e)}")
+    return InMemoryJobStore()
+
+def new_job_state(task_id: str, urls: List[str], strategy: str, namespace: str) -> Dict[str, Any]:
+    """
+    Build the initial state of an ingestion job.
+
+    Args:
+        task_id: Id of the job
+        urls: URLs to ingest
+        strategy: Chunking strategy of the ingestion pipeline
+        namespace: Vector store namespace the chunks are upserted into
+
+    Returns:
+        Dict[str, Any]: The job state, with one progress entry per URL
+    """
+    return {
+        "task_id": task_id,
+        "status": "queued",
+        "strategy": strategy,
+        "namespace": namespace,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "error": None,
+        "metrics": None,
+        "urls": {
+            url: {"status": "queued", "chunks": 0, "upserted": 0, "skipped": 0, "error": None, "metadata": None}
+            for url in urls
+        },
+    }
+
+def summarize_job(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Add per-status URL counts to a job state."""
+    counts: Dict[str, int] = {}
+    for progress in state["urls"].values():
+        counts[progress["status"]] = counts.get(progress["status"], 0) + 1
+    return {**state, "total": len(state["urls"]), "counts": counts}
+
+class JobManager:
+    """
+    Runs ingestion jobs, chunking URLs and upserting their chunks, on a bounded pool of background workers.
+
+    Use `start` and `stop` from the app lifespan. Jobs are submitted with `submit`, which returns
+    immediately with a task id whose progress `get` reports.
+
+    Attributes:
+        workers (int): Number of jobs run concurrently by this process
+        store (JobStore): Job states and queue, created on `start`
+    """
+
+    def __init__(self, workers: int = PROCESS_WORKERS):
+        self.workers = workers
+        self.store: Optional[JobStore] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Create the job store and start the workers."""
+        if self._tasks:
+            return
+        self.store = await create_job_store()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers, jobs they were running are left in the running state."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, urls: List[str], strategy: str, namespace: str) -> str:
+        """
+        Queue an ingestion job.
+
+        Args:
+            urls: URLs to ingest
+            strategy: Chunking strategy of the ingestion pipeline, "chunkr" or "langchain"
+            namespace: Vector store namespace the chunks are upserted into
+
+        Returns:
+            str: The task id
+
+        Raises:
+            ValueError: If the strategy is unknown
+            RuntimeError: If the manager was not started
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown chunking strategy '{strategy}', expected one of {', '.join(STRATEGIES)}")
+        if self.store is None:
+            raise RuntimeError("Job manager not started")
+        task_id = str(uuid.uuid4())
+        await self.store.save(new_job_state(task_id, list(dict.fromkeys(urls)), strategy, namespace))
+        await self.store.push(task_id)
+        logging.info(f"Queued ingestion job {task_id} with {len(urls)} URLs")
+        return task_id
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the progress of a job.
+
+        Args:
+            task_id: The task id returned by `submit`
+
+        Returns:
+            Optional[Dict[str, Any]]: The job state with URL counts, None if it is unknown or expired
+        """
+        if self.store is None:
+            raise RuntimeError("Job manager not started")
+        state = await self.store.load(task_id)
+        return summarize_job(state) if state is not None else None
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            try:
+                task_id = await self.store.pop(timeout=5)
+                if task_id is not None:
+                    await self._run(task_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Ingestion worker {number} error: {str(e)}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _run(self, task_id: str) -> None:
+        """
+        Stream every URL of a job through the ingestion pipeline, saving the progress as chunks are upserted.
+
+        The metadata of every document is resolved, with Gemini when the local extraction is not
+        confident enough, before its chunks are upserted, so every record carries its citation.
+        """
+        state = await self.store.load(task_id)
+        if state is None:
+            logging.warning(f"Ingestion job {task_id} expired before it started")
+            return
+
+        state["status"] = "running"
+        state["started_at"] = time.time()
+        await self.store.save(state)
+
+        try:
+            store = await aget_vector_store()
+
+            async def on_progress(doc: DocumentProgress) -> None:
+                progress = state["urls"].get(doc.url)
+                if progress is None:
+                    return
+                progress.update(status=doc.status, chunks=doc.chunks, upserted=doc.upserted, skipped=doc.skipped, error=doc.error)
+                if doc.metadata_resolved:
+                    progress["metadata"] = doc.metadata
+                state["metrics"] = pipeline.metrics()
+                await self.store.save(state)
+
+            async def resolve(doc: DocumentProgress) -> Dict[str, Any]:
+                return await resolve_metadata(doc.info, doc.metadata, doc.metadata_confidence, doc.title)
+
+            pipeline = IngestionPipeline(
+                partial(store.upsert_records, state["namespace"]),
+                strategy=state["strategy"],
+                on_progress=on_progress,
+                resolve_metadata=resolve,
+            )
+            async for _ in pipeline.run(list(state["urls"])):
+                pass
+
+            state["metrics"] = pipeline.metrics()
+            failed = [progress for progress in state["urls"].values() if progress["status"] == "failed"]
+            state["status"] = "failed" if len(failed) == len(state["urls"]) else "completed"
+        except Exception as e:
+            logging.error(f"Ingestion job {task_id} failed: {str(e)}", exc_info=True)
+            state["status"] = "failed"
+            state["error"] = "An internal error occurred"
+
+        state["finished_at"] = time.time()
+        await self.store.save(state)
+        logging.info(f"Ingestion job {task_id} {state['status']}")
+
+job_manager = JobManager()
@@ -0,0 +1,504 @@
+import os
+import re
+import sys
+import json
+import math
+import uuid
+import bisect
+import shutil
+import hashlib
+import logging
+import itertools
+import threading
+import numpy as np
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from helpers.managers.vector_store import VectorStore
+from utils.semantic_cache import invalidate_namespace
+from utils.fusion import weighted_score_fusion
+
+LOCAL_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "local_index")
+# optional LangChain embeddings model, e.g. "openai:text-embedding-3-small", the offline hashing embedder is used otherwise
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_VECTOR_EMBEDDING_MODEL")
+
+TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used by both the hashing embedder and BM25."""
+    return [token.lower() for token in TOKEN.findall(text)]
+
+class HashingEmbedder:
+    """
+    An offline embedder that hashes unigrams and bigrams into a fixed number of signed buckets.
+
+    It needs no model or network, which makes it suitable for benchmarks and tests. It only
+    captures lexical overlap, so use a real embeddings model when semantic recall matters.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vectors[row, h % self.dim] += 1.0 if h >> 63 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+class LangChainEmbedder:
+    """Adapter for LangChain embeddings models."""
+
+    def __init__(self, model: str):
+        from langchain.embeddings import init_embeddings
+        self.model = init_embeddings(model)
+        self.name = model
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.model.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+class BM25Index:
+    """
+    An in-process Okapi BM25 index over tokenized documents, only ever appended to.
+
+    Documents are numbered in insertion order and postings are appended in that order, so a
+    reader limited to the first `count` documents scores a consistent prefix while a writer adds more.
+
+    Attributes:
+        postings (Dict[str, List[Tuple[int, int]]]): Term to list of (document, term frequency), by document
+        doc_lengths (List[int]): Token count of every document
+        total_length (int): Sum of the document lengths
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+        self.k1 = k1
+        self.b = b
+
+    def add(self, text: str) -> int:
+        """Index the next document and return its position."""
+        doc = len(self.doc_lengths)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, []).append((doc, tf))
+        # the length goes last, readers never look at documents without one
+        self.doc_lengths.append(sum(counts.values()))
+        self.total_length += self.doc_lengths[-1]
+        return doc
+
+    def scores(self, query: str, count: Optional[int] = None, total_length: Optional[int] = None, dead: FrozenSet[int] = frozenset()) -> Dict[int, float]:
+        """
+        Score every document that contains at least one query term.
+
+        Args:
+            query: The query text
+            count: Only score the first `count` documents, defaults to all of them
+            total_length: Sum of the lengths of those documents
+            dead: Positions of superseded documents to leave out
+
+        Returns:
+            Dict[int, float]: Document position to BM25 score
+        """
+        n = len(self.doc_lengths) if count is None else count
+        if not n:
+            return {}
+        avgdl = (self.total_length if total_length is None else total_length) / n or 1.0
+
+        # superseded documents still count in the statistics until the namespace is compacted
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = bisect.bisect_left(postings, n, key=lambda posting: posting[0])
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc, tf in itertools.islice(postings, df):
+                if doc in dead:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / avgdl)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return dict(scores)
+
+def merge_blocks(blocks: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, ...]:
+    """Merge trailing vector blocks like a binary counter, keeping O(log n) blocks and copying each row O(log n) times."""
+    blocks = list(blocks)
+    while len(blocks) > 1 and len(blocks[-1]) >= len(blocks[-2]):
+        blocks[-2:] = [np.concatenate(blocks[-2:])]
+    return tuple(blocks)
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    A consistent read-only view of a namespace index.
+
+    `records` and `bm25` are shared with later snapshots and only ever appended to, everything
+    else is replaced, so positions below `count` always mean the same record.
+    """
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    blocks: Tuple[np.ndarray, ...] = ()
+    bm25: BM25Index = field(default_factory=BM25Index)
+    count: int = 0
+    total_length: int = 0
+    dead: FrozenSet[int] = frozenset()
+    embedder: Optional[str] = None
+
+    @property
+    def live(self) -> int:
+        return self.count - len(self.dead)
+
+    def vector(self, position: int) -> np.ndarray:
+        for block in self.blocks:
+            if position < len(block):
+                return np.asarray(block[position])
+            position -= len(block)
+        raise IndexError(position)
+
+    def dense_scores(self, vector: np.ndarray) -> np.ndarray:
+        similarities = np.concatenate([np.asarray(block @ vector) for block in self.blocks])
+        if self.dead:
+            similarities[list(self.dead)] = -np.inf
+        return similarities
+
+    def sparse_scores(self, query: str) -> Dict[int, float]:
+        return self.bm25.scores(query, self.count, self.total_length, self.dead)
+
+class NamespaceIndex:
+    """
+    The on-disk dense and sparse index of one namespace.
+
+    The directory holds `meta.json`, `records-<generation>.jsonl` with one {"_id", "fields"} line
+    per record version and `vectors-<generation>.f32` with one normalized float32 row per line,
+    memory-mapped on load. Upserts append to both files and then rewrite `meta.json` with the
+    committed count and size, a newer version of an id supersedes the older one. Once superseded
+    versions make up half of the files, they are rewritten under a new generation. The BM25 index
+    is rebuilt in memory from the records, other processes read only what was appended since
+    their last load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.loaded_mtime: Optional[float] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.meta: Dict[str, Any] = {}
+        self.positions: Dict[str, int] = {}
+        self.snapshot = Snapshot()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _records_file(self, meta: Dict[str, Any]) -> str:
+        return self._file(f"records-{meta['generation']}.jsonl")
+
+    def _vectors_file(self, meta: Dict[str, Any]) -> str:
+        return self._file(f"vectors-{meta['generation']}.f32")
+
+    def mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self._file("meta.json"))
+        except OSError:
+            return None
+
+    def load(self) -> Snapshot:
+        """Catch up with the files on disk and return the current snapshot."""
+        mtime = self.mtime()
+        if mtime is None:
+            if self.meta:
+                self._reset()
+        elif mtime != self.loaded_mtime:
+            with open(self._file("meta.json"), "r") as f:
+                meta = json.load(f)
+            if meta["generation"] != self.meta.get("generation") or meta["count"] < self.snapshot.count:
+                self._reset()
+            self._read(meta)
+        self.loaded_mtime = mtime
+        return self.snapshot
+
+    def _read(self, meta: Dict[str, Any]) -> None:
+        start, count = self.snapshot.count, meta["count"]
+        if count == start:
+            self.meta = meta
+            return
+        with open(self._records_file(meta), "rb") as f:
+            f.seek(self.meta.get("records_bytes", 0))
+            lines = f.read(meta["records_bytes"] - self.meta.get("records_bytes", 0)).splitlines()
+        records = [json.loads(line) for line in lines]
+        dim = meta["dim"]
+        vectors = np.memmap(self._vectors_file(meta), dtype=np.float32, mode="r", offset=start * dim * 4, shape=(count - start, dim))
+        self._apply(records, vectors, meta)
+
+    def _apply(self, records: List[Dict[str, Any]], vectors: np.ndarray, meta: Dict[str, Any]) -> None:
+        snapshot = self.snapshot
+        dead = set()
+        for record in records:
+            previous = self.positions.get(record["_id"])
+            if previous is not None:
+                dead.add(previous)
+            self.positions[record["_id"]] = snapshot.bm25.add(record["fields"].get("text", ""))
+            snapshot.records.append(record)
+
+        self.meta = meta
+        self.snapshot = Snapshot(
+            records=snapshot.records,
+            blocks=merge_blocks(snapshot.blocks + (vectors,)),
+            bm25=snapshot.bm25,
+            count=len(snapshot.records),
+            total_length=snapshot.bm25.total_length,
+            dead=snapshot.dead | dead if dead else snapshot.dead,
+            embedder=meta["embedder"],
+        )
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        # meta.json goes last, readers only look at what it commits
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._file("meta.json"))
+        self.loaded_mtime = self.mtime()
+
+    def append(self, records: List[Dict[str, Any]], vectors: np.ndarray, embedder: str) -> None:
+        """
+        Append new record versions and their vectors, then compact the files if needed.
+
+        Args:
+            records (List[Dict[str, Any]]): Records as {"_id", "fields"} dicts
+            vectors (np.ndarray): One normalized float32 row per record
+            embedder (str): Name of the embedder that produced the vectors
+        """
+        os.makedirs(self.path, exist_ok=True)
+        meta = dict(self.meta) if self.meta else {"generation": uuid.uuid4().hex, "count": 0, "records_bytes": 0}
+        meta.update(embedder=embedder, dim=vectors.shape[1])
+
+        lines = b"".join(json.dumps(record).encode() + b"\n" for record in records)
+        # truncating first drops whatever an interrupted upsert left past the committed size
+        with open(self._records_file(meta), "ab") as f:
+            f.truncate(meta["records_bytes"])
+            f.write(lines)
+        with open(self._vectors_file(meta), "ab") as f:
+            f.truncate(meta["count"] * meta["dim"] * 4)
+            f.write(vectors.tobytes())
+
+        meta = {**meta, "count": meta["count"] + len(records), "records_bytes": meta["records_bytes"] + len(lines)}
+        self._write_meta(meta)
+        self._apply(records, vectors, meta)
+
+        if self.snapshot.dead and 2 * len(self.snapshot.dead) >= self.snapshot.count:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the files without superseded record versions under a new generation."""
+        snapshot, previous = self.snapshot, self.meta
+        live = [position for position in range(snapshot.count) if position not in snapshot.dead]
+        records = [snapshot.records[position] for position in live]
+        vectors = np.concatenate(snapshot.blocks)[live]
+
+        meta = {**previous, "generation": uuid.uuid4().hex, "count": len(records)}
+        lines = b"".join(json.dumps(record).encode() + b"\n" for record in records)
+        meta["records_bytes"] = len(lines)
+        with open(self._records_file(meta), "wb") as f:
+            f.write(lines)
+        with open(self._vectors_file(meta), "wb") as f:
+            f.write(vectors.tobytes())
+        self._write_meta(meta)
+
+        # a fresh snapshot, queries holding the old one keep their records and postings
+        self._reset()
+        self._apply(records, vectors, meta)
+        for path in (self._records_file(previous), self._vectors_file(previous)):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.error(f"Failed to remove {path}: {e}")
+
+class LocalVectorStore(VectorStore):
+    """
+    An embedded hybrid vector store, a NumPy brute-force dense index plus a BM25 sparse index per namespace.
+
+    It returns results in the same shape as `PineconeManager.query`, which makes it usable as a
+    low-latency local mirror of the `library` namespace and as an offline stand-in for Pinecone.
+
+    Attributes:
+        path (str): Directory holding one sub-directory per namespace
+        embedder: Object with a `name` and an `embed(texts) -> np.ndarray` method
+        top_k (int): Hits taken from each of the dense and sparse sides
+        alpha (float): Weight of the normalized dense score in the hybrid score
+    """
+
+    def __init__(self, path: str = LOCAL_STORE_PATH, embedder: Any = None, top_k: int = 3, alpha: float = 0.5):
+        """
+        Initialize the store.
+
+        Args:
+            path (str): Directory holding the namespaces. Defaults to LOCAL_VECTOR_STORE_PATH.
+            embedder: Embedder to use, defaults to LOCAL_VECTOR_EMBEDDING_MODEL or the hashing embedder
+            top_k (int): Hits taken from each of the dense and sparse sides
+            alpha (float): Weight of the normalized dense score in the hybrid score
+        """
+        self.path = path
+        self.embedder = embedder or (LangChainEmbedder(LOCAL_EMBEDDING_MODEL) if LOCAL_EMBEDDING_MODEL else HashingEmbedder())
+        self.top_k = top_k
+        self.alpha = alpha
+        self._namespaces: Dict[str, NamespaceIndex] = {}
+        self._lock = threading.RLock()
+
+    def _namespace(self, namespace: str) -> NamespaceIndex:
+        with self._lock:
+            if namespace not in self._namespaces:
+                self._namespaces[namespace] = NamespaceIndex(os.path.join(self.path, namespace))
+            return self._namespaces[namespace]
+
+    def _snapshot(self, namespace: str) -> Snapshot:
+        with self._lock:
+            return self._namespace(namespace).load()
+
+    def query(self, namespace: str, query: str) -> List[Dict[str, Any]]:
+        """
+        Run a hybrid query against a namespace.
+
+        Args:
+            namespace (str): The namespace to query in
+            query (str): The query string to search for
+
+        Returns:
+            List[Dict[str, Any]]: Hits as {'_id', '_score', '_fused_score', 'fields'} dicts, best first
+
+        Raises:
+            ValueError: If the namespace was indexed with a different embedder
+        """
+        # one snapshot taken under the lock, concurrent upserts only append past its count
+        snapshot = self._snapshot(namespace)
+        if not snapshot.live:
+            return []
+        if snapshot.embedder != self.embedder.name:
+            raise ValueError(f"Namespace '{namespace}' was indexed with {snapshot.embedder}, not {self.embedder.name}")
+
+        top_k = min(self.top_k, snapshot.live)
+
+        similarities = snapshot.dense_scores(self.embedder.embed([query])[0])
+        dense_top = np.argpartition(-similarities, top_k - 1)[:top_k]
+        dense = {int(doc): float(similarities[doc]) for doc in dense_top}
+
+        sparse_scores = snapshot.sparse_scores(query)
+        sparse = dict(sorted(sparse_scores.items(), key=lambda item: item[1], reverse=True)[:top_k])
+
+        rankings = [
+            [{"_id": doc, "_score": score} for doc, score in sorted(side.items(), key=lambda item: item[1], reverse=True)]
+            for side in (dense, sparse)
+        ]
+        fused = weighted_score_fusion(rankings, weights=[self.alpha, 1 - self.alpha])
+
+        # `_score` is reserved for reranker relevance scores, the hybrid score goes into `_fused_score`
+        return [
+            {
+                "_id": snapshot.records[hit["_id"]]["_id"],
+                "_score": None,
+                "_fused_score": hit["_fused_score"],
+                "fields": snapshot.records[hit["_id"]]["fields"],
+            }
+            for hit in fused
+        ]
+
+    def upsert_records(self, namespace: str, data: List[Dict[str, Any]]) -> bool:
+        """
+        Insert or replace records, only records with new or changed text are embedded.
+
+        New versions are appended to the namespace, unchanged records are not written again.
+
+        Args:
+            namespace (str): The namespace to upsert records into
+            data (List[Dict[str, Any]]): Records with an "_id", a "text" and any other fields
+
+        Returns:
+            bool: True if upsert was successful
+        """
+        with self._lock:
+            index = self._namespace(namespace)
+            snapshot = index.load()
+            if snapshot.live and snapshot.embedder != self.embedder.name:
+                raise ValueError(f"Namespace '{namespace}' was indexed with {snapshot.embedder}, not {self.embedder.name}")
+
+            latest = {item["_id"]: {"_id": item["_id"], "fields": {k: v for k, v in item.items() if k != "_id"}} for item in data}
+
+            records, vectors, changed = [], [], []
+            for record in latest.values():
+                position = index.positions.get(record["_id"])
+                previous = snapshot.records[position] if position is not None else None
+                if previous == record:
+                    continue
+                if previous is not None and previous["fields"].get("text") == record["fields"].get("text"):
+                    vectors.append(snapshot.vector(position))
+                else:
+                    vectors.append(None)
+                    changed.append(len(records))
+                records.append(record)
+
+            if not records:
+                return True
+            if changed:
+                for i, vector in zip(changed, self.embedder.embed([records[i]["fields"].get("text", "") for i in changed])):
+                    vectors[i] = vector
+
+            index.append(records, np.vstack(vectors).astype(np.float32), self.embedder.name)
+
+        invalidate_namespace(namespace)
+        return True
+
+    def delete_records(self, namespace: str) -> bool:
+        """
+        Delete every record of a namespace.
+
+        Args:
+            namespace (str): The namespace to delete records from
+
+        Returns:
+            bool: True if deletion was successful
+        """
+        with self._lock:
+            shutil.rmtree(os.path.join(self.path, namespace), ignore_errors=True)
+            self._namespaces.pop(namespace, None)
+
+        invalidate_namespace(namespace)
+        return True
+
+def mirror_namespace(namespace: str, store: Optional[LocalVectorStore] = None) -> int:
+    """
+    Copy every record of a Pinecone namespace into the local store.
+
+    Args:
+        namespace (str): The namespace to mirror
+        store (LocalVectorStore): Target store, defaults to one at LOCAL_VECTOR_STORE_PATH
+
+    Returns:
+        int: Number of records mirrored
+    """
+    from helpers.managers.pinecone_manager import get_pinecone_manager
+
+    store = store or LocalVectorStore()
+
+    records = []
+    for batch in get_pinecone_manager().export_records(namespace):
+        records.extend(batch)
+        logging.info(f"Fetched {len(records)} records of namespace {namespace}")
+
+    store.delete_records(namespace)
+    store.upsert_records(namespace, records)
+    return len(records)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "mirror":
+        print("usage: python -m helpers.managers.local_vector_store mirror <namespace>")
+        sys.exit(1)
+    print(f"Mirrored {mirror_namespace(sys.argv[2])} records")
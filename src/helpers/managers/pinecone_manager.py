@@ -1,13 +1,274 @@
 import os
-from pinecone import Pinecone
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dataclasses import dataclass, field
+from pinecone import Pinecone, PineconeAsyncio, NotFoundException
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from utils.semantic_cache import invalidate_namespace
+from utils.fusion import fuse, RerankPolicy
+from utils.result_cache import ResultCache, result_cache_key
+from utils.chunk_manifest import get_chunk_manifest
+from helpers.managers.vector_store import VectorStore
 
 load_dotenv()
 
-class PineconeManager:
+DENSE_EMBED_MODEL = "llama-text-embed-v2"
+SPARSE_EMBED_MODEL = "pinecone-sparse-english-v0"
+
+# optional JSON file the resolved index hosts are persisted to, so cold starts skip describe_index
+HOST_CACHE_PATH = os.getenv("PINECONE_HOST_CACHE_PATH")
+
+# per-call timeouts in seconds for the async query path
+SEARCH_TIMEOUT = float(os.getenv("PINECONE_SEARCH_TIMEOUT", "3"))
+RERANK_TIMEOUT = float(os.getenv("PINECONE_RERANK_TIMEOUT", "3"))
+
+EMPTY_SEARCH = {"result": {"hits": []}}
+
+# "rrf" for reciprocal-rank fusion or "weighted" for min-max normalized score fusion of dense and sparse hits
+FUSION_METHOD = os.getenv("SEARCH_FUSION_METHOD", "rrf").lower()
+
+rerank_policy = RerankPolicy(
+    min_candidates=int(os.getenv("RERANK_MIN_CANDIDATES", "2")),
+    agreement_threshold=float(os.getenv("RERANK_SKIP_AGREEMENT", "1.0")),
+)
+
+# Pinecone accepts at most 96 records and 2MB per upsert_records request, batches are cut at whichever comes first
+UPSERT_MAX_RECORDS = int(os.getenv("PINECONE_UPSERT_MAX_RECORDS", "96"))
+UPSERT_MAX_BYTES = int(os.getenv("PINECONE_UPSERT_MAX_BYTES", "1800000"))
+# index writes in flight at once, a batch counts twice as it is written to both indexes
+UPSERT_CONCURRENCY = int(os.getenv("PINECONE_UPSERT_CONCURRENCY", "8"))
+UPSERT_MAX_RETRIES = int(os.getenv("PINECONE_UPSERT_MAX_RETRIES", "5"))
+# ids per fetch request when confirming that chunks the manifest lists as written are still in the indexes
+FETCH_BATCH_SIZE = 100
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# caches query and rerank results per namespace, shared through Redis when RESULT_CACHE_REDIS is enabled
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", "300")),
+    redis_url=os.getenv("REDIS_URL") if os.getenv("RESULT_CACHE_REDIS", "false").lower() == "true" else None,
+)
+
+_hosts: Dict[str, str] = {}
+_hosts_lock = threading.Lock()
+_managers: Dict[str, "PineconeManager"] = {}
+_managers_lock = threading.Lock()
+
+def _load_host_cache() -> Dict[str, str]:
+    if not HOST_CACHE_PATH or not os.path.exists(HOST_CACHE_PATH):
+        return {}
+    try:
+        with open(HOST_CACHE_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Ignoring unreadable Pinecone host cache {HOST_CACHE_PATH}: {e}")
+        return {}
+
+def _save_host_cache() -> None:
+    if not HOST_CACHE_PATH:
+        return
+    try:
+        tmp_path = f"{HOST_CACHE_PATH}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(_hosts, f)
+        os.replace(tmp_path, HOST_CACHE_PATH)
+    except OSError as e:
+        logging.warning(f"Could not persist Pinecone host cache to {HOST_CACHE_PATH}: {e}")
+
+def resolve_host(client: Pinecone, index_name: str) -> str:
+    """
+    Get the host of an index, from the process cache, the on-disk cache or finally describe_index.
+
+    Args:
+        client (Pinecone): The Pinecone client instance
+        index_name (str): Name of the index
+
+    Returns:
+        str: The index host
+
+    Raises:
+        ValueError: If the index does not exist
+    """
+    if index_name in _hosts:
+        return _hosts[index_name]
+
+    with _hosts_lock:
+        if not _hosts:
+            _hosts.update(_load_host_cache())
+        if index_name in _hosts:
+            return _hosts[index_name]
+
+        try:
+            host = client.describe_index(name=index_name)["host"]
+        except NotFoundException:
+            raise ValueError(f"Pinecone index '{index_name}' does not exist, run `python -m helpers.managers.pinecone_manager bootstrap` first")
+
+        _hosts[index_name] = host
+        _save_host_cache()
+        return host
+
+def bootstrap_indexes(index_name: str = "paperal") -> Dict[str, str]:
+    """
+    Create the dense and sparse indexes if they don't exist and cache their hosts.
+
+    Meant to be run once per environment, outside of the request path.
+
+    Args:
+        index_name (str): Name of the dense index, the sparse one is suffixed with "-sparse"
+
+    Returns:
+        Dict[str, str]: The resolved host of every index
+    """
+    client = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+
+    for name, model in ((index_name, DENSE_EMBED_MODEL), (f"{index_name}-sparse", SPARSE_EMBED_MODEL)):
+        if not client.has_index(name):
+            logging.info(f"Creating Pinecone index {name}")
+            client.create_index_for_model(
+                name=name,
+                cloud="aws",
+                region="us-east-1",
+                embed={
+                    "model": model,
+                    "field_map": {
+                        "text": "text"
+                    }
+                }
+            )
+
+    with _hosts_lock:
+        for name in (index_name, f"{index_name}-sparse"):
+            _hosts[name] = client.describe_index(name=name)["host"]
+        _save_host_cache()
+        return dict(_hosts)
+
+def batch_records(data: List[Dict[str, Any]], max_records: int = UPSERT_MAX_RECORDS, max_bytes: int = UPSERT_MAX_BYTES) -> Iterator[Tuple[List[Dict[str, Any]], int]]:
+    """
+    Split records into upsert batches bounded by record count and serialized payload size.
+
+    A single record larger than `max_bytes` still gets a batch of its own, Pinecone decides whether to accept it.
+
+    Args:
+        data (List[Dict[str, Any]]): Records to split
+        max_records (int): Maximum number of records per batch
+        max_bytes (int): Maximum JSON payload size per batch
+
+    Yields:
+        Tuple[List[Dict[str, Any]], int]: Consecutive batches of records and their payload size in bytes
+    """
+    batch, batch_bytes = [], 0
+    for record in data:
+        record_bytes = len(json.dumps(record, default=str).encode())
+        if batch and (len(batch) >= max_records or batch_bytes + record_bytes > max_bytes):
+            yield batch, batch_bytes
+            batch, batch_bytes = [], 0
+        batch.append(record)
+        batch_bytes += record_bytes
+    if batch:
+        yield batch, batch_bytes
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a write error is throttling or a transient server/connection error worth retrying."""
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status is not None:
+        return int(status) in RETRYABLE_STATUSES
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+@dataclass
+class BatchResult:
+    """Outcome of one upsert batch across the dense and sparse indexes."""
+    batch: int
+    records: int
+    payload_bytes: int
+    dense_ok: bool = False
+    sparse_ok: bool = False
+    attempts: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.dense_ok and self.sparse_ok
+
+@dataclass
+class UpsertReport:
+    """
+    Per-batch report of an `upsert_records` call, truthy only if every batch reached both indexes.
+
+    Attributes:
+        batches (List[BatchResult]): One result per batch, in batch order
+        skipped (int): Records left out because their text was already indexed under the same id
+        seconds (float): Wall time of the whole upsert
+    """
+    batches: List[BatchResult] = field(default_factory=list)
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def records(self) -> int:
+        return sum(result.records for result in self.batches)
+
+    @property
+    def failed(self) -> List[BatchResult]:
+        return [result for result in self.batches if not result.ok]
+
+    def __bool__(self) -> bool:
+        return not self.failed
+
+@dataclass
+class AsyncClients:
+    """The asyncio inference client and index clients opened on one event loop."""
+    inference: PineconeAsyncio
+    indexes: Dict[str, Any] = field(default_factory=dict)
+
+def get_pinecone_manager(index_name: str = "paperal") -> "PineconeManager":
+    """
+    Get the process-wide PineconeManager for an index, creating it on first use.
+
+    Args:
+        index_name (str): Name of the Pinecone index to use. Defaults to "paperal".
+
+    Returns:
+        PineconeManager: The shared manager
+    """
+    manager = _managers.get(index_name)
+    if manager is not None:
+        return manager
+
+    with _managers_lock:
+        if index_name not in _managers:
+            _managers[index_name] = PineconeManager(index_name)
+        return _managers[index_name]
+
+async def aget_pinecone_manager(index_name: str = "paperal") -> "PineconeManager":
+    """
+    Async version of `get_pinecone_manager`, the first initialization runs in a worker thread.
+
+    Args:
+        index_name (str): Name of the Pinecone index to use. Defaults to "paperal".
+
+    Returns:
+        PineconeManager: The shared manager
+    """
+    manager = _managers.get(index_name)
+    if manager is not None:
+        return manager
+    return await asyncio.to_thread(get_pinecone_manager, index_name)
+
+class PineconeManager(VectorStore):
     """
     A class to manage Pinecone operations including initialization, querying, and data upsertion.
+
+    Use `get_pinecone_manager` to share one instance per process instead of constructing it per call.
     
     Attributes:
         client (Pinecone): The Pinecone client instance
@@ -27,67 +288,135 @@ class PineconeManager:
         self.client = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
         self.index = None
         self.sparse_index = None
+        self.dense_host = None
+        self.sparse_host = None
+        # asyncio clients are bound to the event loop they were opened on, so they are kept per loop
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClients]" = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
         self._initialize_index()
         
     def _initialize_index(self) -> None:
         """
-        Initialize the Pinecone index. Creates a new index if it doesn't exist.
+        Connect to the dense and sparse indexes through their cached hosts.
+
+        Raises:
+            ValueError: If an index does not exist, see `bootstrap_indexes`
         """
-        if not self.client.has_index(self.index_name):
-            self.client.create_index_for_model(
-                name=self.index_name,
-                cloud="aws",
-                region="us-east-1",
-                embed={
-                    "model": "llama-text-embed-v2",
-                    "field_map": {
-                        "text": "text"
-                    }
-                }
-            )
-        
-        if not self.client.has_index(self.sparse_index_name):
-            self.client.create_index_for_model(
-                name=self.sparse_index_name,
-                cloud="aws",
-                region="us-east-1",
-                embed={
-                    "model": "pinecone-sparse-english-v0",
-                    "field_map": {
-                        "text": "text"
-                    }
-                }
-            )
+        self.dense_host = resolve_host(self.client, self.index_name)
+        self.sparse_host = resolve_host(self.client, self.sparse_index_name)
 
-        dense_index_info = self.client.describe_index(name=self.index_name)
-        sparse_index_info = self.client.describe_index(name=self.sparse_index_name)
-        
         self.index = self.client.Index(
-            host=dense_index_info["host"]
+            host=self.dense_host
         )
 
         self.sparse_index = self.client.Index(
-            host=sparse_index_info["host"]
+            host=self.sparse_host
         )
 
-    def merge_chunks(self, h1: Dict[str, Any], h2: Dict[str, Any], query: str) -> List[Dict[str, Any]]:
-        """Get the unique hits from two search results and return them as single array of {'_id', 'text'} dicts, printing each dict on a new line."""
-        
-        # deduplicate by _id
-        deduped_hits = {hit['_id']: hit for hit in h1['result']['hits'] + h2['result']['hits']}.values()
-        # sort by _score descending
-        sorted_hits = sorted(deduped_hits, key=lambda x: x['_score'], reverse=True)
+    def _loop_clients(self) -> "AsyncClients":
+        """Get the asyncio clients of the running event loop, opening them on first use and keeping them for later calls."""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = self._async_clients[loop] = AsyncClients(PineconeAsyncio(api_key=os.getenv("PINECONE_API_KEY")))
+            return clients
 
-        result = [{'_id': hit['_id'], 'fields': hit['fields']} for hit in sorted_hits]
+    def _async_client(self) -> PineconeAsyncio:
+        """Get the asyncio inference client of the running event loop."""
+        return self._loop_clients().inference
 
-        reranked_results = self.rerank_results(result, query)
+    def _async_index(self, host: str):
+        """Get the asyncio client of an index host on the running event loop."""
+        clients = self._loop_clients()
+        with self._async_lock:
+            if host not in clients.indexes:
+                clients.indexes[host] = clients.inference.IndexAsyncio(host=host)
+            return clients.indexes[host]
 
-        return reranked_results
-    
+    async def aclose(self) -> None:
+        """Close the asyncio clients opened on the running event loop, call it before that loop stops."""
+        with self._async_lock:
+            opened = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if opened is None:
+            return
 
-    def rerank_results(self, merged_results: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+        for client in [*opened.indexes.values(), opened.inference]:
+            try:
+                await client.close()
+            except Exception as e:
+                logging.error(f"Error closing Pinecone asyncio client: {str(e)}")
+
+    def _fuse_hits(self, h1: Dict[str, Any], h2: Dict[str, Any]):
+        """Fuse the hits of the dense and sparse search results, returning both rankings and the fused candidates."""
+
+        rankings = [
+            [{'_id': hit['_id'], '_score': hit['_score'], 'fields': hit['fields']} for hit in h['result']['hits']]
+            for h in (h1, h2)
+        ]
+        return rankings, fuse(rankings, method=FUSION_METHOD)
+
+    def _unreranked(self, fused: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return fused candidates in fused order, without a rerank `_score`."""
+
+        return [
+            {'_id': hit['_id'], '_score': None, '_fused_score': hit['_fused_score'], 'fields': hit['fields']}
+            for hit in fused[:10]
+        ]
+
+    def merge_chunks(self, h1: Dict[str, Any], h2: Dict[str, Any], query: str, namespace: str = None) -> List[Dict[str, Any]]:
+        """Fuse the unique hits of two search results and rerank them against the query unless the rerank policy skips it."""
         
+        rankings, fused = self._fuse_hits(h1, h2)
+        if not rerank_policy.should_rerank(rankings, fused):
+            return self._unreranked(fused)
+
+        reranked_results = self.rerank_results(fused, query, namespace)
+
+        return reranked_results
+
+    async def _amerge_chunks(self, h1: Dict[str, Any], h2: Dict[str, Any], query: str, namespace: str = None):
+        """Merge like `amerge_chunks`, also returning whether the rerank timed out."""
+
+        rankings, fused = self._fuse_hits(h1, h2)
+        if not rerank_policy.should_rerank(rankings, fused):
+            return self._unreranked(fused), False
+
+        try:
+            return await asyncio.wait_for(self.arerank_results(fused, query, namespace), timeout=RERANK_TIMEOUT), False
+        except asyncio.TimeoutError:
+            logging.warning("Pinecone rerank timed out, returning hits in fused order")
+            return self._unreranked(fused), True
+
+    async def amerge_chunks(self, h1: Dict[str, Any], h2: Dict[str, Any], query: str, namespace: str = None) -> List[Dict[str, Any]]:
+        """Async version of `merge_chunks`, falling back to the fused order if the rerank call times out."""
+
+        merged, _ = await self._amerge_chunks(h1, h2, query, namespace)
+        return merged
+
+    def _rebuild_reranked(self, merged_results: List[Dict[str, Any]], reranked_results: Any) -> List[Dict[str, Any]]:
+        """Attach the original metadata fields back onto the reranked documents, keeping the rerank relevance score as `_score`."""
+
         original_data = {hit['_id']: hit['fields'] for hit in merged_results}
+
+        return [{
+            '_id': hit['document']['id'], 
+            '_score': hit['score'],
+            'fields': {
+                'text': hit['document']['text'],
+                **{k: v for k, v in original_data[hit['document']['id']].items() if k != 'text'}
+            }
+        } for hit in reranked_results.data]
+
+    def rerank_results(self, merged_results: List[Dict[str, Any]], query: str, namespace: str = None) -> List[Dict[str, Any]]:
+        """Rerank the merged hits against the query, reusing a cached rerank of the same candidates when a namespace is given."""
+
+        if namespace is not None:
+            key = result_cache_key("rerank", query, [hit['_id'] for hit in merged_results])
+            cached = result_cache.get(namespace, key)
+            if cached is not None:
+                return cached
+
         rerank_documents = [{"id": hit['_id'], "text": hit['fields']['text']} for hit in merged_results]
     
         reranked_results = self.client.inference.rerank(
@@ -102,19 +431,42 @@ class PineconeManager:
             }
         )
 
-        reranked_results = [{
-            '_id': hit['document']['id'], 
-            'fields': {
-                'text': hit['document']['text'],
-                **{k: v for k, v in original_data[hit['document']['id']].items() if k != 'text'}
+        reranked = self._rebuild_reranked(merged_results, reranked_results)
+        if namespace is not None:
+            result_cache.set(namespace, key, reranked)
+        return reranked
+
+    async def arerank_results(self, merged_results: List[Dict[str, Any]], query: str, namespace: str = None) -> List[Dict[str, Any]]:
+        """Async version of `rerank_results` using the asyncio inference client."""
+
+        if namespace is not None:
+            key = result_cache_key("rerank", query, [hit['_id'] for hit in merged_results])
+            cached = await result_cache.aget(namespace, key)
+            if cached is not None:
+                return cached
+
+        rerank_documents = [{"id": hit['_id'], "text": hit['fields']['text']} for hit in merged_results]
+
+        reranked_results = await self._async_client().inference.rerank(
+            model="bge-reranker-v2-m3",
+            query=query,
+            documents=rerank_documents,
+            rank_fields=["text"],
+            top_n=10,
+            return_documents=True,
+            parameters={
+                "truncate": "END"
             }
-        } for hit in reranked_results.data]
+        )
 
-        return reranked_results
+        reranked = self._rebuild_reranked(merged_results, reranked_results)
+        if namespace is not None:
+            await result_cache.aset(namespace, key, reranked)
+        return reranked
     
     def query(self, namespace: str, query: str) -> Dict[str, Any]:
         """
-        Query the Pinecone index.
+        Query the Pinecone index, serving repeated queries from the result cache.
         
         Args:
             namespace (str): The namespace to query in
@@ -125,6 +477,11 @@ class PineconeManager:
         """
         if not self.index:
             raise ValueError("Index not initialized")
+
+        key = result_cache_key("query", query)
+        cached = result_cache.get(namespace, key)
+        if cached is not None:
+            return cached
         
         dense_hits = self.index.search(
             namespace=namespace, 
@@ -142,33 +499,211 @@ class PineconeManager:
             },
         )
 
-        return self.merge_chunks(dense_hits, sparse_hits, query)
+        results = self.merge_chunks(dense_hits, sparse_hits, query, namespace)
+        result_cache.set(namespace, key, results)
+        return results
+
+    async def _asearch(self, host: str, namespace: str, query: str, timeout: float) -> Dict[str, Any]:
+        """Search one index through the asyncio client, giving up after `timeout` seconds."""
+        return await asyncio.wait_for(
+            self._async_index(host).search(
+                namespace=namespace,
+                query={
+                    "inputs": {"text": query},
+                    "top_k": 3
+                },
+            ),
+            timeout=timeout,
+        )
+
+    async def aquery(self, namespace: str, query: str) -> List[Dict[str, Any]]:
+        """
+        Query the Pinecone index without blocking the event loop.
+
+        The dense and sparse searches run concurrently, each with its own timeout. If one of them
+        fails or times out the hits of the other one are still reranked and returned. Complete
+        results are cached, partial ones and ones that missed the rerank timeout are not.
+        
+        Args:
+            namespace (str): The namespace to query in
+            query (str): The query string to search for
+            
+        Returns:
+            List[Dict[str, Any]]: Reranked query results from Pinecone
+
+        Raises:
+            ValueError: If index is not initialized
+            Exception: The dense search error if both searches fail
+        """
+        if not self.index:
+            raise ValueError("Index not initialized")
+
+        key = result_cache_key("query", query)
+        cached = await result_cache.aget(namespace, key)
+        if cached is not None:
+            return cached
+
+        dense_hits, sparse_hits = await asyncio.gather(
+            self._asearch(self.dense_host, namespace, query, SEARCH_TIMEOUT),
+            self._asearch(self.sparse_host, namespace, query, SEARCH_TIMEOUT),
+            return_exceptions=True,
+        )
+
+        if isinstance(dense_hits, BaseException) and isinstance(sparse_hits, BaseException):
+            raise dense_hits
+
+        for name, hits in (("dense", dense_hits), ("sparse", sparse_hits)):
+            if isinstance(hits, BaseException):
+                logging.warning(f"Pinecone {name} search failed, using partial results: {hits!r}")
+
+        degraded = isinstance(dense_hits, BaseException) or isinstance(sparse_hits, BaseException)
+        if isinstance(dense_hits, BaseException):
+            dense_hits = EMPTY_SEARCH
+        if isinstance(sparse_hits, BaseException):
+            sparse_hits = EMPTY_SEARCH
+
+        results, rerank_timed_out = await self._amerge_chunks(dense_hits, sparse_hits, query, namespace)
+        if not degraded and not rerank_timed_out:
+            await result_cache.aset(namespace, key, results)
+        return results
     
-    def upsert_records(self, namespace: str, data: List[Dict[str, Any]]) -> bool:
+    def _write_batch(self, index: Any, namespace: str, batch: List[Dict[str, Any]], max_retries: int) -> Tuple[int, Optional[Exception]]:
+        """
+        Upsert one batch into one index, retrying throttled and transient failures with jittered exponential backoff.
+
+        Returns:
+            Tuple[int, Optional[Exception]]: Number of attempts made and the last error, None if the write succeeded
+        """
+        for attempt in range(1, max_retries + 2):
+            try:
+                index.upsert_records(namespace, batch)
+                return attempt, None
+            except Exception as e:
+                if attempt > max_retries or not _is_retryable(e):
+                    return attempt, e
+                delay = min(30.0, 0.5 * 2 ** (attempt - 1)) * (0.5 + random.random())
+                logging.warning(f"Pinecone upsert throttled or failed ({e!r}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _indexed_ids(self, namespace: str, ids: List[str]) -> set:
+        """
+        Get which of these ids are in both the dense and the sparse index.
+
+        Args:
+            namespace (str): The namespace to look in
+            ids (List[str]): Record ids to look up
+
+        Returns:
+            set: The ids found in both indexes, empty if the lookup failed
+        """
+        present = None
+        try:
+            for index in (self.index, self.sparse_index):
+                found = set()
+                for start in range(0, len(ids), FETCH_BATCH_SIZE):
+                    found.update(index.fetch(ids=ids[start:start + FETCH_BATCH_SIZE], namespace=namespace).vectors)
+                present = found if present is None else present & found
+        except Exception as e:
+            logging.error(f"Failed to look up manifest chunks in namespace {namespace}: {str(e)}")
+            return set()
+        return present
+
+    def upsert_records(
+        self,
+        namespace: str,
+        data: List[Dict[str, Any]],
+        concurrency: int = UPSERT_CONCURRENCY,
+        max_retries: int = UPSERT_MAX_RETRIES,
+        skip_unchanged: bool = True,
+    ) -> UpsertReport:
         """
-        Upsert records into the Pinecone index.
+        Upsert records into the dense and sparse Pinecone indexes.
+
+        Records are cut into batches by count and payload size, and the dense and sparse writes of
+        every batch run concurrently with at most `concurrency` writes in flight. Failed batches are
+        reported instead of aborting the other ones.
+
+        Records whose text the namespace manifest already lists under the same id are skipped, so
+        re-ingesting a paper only embeds the chunks whose text changed, whatever their other fields.
+        The manifest is local to this host, so skipped ids are first fetched from both indexes and
+        those missing, e.g. after the namespace was re-created, are written again. Only batches
+        written to both indexes are added to the manifest.
         
         Args:
             namespace (str): The namespace to upsert records into
             data (List[Dict[str, Any]]): List of records to upsert
+            concurrency (int): Maximum number of index writes in flight
+            max_retries (int): Retries per write on throttling or transient errors
+            skip_unchanged (bool): Skip records already listed in the namespace manifest
             
         Returns:
-            bool: True if upsert was successful
+            UpsertReport: Per-batch results, truthy if every batch was written to both indexes
             
         Raises:
             ValueError: If index is not initialized
         """
         if not self.index:
             raise ValueError("Index not initialized")
-        
-        batch_size = 96
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i + batch_size]
-            self.index.upsert_records(namespace, batch)
 
-            self.sparse_index.upsert_records(namespace, batch)
+        started = time.perf_counter()
+        manifest = get_chunk_manifest(self.index_name, namespace)
+        report = UpsertReport()
+
+        if skip_unchanged:
+            data, unchanged = manifest.split_unchanged(data, exists=partial(self._indexed_ids, namespace))
+            report.skipped = len(unchanged)
+
+        batches, writes = [], []
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            for number, (batch, payload_bytes) in enumerate(batch_records(data)):
+                result = BatchResult(batch=number, records=len(batch), payload_bytes=payload_bytes)
+                report.batches.append(result)
+                batches.append(batch)
+                for name, index in (("dense", self.index), ("sparse", self.sparse_index)):
+                    writes.append((result, name, executor.submit(self._write_batch, index, namespace, batch, max_retries)))
+
+        # the dense and sparse writes of a batch run concurrently, their outcomes are merged here once both are done
+        for result, name, future in writes:
+            attempts, error = future.result()
+            result.attempts = max(result.attempts, attempts)
+            if error is None:
+                setattr(result, f"{name}_ok", True)
+            else:
+                logging.error(f"Pinecone {name} upsert of batch {result.batch} failed: {str(error)}")
+                result.errors.append(f"{name}: {error!r}")
+
+        report.seconds = time.perf_counter() - started
+        logging.info(
+            f"Upserted {report.records} records in {len(report.batches)} batches to namespace {namespace} "
+            f"in {report.seconds:.1f}s, {report.skipped} unchanged skipped, {len(report.failed)} batches failed"
+        )
+
+        if batches:
+            for result, batch in zip(report.batches, batches):
+                if result.ok:
+                    manifest.add(batch)
+            invalidate_namespace(namespace)
+        return report
+
+    def export_records(self, namespace: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Read every record of a namespace back from the dense index.
         
-        return True
+        Args:
+            namespace (str): The namespace to export
+            
+        Yields:
+            List[Dict[str, Any]]: Batches of records in the shape `upsert_records` accepts
+        """
+        if not self.index:
+            raise ValueError("Index not initialized")
+
+        for ids in self.index.list(namespace=namespace):
+            fetched = self.index.fetch(ids=list(ids), namespace=namespace)
+            yield [
+                {"_id": record_id, **(vector.metadata or {})}
+                for record_id, vector in fetched.vectors.items()
+            ]
 
     def delete_records(self, namespace: str) -> bool:
         """
@@ -183,8 +718,18 @@ class PineconeManager:
         self.index.delete(delete_all=True, namespace=namespace)
         self.sparse_index.delete(delete_all=True, namespace=namespace)
 
+        get_chunk_manifest(self.index_name, namespace).clear()
+
+        invalidate_namespace(namespace)
         return True
     
 if __name__ == "__main__":
-    pinecone_manager = PineconeManager()
-    pinecone_manager.delete_records("library")
\ No newline at end of file
+    command = sys.argv[1] if len(sys.argv) > 1 else "bootstrap"
+
+    if command == "bootstrap":
+        print(f"Pinecone index hosts: {bootstrap_indexes()}")
+    elif command == "delete" and len(sys.argv) > 2:
+        get_pinecone_manager().delete_records(sys.argv[2])
+    else:
+        print("usage: python -m helpers.managers.pinecone_manager [bootstrap | delete <namespace>]")
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,88 @@
+import os
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+class VectorStore(ABC):
+    """
+    Interface every vector store backend implements.
+
+    Records are dicts with an "_id", a "text" field and any other metadata fields. Query results
+    are lists of {'_id', '_score', 'fields'} dicts, best hit first.
+    """
+
+    @abstractmethod
+    def query(self, namespace: str, query: str) -> List[Dict[str, Any]]:
+        """Run a hybrid query and return the ranked hits."""
+
+    async def aquery(self, namespace: str, query: str) -> List[Dict[str, Any]]:
+        """Async version of `query`, runs the blocking query in a worker thread unless overridden."""
+        return await asyncio.to_thread(self.query, namespace, query)
+
+    @abstractmethod
+    def upsert_records(self, namespace: str, data: List[Dict[str, Any]]) -> bool:
+        """Insert or replace records in a namespace."""
+
+    @abstractmethod
+    def delete_records(self, namespace: str) -> bool:
+        """Delete every record of a namespace."""
+
+    async def aclose(self) -> None:
+        """Close the clients the async methods keep open, a no-op unless overridden."""
+
+# "pinecone" for the hosted indexes, "local" for the embedded index on disk
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+def get_vector_store(backend: str = None) -> VectorStore:
+    """
+    Get the process-wide vector store for a backend, creating it on first use.
+
+    Args:
+        backend: "pinecone" or "local", defaults to the VECTOR_STORE_BACKEND environment variable
+
+    Returns:
+        VectorStore: The shared store
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = (backend or VECTOR_STORE_BACKEND).lower()
+    store = _stores.get(backend)
+    if store is not None:
+        return store
+
+    with _stores_lock:
+        if backend not in _stores:
+            if backend == "pinecone":
+                from helpers.managers.pinecone_manager import get_pinecone_manager
+                _stores[backend] = get_pinecone_manager()
+            elif backend == "local":
+                from helpers.managers.local_vector_store import LocalVectorStore
+                _stores[backend] = LocalVectorStore()
+            else:
+                raise ValueError(f"Unknown vector store backend '{backend}'")
+        return _stores[backend]
+
+async def aget_vector_store(backend: str = None) -> VectorStore:
+    """
+    Async version of `get_vector_store`, the first initialization runs in a worker thread.
+
+    Args:
+        backend: "pinecone" or "local", defaults to the VECTOR_STORE_BACKEND environment variable
+
+    Returns:
+        VectorStore: The shared store
+    """
+    store = _stores.get((backend or VECTOR_STORE_BACKEND).lower())
+    if store is not None:
+        return store
+    return await asyncio.to_thread(get_vector_store, backend)
+
+async def aclose_vector_stores() -> None:
+    """Close the async clients of every vector store created so far, call it on app shutdown."""
+    for store in list(_stores.values()):
+        await store.aclose()
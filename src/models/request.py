@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 class SentenceRequest(BaseModel):
@@ -20,10 +20,14 @@ class SearchRequest(BaseModel):
 
 class ProcessRequest(BaseModel):
     urls: list[str]
+    strategy: Literal["chunkr", "langchain"] = "chunkr"
 
 class GraphQueryRequest(BaseModel):
     query: str
 
+class BatchGraphQueryRequest(BaseModel):
+    queries: list[str]
+
 class AdaptRequest(BaseModel):
     writing_samples: str
     text_to_adapt: str
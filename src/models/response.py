@@ -1,5 +1,5 @@
-from typing_extensions import TypedDict
-from typing import List, Optional, TypeVar, Generic
+from typing_extensions import NotRequired, TypedDict
+from typing import Dict, List, Optional, TypeVar, Generic
 from pydantic import BaseModel
 
 class Citations(TypedDict):
@@ -16,6 +16,7 @@ class DocumentMetadata(TypedDict):
     year: str
     authors: list[str]
     citations: Citations
+    identifier: NotRequired[str]
 
 class SearchResponse(TypedDict):
     urls: List[str]
@@ -24,6 +25,32 @@ class ProcessResponse(TypedDict):
     success: bool
     error: Optional[str] = None
 
+class ProcessTaskResponse(TypedDict):
+    message: str
+    task_id: str
+
+class ProcessURLProgress(TypedDict):
+    status: str
+    chunks: int
+    upserted: int
+    skipped: int
+    error: Optional[str]
+    metadata: Optional[DocumentMetadata]
+
+class ProcessStatusResponse(TypedDict):
+    task_id: str
+    status: str
+    strategy: str
+    namespace: str
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    error: Optional[str]
+    metrics: Optional[Dict[str, Dict[str, float]]]
+    urls: Dict[str, ProcessURLProgress]
+    total: int
+    counts: Dict[str, int]
+
 T = TypeVar('T')
 
 class APIResponse(BaseModel, Generic[T]):
@@ -1,4 +1,15 @@
 from .text import *
+from .tokens import *
+from .chunk_manifest import *
+from .ingestion_cache import *
+from .metadata import *
+from .context import *
+from .image_captions import *
+from .pdf_parsing import *
 from .chunking import *
+from .ingestion_pipeline import *
 from .matching import *
+from .semantic_cache import *
+from .result_cache import *
+from .fusion import *
 from .dspy_test import *
\ No newline at end of file
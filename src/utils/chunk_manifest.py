@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# directory the per-namespace manifests of indexed chunk hashes are kept in
+CHUNK_MANIFEST_PATH = os.getenv("CHUNK_MANIFEST_PATH", "chunk_manifests")
+# manifest logs with more lines than this, mostly superseded, are compacted on load
+MANIFEST_COMPACT_MIN_LINES = 10000
+
+def content_hash(text: str) -> str:
+    """Hash chunk text with its whitespace collapsed, so the same passage always hashes the same."""
+    return hashlib.sha256(" ".join(text.split()).encode()).hexdigest()
+
+def content_chunk_id(text: str, document: str = "") -> str:
+    """
+    Get the deterministic id of a chunk, identical text of the same document always gets the same id.
+
+    Scoping the id by document keeps the same passage quoted by two papers as two records, each
+    with the source URL and citation of its own paper.
+
+    Args:
+        text: The chunk text
+        document: Key of the document the chunk belongs to, e.g. the hash of its content
+
+    Returns:
+        str: A 32 character hex id
+    """
+    if not document:
+        return content_hash(text)[:32]
+    return hashlib.sha256(f"{document}:{content_hash(text)}".encode()).hexdigest()[:32]
+
+class ChunkManifest:
+    """
+    The ids and text hashes of the chunks already written to one namespace of an index, persisted as an append-only log.
+
+    Only the text is compared, a record whose other fields changed, like a re-resolved citation,
+    is not written again.
+
+    The manifest is a local cache of what the index holds, it goes stale when the namespace is
+    deleted or re-created elsewhere. Pass `exists` to `split_unchanged` to confirm skipped ids
+    against the index, entries the index no longer has are forgotten and their records written again.
+
+    Every `add` appends its entries as JSON lines, so concurrent writers never overwrite each
+    other's entries and a crash loses at most the batch being written. Later lines win on load, on
+    top of a JSON manifest written by earlier versions, and the log is compacted through a unique
+    temporary file once it is mostly superseded lines.
+    Use `get_chunk_manifest` to share one instance per namespace within the process.
+
+    Attributes:
+        path (str): Path of the manifest log
+        entries (Dict[str, str]): Record id to the content hash of its text
+    """
+
+    def __init__(self, index_name: str, namespace: str, root: str = None):
+        """
+        Load the manifest of a namespace, starting empty if there is none yet.
+
+        Args:
+            index_name: Name of the index the namespace belongs to
+            namespace: The namespace
+            root: Directory of the manifests, defaults to CHUNK_MANIFEST_PATH
+        """
+        self.path = os.path.join(root or CHUNK_MANIFEST_PATH, index_name, f"{namespace}.jsonl")
+        self.entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        legacy_path = os.path.splitext(self.path)[0] + ".json"
+        if os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, "r") as f:
+                    self.entries = {record_id: key for key, record_id in json.load(f).items()}
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Ignoring unreadable chunk manifest {legacy_path}: {e}")
+
+        lines = 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    for line in f:
+                        try:
+                            key, record_id = json.loads(line)
+                        except (ValueError, TypeError):
+                            continue
+                        if key is None:
+                            self.entries.pop(record_id, None)
+                        else:
+                            self.entries[record_id] = key
+                        lines += 1
+            except OSError as e:
+                logging.warning(f"Ignoring unreadable chunk manifest {self.path}: {e}")
+        if lines > MANIFEST_COMPACT_MIN_LINES and lines > 2 * len(self.entries):
+            self._compact()
+
+    def split_unchanged(self, records: Iterable[Dict[str, Any]], exists: Optional[Callable[[List[str]], Set[str]]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split records into those still to be written and those whose text is already indexed under the same id.
+
+        Repeats of an id within `records` count as unchanged too, only the first one is written.
+
+        Args:
+            records: Records with an "_id" and a "text" field
+            exists: Optional callable returning which of the given ids the index actually holds
+
+        Returns:
+            tuple: The new or changed records and the unchanged ones
+        """
+        records = list(records)
+        pending, unchanged = [], []
+        seen = set()
+        with self._lock:
+            for record in records:
+                if record["_id"] in seen or self.entries.get(record["_id"]) == content_hash(record["text"]):
+                    unchanged.append(record)
+                else:
+                    seen.add(record["_id"])
+                    pending.append(record)
+
+        listed = [record_id for record_id in dict.fromkeys(record["_id"] for record in unchanged) if record_id not in seen]
+        if exists is not None and listed:
+            stale = set(listed) - set(exists(listed))
+            if stale:
+                logging.warning(f"{len(stale)} chunks listed in {self.path} are missing from the index, writing them again")
+                self.discard(stale)
+                return self.split_unchanged(records)
+        return pending, unchanged
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Record that these records were written, appending them to the log."""
+        added = {record["_id"]: content_hash(record["text"]) for record in records}
+        if not added:
+            return
+        with self._lock:
+            self.entries.update(added)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write("".join(json.dumps([key, record_id]) + "\n" for record_id, key in added.items()))
+            except OSError as e:
+                logging.warning(f"Could not persist chunk manifest to {self.path}: {e}")
+
+    def discard(self, record_ids: Iterable[str]) -> None:
+        """Forget these records, e.g. because the index no longer holds them."""
+        with self._lock:
+            removed = [record_id for record_id in record_ids if self.entries.pop(record_id, None) is not None]
+            if not removed:
+                return
+            try:
+                with open(self.path, "a") as f:
+                    f.write("".join(json.dumps([None, record_id]) + "\n" for record_id in removed))
+            except OSError as e:
+                logging.warning(f"Could not persist chunk manifest to {self.path}: {e}")
+
+    def clear(self) -> None:
+        """Forget every entry, e.g. after the namespace was deleted."""
+        with self._lock:
+            self.entries.clear()
+            for path in (self.path, os.path.splitext(self.path)[0] + ".json"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logging.warning(f"Could not clear chunk manifest {path}: {e}")
+
+    def _compact(self) -> None:
+        """Rewrite the log with one line per entry, atomically through a unique temporary file."""
+        with self._lock:
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    f.write("".join(json.dumps([key, record_id]) + "\n" for record_id, key in self.entries.items()))
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.warning(f"Could not compact chunk manifest {self.path}: {e}")
+
+_manifests: Dict[Tuple[str, str, str], ChunkManifest] = {}
+_manifests_lock = threading.Lock()
+
+def get_chunk_manifest(index_name: str, namespace: str, root: str = None) -> ChunkManifest:
+    """
+    Get the process-wide manifest of a namespace, loaded on first use.
+
+    Args:
+        index_name: Name of the index the namespace belongs to
+        namespace: The namespace
+        root: Directory of the manifests, defaults to CHUNK_MANIFEST_PATH
+
+    Returns:
+        ChunkManifest: The manifest shared by every upsert into the namespace
+    """
+    key = (root or CHUNK_MANIFEST_PATH, index_name, namespace)
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = ChunkManifest(index_name, namespace, root)
+        return _manifests[key]
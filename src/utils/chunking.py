@@ -1,4 +1,3 @@
-from chunkr_ai import Chunkr
 from chunkr_ai.models import (
     Configuration,
     SegmentProcessing,
@@ -9,10 +8,9 @@ from chunkr_ai.models import (
 )
 from dotenv import load_dotenv
 import os
-import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Tuple
 from utils import has_date_in_content
-# from utils.text import get_pdf_page_count
-from utils.langchain_chunking import get_chunks
 import logging
 
 logging.basicConfig(
@@ -22,113 +20,116 @@ logging.basicConfig(
 
 load_dotenv()
 
-async def process_urls(urls: list[str], strategy: str = "chunkr", citation_obj: str = None):
+# URLs processed at once and seconds allowed per URL
+PROCESS_URL_CONCURRENCY = int(os.getenv("PROCESS_URL_CONCURRENCY", "4"))
+PROCESS_URL_TIMEOUT = float(os.getenv("PROCESS_URL_TIMEOUT", "600"))
+
+def get_chunkr_config(citation_obj: str = None) -> Configuration:
     """
-    Process multiple document URLs one at a time using Chunkr
-    
+    Build the Chunkr configuration documents are uploaded with.
+
     Args:
-        urls: List of URLs to process
+        citation_obj: Citation object the text segments are mapped to
+
     Returns:
-        Async generator yielding processed data for each URL as it completes
+        Configuration: Chunkr configuration
     """
-    try:
-        logging.info(f"Starting to process {len(urls)} URLs using strategy: {strategy}")
-        chunkr = Chunkr(api_key=os.getenv("CHUNKR_API_KEY"))
-        
-        chunk_config = Configuration(
-            chunk_processing=ChunkProcessing(
-                ignore_headers_and_footers=False,
-                tokenizer=Tokenizer.CL100K_BASE
+    return Configuration(
+        chunk_processing=ChunkProcessing(
+            ignore_headers_and_footers=False,
+            tokenizer=Tokenizer.CL100K_BASE
+        ),
+        segment_processing=SegmentProcessing(
+            Table=GenerationConfig(
+                llm="Summarize the key trends in this table including any context from legends or surrounding text",
+                embed_sources=[EmbedSource.LLM, EmbedSource.MARKDOWN],
+                extended_context=True
             ),
-            segment_processing=SegmentProcessing(
-                Table=GenerationConfig(
-                    llm="Summarize the key trends in this table including any context from legends or surrounding text",
-                    embed_sources=[EmbedSource.LLM, EmbedSource.MARKDOWN],
-                    extended_context=True
-                ),
-                Picture=GenerationConfig(
-                    llm="Summarize the understanding of this image with the context of the surrounding text",
-                    embed_sources=[EmbedSource.LLM, EmbedSource.MARKDOWN],
-                    extended_context=True,
-                ),
-                Text=GenerationConfig(
-                    llm=f"Map the text to the citation order from this object {citation_obj}, return a list of citation orders that appear in the text. If none appear, return an empty list",
-                )
+            Picture=GenerationConfig(
+                llm="Summarize the understanding of this image with the context of the surrounding text",
+                embed_sources=[EmbedSource.LLM, EmbedSource.MARKDOWN],
+                extended_context=True,
             ),
-        )
+            Text=GenerationConfig(
+                llm=f"Map the text to the citation order from this object {citation_obj}, return a list of citation orders that appear in the text. If none appear, return an empty list",
+            )
+        ),
+    )
 
-        for url in urls:
-            result = await process_single_url(chunkr, url, chunk_config, strategy)
-            if result is not None:
-                yield result
-            logging.info(f"Completed processing URL: {url}")
+def summarize_chunkr_chunks(chunks) -> Tuple[str, str, str]:
+    """
+    Find the title, the byline and the header, footer and dated text of a document in its first Chunkr chunks.
 
-    except Exception as e:
-        logging.error(f"Error processing URLs: {str(e)}", exc_info=True)
-    finally:
-        await chunkr.close()
-        logging.info("Closed Chunkr client")
+    Args:
+        chunks: Chunks of the Chunkr task output
 
-async def process_single_url(chunkr: Chunkr, url: str, config: Configuration, strategy: str):
+    Returns:
+        tuple: The title, the header, footer and dated text, and the segment following the title
     """
-    Process a single URL and return the processed data
+    title = ""
+    info = ""
+    byline = ""
     
+    for chunk in chunks[:15]:
+        previous_type = None
+        for segment in chunk.segments:
+            if previous_type == "Title" and segment.segment_type == "Text" and not byline:
+                byline = segment.content
+            previous_type = segment.segment_type
+            if segment.segment_type == "Title":
+                title = segment.content
+                logging.info(f"Found title: {title}")
+            elif (segment.segment_type == "PageFooter" or segment.segment_type == "PageHeader") or has_date_in_content(segment.content):
+                info += segment.content
+                break
+
+    return title, info, byline
+
+async def process_urls(
+    urls: list[str],
+    strategy: str = "chunkr",
+    citation_obj: str = None,
+    concurrency: int = PROCESS_URL_CONCURRENCY,
+    timeout: float = PROCESS_URL_TIMEOUT,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process multiple document URLs concurrently without upserting them, a thin wrapper around `IngestionPipeline`.
+
+    Documents go through the same ingestion cache lookups, per-URL concurrency and per-URL timeout
+    as ingestion jobs, and are yielded in completion order. Documents that failed or timed out are
+    skipped, and closing the generator early stops the pipeline.
+
     Args:
-        chunkr: Chunkr instance
-        url: URL to process
-        config: Chunk configuration
+        urls: List of URLs to process
+        strategy: "chunkr" or "langchain"
+        citation_obj: Citation object the text segments are mapped to
+        concurrency: Maximum number of URLs processed at once
+        timeout: Seconds allowed per URL
+
     Returns:
-        Dictionary containing processed chunks and metadata
+        Async generator yielding the "url", "title", "info", "vector_data", "metadata" and
+        "metadata_confidence" of each URL as it completes
     """
-    try:
-        logging.info(f"Processing URL: {url}")
-            
-        if strategy == "chunkr":
-            logging.info(f"Using Chunkr strategy for {url}")
-            task = await chunkr.upload(url, config)
-            if task.output and task.output.chunks:
-                chunks = task.output.chunks
-                logging.info(f"Successfully extracted {len(chunks)} chunks from {url}")
-                
-                vector_data = [
-                    {
-                        "_id": chunk.chunk_id,
-                        "text": chunk.embed,
-                    }
-                    for chunk in chunks
-                ]
-
-                title = ""
-                info = ""
-                
-                for chunk in chunks[:15]:
-                    for segment in chunk.segments:
-                        if segment.segment_type == "Title":
-                            title = segment.content
-                            logging.info(f"Found title: {title}")
-                        elif (segment.segment_type == "PageFooter" or segment.segment_type == "PageHeader") or has_date_in_content(segment.content):
-                            info += segment.content
-                            break
-
-                logging.info(f"Completed processing {url} with Chunkr strategy")
-                return {
-                    "url": url,
-                    "title": title,
-                    "info": info,
-                    "vector_data": vector_data,
-                    "chunks": chunks
-                }
-        else:
-            logging.info(f"Using alternative chunking strategy for {url}")
-            info, chunks = get_chunks(url)
-            logging.info(f"Successfully processed {url} with alternative strategy")
-
-            return {
-                "url": url,
-                "info": info,
-                "vector_data": chunks
+    from utils.ingestion_pipeline import IngestionPipeline
+
+    records: Dict[str, List[Dict[str, Any]]] = {}
+
+    def collect(batch: List[Dict[str, Any]]) -> bool:
+        for record in batch:
+            records.setdefault(record["file_url"], []).append(record)
+        return True
+
+    pipeline = IngestionPipeline(collect, strategy=strategy, citation_obj=citation_obj, concurrency=concurrency, timeout=timeout)
+    async with aclosing(pipeline.run(urls)) as documents:
+        async for doc in documents:
+            vector_data = records.pop(doc.url, [])
+            if doc.status != "completed":
+                continue
+            yield {
+                "url": doc.url,
+                "title": doc.title,
+                "info": doc.info,
+                "vector_data": vector_data,
+                "metadata": doc.metadata,
+                "metadata_confidence": doc.metadata_confidence,
             }
-            
-    except Exception as e:
-        logging.error(f"Error processing URL {url}: {str(e)}", exc_info=True)
-        return None
\ No newline at end of file
@@ -0,0 +1,95 @@
+import re
+from typing import Any, Dict, List, Optional
+from utils.tokens import count_tokens, truncate_to_tokens
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+WORD = re.compile(r'\w+')
+
+def iter_ranked_hits(retrieved_documents: List[Dict[str, Any]]):
+    """Yield the hits of serialized tool results in the order they were reranked."""
+    for doc in retrieved_documents:
+        if not isinstance(doc, dict):
+            continue
+        for hit in doc.get("results", []):
+            if isinstance(hit, dict):
+                yield hit
+
+def trim_to_query(text: str, query: str, max_tokens: Optional[int] = None) -> str:
+    """
+    Keep the sentences of a chunk that share the most words with the query.
+
+    Sentences are ranked by word overlap with the query and kept, in their original order,
+    until the token limit is reached. Sentences without any overlap are dropped.
+
+    Args:
+        text: The chunk text
+        query: The text the chunk should support
+        max_tokens: Optional token limit for the trimmed chunk
+
+    Returns:
+        str: The trimmed chunk, or the original text if no sentence overlaps the query
+    """
+    sentences = [sentence for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+    query_words = {word.lower() for word in WORD.findall(query)}
+    if len(sentences) <= 1 or not query_words:
+        return text
+
+    overlaps = [len(query_words & {word.lower() for word in WORD.findall(sentence)}) for sentence in sentences]
+    ranked = sorted((i for i, overlap in enumerate(overlaps) if overlap), key=lambda i: overlaps[i], reverse=True)
+    if not ranked:
+        return text
+
+    kept = []
+    used = 0
+    for i in ranked:
+        tokens = count_tokens(sentences[i])
+        if max_tokens is not None and kept and used + tokens > max_tokens:
+            continue
+        kept.append(i)
+        used += tokens
+
+    return " ".join(sentences[i] for i in sorted(kept))
+
+def pack_context(
+    retrieved_documents: List[Dict[str, Any]],
+    query: str,
+    token_budget: int = 1500,
+    trim: bool = False,
+) -> str:
+    """
+    Pack retrieved chunks into a prompt context that fits a token budget.
+
+    Chunks are taken in rerank order and only their text is kept, ids, scores and the other
+    metadata fields are dropped. Packing stops at the first chunk that no longer fits, except
+    for the top chunk which is truncated to the budget so the context is never empty.
+
+    Args:
+        retrieved_documents: Serialized tool results of the vector search
+        query: The text the context should support, used for trimming
+        token_budget: Maximum number of tokens of the packed context
+        trim: Whether to trim every chunk to the sentences relevant to the query first
+
+    Returns:
+        str: Numbered chunk texts separated by blank lines
+    """
+    packed = []
+    used = 0
+
+    for hit in iter_ranked_hits(retrieved_documents):
+        text = (hit.get("fields") or {}).get("text")
+        if not text:
+            continue
+        if trim:
+            text = trim_to_query(text, query, max_tokens=token_budget - used)
+
+        entry = f"[{len(packed) + 1}] {text.strip()}"
+        tokens = count_tokens(entry) + (2 if packed else 0)
+        if used + tokens > token_budget:
+            if not packed:
+                packed.append(truncate_to_tokens(entry, token_budget))
+            break
+
+        packed.append(entry)
+        used += tokens
+
+    return "\n\n".join(packed)
@@ -0,0 +1,163 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Dict[str, Any]]], k: int = 60, weights: Optional[Sequence[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked hit lists with reciprocal-rank fusion.
+
+    Every hit scores `weight / (k + rank)` in every list it appears in, so only the positions
+    matter and the incomparable raw scores of the lists are ignored.
+
+    Args:
+        rankings: Hit lists, each sorted best first, hits are dicts with an "_id"
+        k: Rank offset damping the weight of the top positions
+        weights: Optional weight per list, defaults to 1 for every list
+
+    Returns:
+        List[Dict[str, Any]]: Unique hits sorted by fused score, with the score in "_fused_score"
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    hits: Dict[str, Dict[str, Any]] = {}
+
+    for ranking, weight in zip(rankings, weights):
+        for rank, hit in enumerate(ranking, start=1):
+            fused[hit["_id"]] = fused.get(hit["_id"], 0.0) + weight / (k + rank)
+            hits.setdefault(hit["_id"], hit)
+
+    return [
+        {**hits[hit_id], "_fused_score": score}
+        for hit_id, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+def weighted_score_fusion(rankings: Sequence[List[Dict[str, Any]]], weights: Optional[Sequence[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked hit lists by a weighted sum of their min-max normalized "_score"s.
+
+    Args:
+        rankings: Hit lists, hits are dicts with an "_id" and a "_score"
+        weights: Optional weight per list, defaults to an equal split
+
+    Returns:
+        List[Dict[str, Any]]: Unique hits sorted by fused score, with the score in "_fused_score"
+    """
+    weights = weights or [1.0 / len(rankings)] * len(rankings)
+    fused: Dict[str, float] = {}
+    hits: Dict[str, Dict[str, Any]] = {}
+
+    for ranking, weight in zip(rankings, weights):
+        scores = [hit.get("_score") or 0.0 for hit in ranking]
+        if not scores:
+            continue
+        low, high = min(scores), max(scores)
+        for hit, score in zip(ranking, scores):
+            normalized = 1.0 if high == low else (score - low) / (high - low)
+            fused[hit["_id"]] = fused.get(hit["_id"], 0.0) + weight * normalized
+            hits.setdefault(hit["_id"], hit)
+
+    return [
+        {**hits[hit_id], "_fused_score": score}
+        for hit_id, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+def fuse(rankings: Sequence[List[Dict[str, Any]]], method: str = "rrf", weights: Optional[Sequence[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked hit lists with the given method.
+
+    Args:
+        rankings: Hit lists, each sorted best first
+        method: "rrf" for reciprocal-rank fusion or "weighted" for weighted score normalization
+        weights: Optional weight per list
+
+    Returns:
+        List[Dict[str, Any]]: Unique hits sorted by fused score
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method == "rrf":
+        return reciprocal_rank_fusion(rankings, weights=weights)
+    if method == "weighted":
+        return weighted_score_fusion(rankings, weights=weights)
+    raise ValueError(f"Unknown fusion method '{method}'")
+
+def rank_agreement(rankings: Sequence[List[Dict[str, Any]]], depth: int = 3) -> float:
+    """
+    Measure how much ranked hit lists agree on their top positions.
+
+    Args:
+        rankings: Hit lists, each sorted best first
+        depth: Number of top positions compared
+
+    Returns:
+        float: Fraction of the top `depth` positions holding the same id in every list, 0 if any list is empty
+    """
+    tops = [[hit["_id"] for hit in ranking[:depth]] for ranking in rankings]
+    if not tops or not all(tops):
+        return 0.0
+    length = min(len(top) for top in tops)
+    same = sum(1 for position in range(length) if len({top[position] for top in tops}) == 1)
+    return same / depth
+
+class RerankPolicy:
+    """
+    Decides whether a fused candidate set is worth a call to the hosted reranker.
+
+    The rerank is skipped when there are fewer than `min_candidates` candidates or when the
+    rankings agree on at least `agreement_threshold` of their top positions. Skipped results have
+    no rerank score, so the score grader falls back to the LLM grader for them, callers that would
+    rather pay for the rerank set `scores_required` to rerank every non-empty candidate set.
+
+    Attributes:
+        min_candidates (int): Rerank only candidate sets at least this large
+        agreement_threshold (float): Skip the rerank at or above this rank agreement
+        scores_required (bool): Never skip the rerank of a non-empty candidate set
+    """
+
+    def __init__(self, min_candidates: int = 2, agreement_threshold: float = 1.0, depth: int = 3, scores_required: bool = False):
+        self.min_candidates = min_candidates
+        self.agreement_threshold = agreement_threshold
+        self.scores_required = scores_required
+        self.depth = depth
+        self._counters = {"decisions": 0, "reranked": 0, "skipped_few_candidates": 0, "skipped_agreement": 0}
+        self._lock = threading.Lock()
+
+    def should_rerank(self, rankings: Sequence[List[Dict[str, Any]]], fused: List[Dict[str, Any]]) -> bool:
+        """
+        Decide whether to rerank and count the decision.
+
+        Args:
+            rankings: The hit lists that were fused
+            fused: The fused candidates
+
+        Returns:
+            bool: True if the candidates should be reranked
+        """
+        if self.scores_required and fused:
+            reason = "reranked"
+        elif len(fused) < self.min_candidates:
+            reason = "skipped_few_candidates"
+        elif rank_agreement(rankings, self.depth) >= self.agreement_threshold:
+            reason = "skipped_agreement"
+        else:
+            reason = "reranked"
+
+        with self._lock:
+            self._counters["decisions"] += 1
+            self._counters[reason] += 1
+        return reason == "reranked"
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the decision counters.
+
+        Returns:
+            Dict[str, Any]: Decision counts and the fraction of skipped reranks
+        """
+        with self._lock:
+            counters = dict(self._counters)
+        skipped = counters["skipped_few_candidates"] + counters["skipped_agreement"]
+        return {
+            **counters,
+            "skip_rate": skipped / counters["decisions"] if counters["decisions"] else 0.0,
+        }
@@ -0,0 +1,171 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from langchain_core.documents.base import Blob
+from langchain_community.document_loaders.parsers.images import BaseImageBlobParser
+
+# images smaller than this on either side or in area are decoration and never captioned
+IMAGE_MIN_SIDE = int(os.getenv("IMAGE_MIN_SIDE", "48"))
+IMAGE_MIN_AREA = int(os.getenv("IMAGE_MIN_AREA", "10000"))
+# caption calls in flight at once and the JSON file captions are persisted to
+CAPTION_CONCURRENCY = int(os.getenv("CAPTION_CONCURRENCY", "4"))
+CAPTION_CACHE_PATH = os.getenv("CAPTION_CACHE_PATH", "caption_cache.json")
+
+IMAGE_PLACEHOLDER = "{{{{image:{}}}}}"
+IMAGE_PATTERN = re.compile(r"!\[\{\{image:([0-9a-f]{64})\}\}\]\(#\)")
+
+def image_hash(png: bytes) -> str:
+    """Hash the PNG encoding of an image, identical images hash the same within and across documents."""
+    return hashlib.sha256(png).hexdigest()
+
+def is_captionable(width: int, height: int) -> bool:
+    """Whether an image is large enough to be worth a caption, icons, logos and rules are not."""
+    return min(width, height) >= IMAGE_MIN_SIDE and width * height >= IMAGE_MIN_AREA
+
+class CaptionCache:
+    """
+    Captions by image hash, persisted as JSON so an image is only ever captioned once.
+
+    Attributes:
+        path (str): Path of the cache file
+    """
+
+    def __init__(self, path: str = CAPTION_CACHE_PATH):
+        self.path = path
+        self._captions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._captions = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Ignoring unreadable caption cache {path}: {e}")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._captions.get(key)
+
+    def set(self, key: str, caption: str) -> None:
+        with self._lock:
+            self._captions[key] = caption
+
+    def save(self) -> None:
+        """Write the cache atomically."""
+        with self._lock:
+            try:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(self._captions, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.warning(f"Could not persist caption cache to {self.path}: {e}")
+
+_caption_cache: Optional[CaptionCache] = None
+_caption_cache_lock = threading.Lock()
+
+def get_caption_cache() -> CaptionCache:
+    """Get the process-wide caption cache, loaded on first use."""
+    global _caption_cache
+    with _caption_cache_lock:
+        if _caption_cache is None:
+            _caption_cache = CaptionCache()
+        return _caption_cache
+
+class ImageCaptioner:
+    """
+    Captions the images found while parsing, off the parsing path and with bounded parallelism.
+
+    Parsing leaves an `![{{image:<hash>}}](#)` placeholder per image. Every distinct hash is
+    captioned once, from the cache when possible, and `resolve` swaps the placeholders of a page
+    for the markdown image captions the loader used to inline.
+
+    Attributes:
+        cache (CaptionCache): Persistent captions by image hash
+    """
+
+    def __init__(self, parser_factory: Callable[[], BaseImageBlobParser], concurrency: int = CAPTION_CONCURRENCY, cache: CaptionCache = None):
+        """
+        Initialize the captioner.
+
+        Args:
+            parser_factory: Creates the image parser used for uncached images
+            concurrency: Caption calls in flight at once
+            cache: Caption cache, defaults to the process-wide one
+        """
+        self.parser_factory = parser_factory
+        self.cache = cache or get_caption_cache()
+        self._parser: Optional[BaseImageBlobParser] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="caption")
+        self._futures: Dict[str, Future] = {}
+        self._counters = {"images": 0, "cached": 0, "captioned": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _caption(self, key: str, png: bytes) -> str:
+        with self._lock:
+            if self._parser is None:
+                self._parser = self.parser_factory()
+        try:
+            caption = next(self._parser.lazy_parse(Blob.from_data(png, mime_type="image/png"))).page_content
+        except Exception as e:
+            logging.error(f"Error captioning image {key[:12]}: {str(e)}")
+            self._count("failed")
+            return ""
+        self.cache.set(key, caption)
+        self._count("captioned")
+        return caption
+
+    def submit(self, images: Dict[str, bytes]) -> None:
+        """
+        Start captioning the images not seen yet.
+
+        Args:
+            images: PNG bytes by image hash
+        """
+        for key, png in images.items():
+            if key in self._futures:
+                continue
+            self._count("images")
+            future: Future = Future()
+            caption = self.cache.get(key)
+            if caption is not None:
+                self._count("cached")
+                future.set_result(caption)
+            else:
+                future = self._executor.submit(self._caption, key, png)
+            self._futures[key] = future
+
+    def resolve(self, text: str) -> str:
+        """
+        Replace the image placeholders of a page with their captions, waiting for pending ones.
+
+        Args:
+            text: Page text with placeholders
+
+        Returns:
+            str: Page text with markdown image captions, images without a caption are dropped
+        """
+        def replace(match: re.Match) -> str:
+            future = self._futures.get(match.group(1))
+            caption = future.result() if future is not None else ""
+            if not caption:
+                return ""
+            escaped = caption.replace("]", r"\\]")
+            return f"![{escaped}](#)"
+
+        return IMAGE_PATTERN.sub(replace, text)
+
+    def close(self) -> None:
+        """Wait for pending captions and persist the cache."""
+        self._executor.shutdown(wait=True)
+        self.cache.save()
+        logging.info(f"Image captions: {self._counters}")
@@ -0,0 +1,201 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# directory of the cache, its size cap in bytes, and whether processing consults it at all
+INGESTION_CACHE_PATH = os.getenv("INGESTION_CACHE_PATH", "ingestion_cache")
+INGESTION_CACHE_MAX_BYTES = int(os.getenv("INGESTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+INGESTION_CACHE_ENABLED = os.getenv("INGESTION_CACHE_ENABLED", "true").lower() == "true"
+
+TRACKING_PARAMS = {"fbclid", "gclid", "ref"}
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings of the same document share a cache key.
+
+    Lowercases the scheme and host, drops default ports, fragments, trailing slashes and tracking
+    query parameters, and sorts the remaining query parameters.
+
+    Args:
+        url: The URL
+
+    Returns:
+        str: The normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme, parts.port) in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+class IngestionCache:
+    """
+    A persistent cache of processed documents, addressed by content hash and aliased by normalized URL.
+
+    Every entry is a gzip compressed JSON file under `entries/`, and `urls.json` maps normalized
+    URLs to entry keys so a known URL is served without downloading anything. Keys are prefixed with
+    the chunking strategy, since each strategy produces different chunks. When the entries exceed
+    `max_bytes`, the least recently used ones are evicted.
+
+    Attributes:
+        root (str): Directory of the cache
+        max_bytes (int): Size cap of the entries
+    """
+
+    def __init__(self, root: str = INGESTION_CACHE_PATH, max_bytes: int = INGESTION_CACHE_MAX_BYTES):
+        """
+        Open the cache, creating its directory on first write.
+
+        Args:
+            root: Directory of the cache
+            max_bytes: Size cap of the entries
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._urls: Optional[Dict[str, str]] = None
+
+    @property
+    def _urls_path(self) -> str:
+        return os.path.join(self.root, "urls.json")
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, "entries", f"{key.replace(':', '-')}.json.gz")
+
+    def _load_urls(self) -> Dict[str, str]:
+        if self._urls is None:
+            self._urls = {}
+            if os.path.exists(self._urls_path):
+                try:
+                    with open(self._urls_path, "r") as f:
+                        self._urls = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logging.warning(f"Ignoring unreadable ingestion cache index {self._urls_path}: {e}")
+        return self._urls
+
+    def _save_urls(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self._urls_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._urls, f)
+        os.replace(tmp_path, self._urls_path)
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            with gzip.open(path, "rt") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Dropping unreadable ingestion cache entry {path}: {e}")
+            os.remove(path)
+            return None
+        now = time.time()
+        os.utime(path, (now, now))
+        return entry
+
+    def get_by_url(self, url: str, strategy: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the processed document last stored for a URL.
+
+        Args:
+            url: URL of the document, normalized before the lookup
+            strategy: The chunking strategy
+
+        Returns:
+            Optional[Dict[str, Any]]: The processed document, None on a miss
+        """
+        with self._lock:
+            key = self._load_urls().get(f"{strategy}:{normalize_url(url)}")
+            return self._read(key) if key else None
+
+    def get_by_content(self, content_hash: str, strategy: str, url: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a processed document by the hash of its content, aliasing `url` to it on a hit.
+
+        Args:
+            content_hash: SHA-256 of the document
+            strategy: The chunking strategy
+            url: URL the document was fetched from this time
+
+        Returns:
+            Optional[Dict[str, Any]]: The processed document, None on a miss
+        """
+        key = f"{strategy}:{content_hash}"
+        with self._lock:
+            entry = self._read(key)
+            if entry is not None and url:
+                self._load_urls()[f"{strategy}:{normalize_url(url)}"] = key
+                self._save_urls()
+            return entry
+
+    def put(self, url: str, strategy: str, document: Dict[str, Any], content_hash: str = None) -> None:
+        """
+        Store a processed document, then evict the least recently used entries over the size cap.
+
+        Args:
+            url: URL the document was fetched from
+            strategy: The chunking strategy
+            document: JSON serializable processed document
+            content_hash: SHA-256 of the document, the normalized URL is hashed instead when unknown
+        """
+        key = f"{strategy}:{content_hash or hashlib.sha256(normalize_url(url).encode()).hexdigest()}"
+        with self._lock:
+            path = self._entry_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, "wt", compresslevel=6) as f:
+                json.dump(document, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+
+            self._load_urls()[f"{strategy}:{normalize_url(url)}"] = key
+            self._evict()
+            self._save_urls()
+
+    def _evict(self) -> None:
+        directory = os.path.join(self.root, "entries")
+        files = [entry for entry in os.scandir(directory) if entry.name.endswith(".json.gz")]
+        total = sum(entry.stat().st_size for entry in files)
+        if total <= self.max_bytes:
+            return
+
+        evicted = set()
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+            evicted.add(entry.path)
+        logging.info(f"Evicted {len(evicted)} ingestion cache entries")
+
+        self._urls = {
+            url_key: key for url_key, key in self._urls.items()
+            if self._entry_path(key) not in evicted
+        }
+
+    async def aget_by_url(self, url: str, strategy: str) -> Optional[Dict[str, Any]]:
+        """Async version of `get_by_url`, the file I/O runs in a worker thread."""
+        return await asyncio.to_thread(self.get_by_url, url, strategy)
+
+    async def aget_by_content(self, content_hash: str, strategy: str, url: str = None) -> Optional[Dict[str, Any]]:
+        """Async version of `get_by_content`, the file I/O runs in a worker thread."""
+        return await asyncio.to_thread(self.get_by_content, content_hash, strategy, url)
+
+    async def aput(self, url: str, strategy: str, document: Dict[str, Any], content_hash: str = None) -> None:
+        """Async version of `put`, the file I/O runs in a worker thread."""
+        await asyncio.to_thread(self.put, url, strategy, document, content_hash)
+
+ingestion_cache = IngestionCache()
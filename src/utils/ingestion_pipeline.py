@@ -0,0 +1,600 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from functools import partial
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+from chunkr_ai import Chunkr
+from utils.chunk_manifest import content_chunk_id
+from utils.chunking import get_chunkr_config, summarize_chunkr_chunks, PROCESS_URL_CONCURRENCY, PROCESS_URL_TIMEOUT
+from utils.ingestion_cache import ingestion_cache, normalize_url, INGESTION_CACHE_ENABLED
+from utils.langchain_chunking import iter_windows, clean_window, make_images_parser
+from utils.image_captions import ImageCaptioner
+from utils.metadata import extract_local_metadata
+from utils.pdf_parsing import download_pdf, iter_pdf_pages
+
+# raw chunks buffered between parsing and cleaning, records per upsert batch and batches upserted at once
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "256"))
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "96"))
+PIPELINE_UPSERT_WORKERS = int(os.getenv("PIPELINE_UPSERT_WORKERS", "2"))
+
+STAGES = ("download", "parse", "clean", "upsert")
+STRATEGIES = ("chunkr", "langchain")
+
+class StageMetrics:
+    """
+    Throughput and input queue depth of a pipeline stage.
+
+    Attributes:
+        name (str): Name of the stage
+        items (int): Items the stage produced, documents for "download", chunks for the others
+        busy (float): Seconds the stage spent working, summed over its workers
+        blocked (float): Seconds the stage spent waiting on a full output queue
+    """
+
+    def __init__(self, name: str, queue: asyncio.Queue):
+        self.name = name
+        self.queue = queue
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self._depth_max = 0
+        self._depth_total = 0
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def sample(self) -> None:
+        """Record the depth of the input queue, called before every get."""
+        depth = self.queue.qsize()
+        self._depth_max = max(self._depth_max, depth)
+        self._depth_total += depth
+        self._samples += 1
+
+    def record(self, items: int = 0, seconds: float = 0.0, blocked: float = 0.0) -> None:
+        """Add to the counters, safe to call from worker threads."""
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+            self.blocked += blocked
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy, 3),
+            "blocked_seconds": round(self.blocked, 3),
+            "items_per_second": round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+            "queue_depth": self.queue.qsize(),
+            "queue_max_depth": self._depth_max,
+            "queue_mean_depth": round(self._depth_total / self._samples, 2) if self._samples else 0.0,
+            "queue_size": self.queue.maxsize,
+        }
+
+@dataclass
+class DocumentProgress:
+    """
+    Progress of one URL through the pipeline.
+
+    `status` goes from "queued" through "downloading", "parsing" and "upserting" to "completed" or
+    "failed". Chunks are upserted while the document is still being parsed, so `upserted` grows
+    during "parsing" already. `metadata` is resolved as soon as the first chunks are parsed, every
+    upserted record carries its "file_url" and "citation".
+    """
+    url: str
+    status: str = "queued"
+    chunks: int = 0
+    upserted: int = 0
+    skipped: int = 0
+    error: Optional[str] = None
+    title: str = ""
+    info: str = ""
+    metadata: Optional[Dict[str, Any]] = None
+    metadata_confidence: float = 0.0
+    metadata_resolved: bool = False
+    content_hash: Optional[str] = field(default=None, repr=False)
+    pdf_path: Optional[str] = field(default=None, repr=False)
+    cached: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    records: Optional[List[Dict[str, Any]]] = field(default=None, repr=False)
+    deadline: float = field(default=0.0, repr=False)
+    pending_batches: int = field(default=0, repr=False)
+    failed_batches: int = field(default=0, repr=False)
+    parsed: bool = field(default=False, repr=False)
+    metadata_ready: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    metadata_task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+# a raw window to clean, a finished record, or None once the document has no more chunks
+Payload = Optional[Union[str, Dict[str, Any]]]
+
+class IngestionPipeline:
+    """
+    Streams documents through download, parse and chunk, and clean stages into upserts, with bounded queues between stages.
+
+    Each stage runs its own workers. Chunks are cleaned and upserted in batches as soon as they
+    are cut, so the first pages of a paper are searchable before the last ones are parsed and at
+    most a few queues of chunks are in memory at once. A full queue blocks the stage feeding it,
+    so a slow vector store slows parsing down instead of piling chunks up.
+
+    Attributes:
+        sink (Callable): Upserts a batch of records, e.g. a bound `upsert_records`, run in a thread
+        strategy (str): "chunkr" or any other value for the LangChain strategy
+        concurrency (int): Documents downloaded and parsed at once
+        timeout (float): Seconds allowed per document for downloading and parsing
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[Dict[str, Any]]], Any],
+        strategy: str = "chunkr",
+        citation_obj: str = None,
+        concurrency: int = PROCESS_URL_CONCURRENCY,
+        timeout: float = PROCESS_URL_TIMEOUT,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        batch_size: int = PIPELINE_BATCH_SIZE,
+        upsert_workers: int = PIPELINE_UPSERT_WORKERS,
+        chunk_size: int = 512,
+        chunk_overlap: int = 100,
+        on_progress: Optional[Callable[[DocumentProgress], Awaitable[None]]] = None,
+        resolve_metadata: Optional[Callable[[DocumentProgress], Awaitable[Dict[str, Any]]]] = None,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            sink: Upserts a batch of records, its result is truthy when the batch was stored
+            strategy: "chunkr" or any other value for the LangChain strategy
+            citation_obj: Citation object Chunkr maps the text segments to
+            concurrency: Documents downloaded and parsed at once
+            timeout: Seconds allowed per document for downloading and parsing
+            queue_size: Raw chunks buffered between parsing and cleaning
+            batch_size: Records per upsert batch
+            upsert_workers: Batches upserted at once
+            chunk_size: Tokens per chunk of the LangChain strategy
+            chunk_overlap: Tokens shared by consecutive chunks of the LangChain strategy
+            on_progress: Awaited whenever the progress of a document changes
+            resolve_metadata: Completes the locally extracted metadata of a document, e.g. with an LLM,
+                the local metadata is used as is when None
+        """
+        self.sink = sink
+        self.strategy = strategy
+        self.citation_obj = citation_obj
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.upsert_workers = max(1, upsert_workers)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.on_progress = on_progress
+        self.resolve_metadata = resolve_metadata
+
+        self.urls: asyncio.Queue = asyncio.Queue()
+        self.documents: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        self.windows: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.batches: asyncio.Queue = asyncio.Queue(maxsize=self.upsert_workers * 2)
+        self.results: asyncio.Queue = asyncio.Queue()
+        self.stages = {
+            name: StageMetrics(name, queue)
+            for name, queue in zip(STAGES, (self.urls, self.documents, self.windows, self.batches))
+        }
+
+        self._chunkr: Optional[Chunkr] = None
+        self._chunkr_config = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started = 0.0
+        self._closed = False
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage throughput and queue depth since the pipeline started."""
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {name: stage.snapshot(elapsed) for name, stage in self.stages.items()}
+
+    async def run(self, urls: List[str]) -> AsyncIterator[DocumentProgress]:
+        """
+        Ingest URLs, yielding the progress of every document once all its chunks are upserted or it failed.
+
+        Closing the generator early stops the pipeline, chunks already upserted stay in the store.
+
+        Args:
+            urls: URLs to ingest, duplicates are ingested once
+
+        Yields:
+            DocumentProgress: Finished documents, in completion order
+        """
+        self._loop = asyncio.get_running_loop()
+        self._started = time.monotonic()
+        documents = [DocumentProgress(url) for url in dict.fromkeys(urls)]
+        for doc in documents:
+            self.urls.put_nowait(doc)
+
+        if self.strategy == "chunkr":
+            self._chunkr = Chunkr(api_key=os.getenv("CHUNKR_API_KEY"))
+            self._chunkr_config = get_chunkr_config(self.citation_obj)
+
+        logging.info(f"Starting ingestion pipeline for {len(documents)} URLs using strategy: {self.strategy}")
+        tasks = [asyncio.create_task(self._download_worker()) for _ in range(self.concurrency)]
+        tasks += [asyncio.create_task(self._parse_worker()) for _ in range(self.concurrency)]
+        tasks.append(asyncio.create_task(self._clean_worker()))
+        tasks += [asyncio.create_task(self._upsert_worker()) for _ in range(self.upsert_workers)]
+
+        try:
+            for _ in documents:
+                yield await self.results.get()
+        finally:
+            self._closed = True
+            for task in tasks:
+                task.cancel()
+            metadata_tasks = [doc.metadata_task for doc in documents if doc.metadata_task is not None]
+            for task in metadata_tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, *metadata_tasks, return_exceptions=True)
+            for doc in documents:
+                if doc.pdf_path is not None:
+                    os.remove(doc.pdf_path)
+                    doc.pdf_path = None
+            if self._chunkr is not None:
+                await self._chunkr.close()
+                logging.info("Closed Chunkr client")
+            logging.info(f"Ingestion pipeline metrics: {self.metrics()}")
+
+    async def _notify(self, doc: DocumentProgress) -> None:
+        if self.on_progress is None:
+            return
+        try:
+            await self.on_progress(doc)
+        except Exception as e:
+            logging.error(f"Error reporting progress of {doc.url}: {str(e)}")
+
+    async def _put(self, stage: str, queue: asyncio.Queue, item: Any) -> None:
+        """Put an item on the output queue of a stage, counting the time it is blocked."""
+        started = time.monotonic()
+        await queue.put(item)
+        self.stages[stage].record(blocked=time.monotonic() - started)
+
+    def _put_threadsafe(self, stage: str, queue: asyncio.Queue, item: Any) -> float:
+        """
+        Put an item on a queue from a worker thread, blocking the thread while the queue is full.
+
+        Returns:
+            float: Seconds spent blocked
+
+        Raises:
+            asyncio.CancelledError: If the pipeline was closed while blocked
+        """
+        started = time.monotonic()
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), self._loop)
+        while True:
+            try:
+                future.result(timeout=1)
+                break
+            except concurrent.futures.TimeoutError:
+                if self._closed:
+                    future.cancel()
+                    raise asyncio.CancelledError()
+        blocked = time.monotonic() - started
+        self.stages[stage].record(blocked=blocked)
+        return blocked
+
+    @staticmethod
+    def _remaining(doc: DocumentProgress) -> float:
+        """Seconds left until the deadline of a document."""
+        return max(0.0, doc.deadline - time.monotonic())
+
+    async def _run_to_completion(self, func: Callable, *args: Any, abandon: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Run a blocking function in a thread, and when cancelled wait for the thread before re-raising.
+
+        A cancelled `to_thread` leaves its thread running, so without waiting a worker would free its
+        slot, and the caller delete the files the thread still reads, while the work carries on.
+
+        Args:
+            func: The blocking function
+            args: Its arguments
+            abandon: Called with the result when the thread finishes after a cancellation, e.g. to remove a download
+
+        Returns:
+            Any: The result of the function
+        """
+        work = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        try:
+            return await asyncio.shield(work)
+        except asyncio.CancelledError:
+            await asyncio.wait({work})
+            if abandon is not None and not work.cancelled() and work.exception() is None:
+                abandon(work.result())
+            raise
+
+    async def _download_worker(self) -> None:
+        """
+        Look documents up in the ingestion cache and download the PDFs that are not cached.
+
+        The LangChain strategy always parses the download, Chunkr is handed the downloaded file when
+        the cache needed its content hash and fetches the URL itself otherwise.
+        """
+        while True:
+            self.stages["download"].sample()
+            doc = await self.urls.get()
+            started = time.monotonic()
+            doc.deadline = started + self.timeout
+            doc.status = "downloading"
+            await self._notify(doc)
+
+            try:
+                if INGESTION_CACHE_ENABLED:
+                    doc.cached = await ingestion_cache.aget_by_url(doc.url, self.strategy)
+                if doc.cached is None:
+                    if self.strategy != "chunkr" or INGESTION_CACHE_ENABLED:
+                        doc.pdf_path, doc.content_hash = await asyncio.wait_for(
+                            self._run_to_completion(
+                                partial(download_pdf, deadline=doc.deadline), doc.url, abandon=lambda downloaded: os.remove(downloaded[0])
+                            ),
+                            self._remaining(doc),
+                        )
+                    if INGESTION_CACHE_ENABLED and doc.content_hash:
+                        doc.cached = await ingestion_cache.aget_by_content(doc.content_hash, self.strategy, doc.url)
+                if doc.cached is not None:
+                    logging.info(f"Serving {doc.url} from the ingestion cache")
+            except (asyncio.TimeoutError, TimeoutError):
+                logging.error(f"Timed out downloading URL {doc.url} after {self.timeout}s")
+                doc.error = "Timed out downloading the document"
+                self.stages["download"].record(0, time.monotonic() - started)
+                await self._put("parse", self.windows, (doc, None))
+                continue
+            except Exception as e:
+                logging.error(f"Error downloading URL {doc.url}: {str(e)}")
+                doc.error = "Failed to download the document"
+                self.stages["download"].record(0, time.monotonic() - started)
+                await self._put("parse", self.windows, (doc, None))
+                continue
+
+            self.stages["download"].record(1, time.monotonic() - started)
+            await self._put("download", self.documents, doc)
+
+    async def _parse_worker(self) -> None:
+        """Parse documents into chunks, passing them to the clean stage as they are cut."""
+        while True:
+            self.stages["parse"].sample()
+            doc = await self.documents.get()
+            started = time.monotonic()
+            blocked = 0.0
+            doc.status = "parsing"
+            await self._notify(doc)
+
+            try:
+                if doc.cached is not None:
+                    blocked = await self._replay_cached(doc)
+                elif self.strategy == "chunkr":
+                    blocked = await self._parse_chunkr(doc)
+                else:
+                    blocked = await asyncio.wait_for(self._run_to_completion(self._parse_pdf, doc), self._remaining(doc))
+                if self.strategy != "chunkr" or doc.cached is not None:
+                    logging.info(f"Successfully parsed {doc.url}")
+            except (asyncio.TimeoutError, TimeoutError):
+                logging.error(f"Timed out processing URL {doc.url} after {self.timeout}s")
+                doc.error = "Timed out processing the document"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error processing URL {doc.url}: {str(e)}", exc_info=True)
+                doc.error = "Failed to process the document"
+            finally:
+                if doc.pdf_path is not None:
+                    os.remove(doc.pdf_path)
+                    doc.pdf_path = None
+                self.stages["parse"].record(seconds=time.monotonic() - started - blocked)
+                self._metadata_found(doc)
+
+            await self._put("parse", self.windows, (doc, None))
+
+    def _metadata_found(self, doc: DocumentProgress) -> None:
+        """Start resolving the metadata of a document once its local metadata is known, on the event loop."""
+        if doc.metadata_ready.is_set():
+            return
+        if self.resolve_metadata is not None and not doc.metadata_resolved:
+            doc.metadata_task = asyncio.ensure_future(self._resolve(doc))
+        doc.metadata_ready.set()
+
+    async def _resolve(self, doc: DocumentProgress) -> None:
+        try:
+            doc.metadata = await self.resolve_metadata(doc)
+            doc.metadata_resolved = True
+        except Exception as e:
+            logging.error(f"Error extracting metadata of {doc.url}: {str(e)}")
+
+    async def _citation_fields(self, doc: DocumentProgress) -> Dict[str, str]:
+        """Wait for the metadata of a document and get the fields every one of its records carries."""
+        await doc.metadata_ready.wait()
+        if doc.metadata_task is not None:
+            await asyncio.shield(doc.metadata_task)
+        citations = (doc.metadata or {}).get("citations") or {}
+        return {"file_url": doc.url, "citation": citations.get("in_text") or ""}
+
+    async def _replay_cached(self, doc: DocumentProgress) -> float:
+        """Feed the records of a cached document to the clean stage, they are already cleaned."""
+        doc.title = doc.cached.get("title", "")
+        doc.info = doc.cached.get("info", "")
+        doc.metadata = doc.cached.get("metadata")
+        doc.metadata_confidence = doc.cached.get("metadata_confidence", 0.0)
+        doc.metadata_resolved = doc.cached.get("metadata_resolved", False)
+        if doc.metadata is None:
+            doc.metadata, doc.metadata_confidence = extract_local_metadata(doc.info, doc.title)
+        self._metadata_found(doc)
+
+        started = time.monotonic()
+        for record in doc.cached.get("vector_data") or []:
+            self.stages["parse"].record(items=1)
+            await self.windows.put((doc, record))
+        blocked = time.monotonic() - started
+        self.stages["parse"].record(blocked=blocked)
+        return blocked
+
+    async def _parse_chunkr(self, doc: DocumentProgress) -> float:
+        """Upload a document to Chunkr, the downloaded file if there is one, and feed its chunks to the clean stage."""
+        task = await asyncio.wait_for(self._chunkr.upload(doc.pdf_path or doc.url, self._chunkr_config), self._remaining(doc))
+        chunks = task.output.chunks if task.output and task.output.chunks else []
+        logging.info(f"Successfully extracted {len(chunks)} chunks from {doc.url}")
+
+        title, info, byline = summarize_chunkr_chunks(chunks)
+        doc.title, doc.info = title, info
+        doc.metadata, doc.metadata_confidence = extract_local_metadata(info, title, byline)
+        self._metadata_found(doc)
+
+        started = time.monotonic()
+        for chunk in chunks:
+            self.stages["parse"].record(items=1)
+            await self.windows.put((doc, {"_id": content_chunk_id(chunk.embed, self._document_key(doc)), "text": chunk.embed}))
+        blocked = time.monotonic() - started
+        self.stages["parse"].record(blocked=blocked)
+        return blocked
+
+    def _parse_pdf(self, doc: DocumentProgress) -> float:
+        """
+        Parse a downloaded PDF into raw token windows in a worker thread, feeding them to the clean stage.
+
+        Pages are parsed in the PDF process pool and captioned in the background,
+        the window iterator is closed as soon as the document times out or the pipeline is closed.
+
+        Returns:
+            float: Seconds spent blocked on the full clean queue
+        """
+        blocked = 0.0
+        head: Optional[List[str]] = []
+        captioner = ImageCaptioner(make_images_parser)
+        windows = iter_windows(iter_pdf_pages(doc.pdf_path, captioner=captioner, deadline=doc.deadline), self.chunk_size, self.chunk_overlap)
+        try:
+            for window, _, _ in windows:
+                if self._closed:
+                    raise asyncio.CancelledError()
+                if time.monotonic() > doc.deadline:
+                    raise TimeoutError()
+                self.stages["parse"].record(items=1)
+                if head is None:
+                    blocked += self._put_threadsafe("parse", self.windows, (doc, window))
+                    continue
+                head.append(window)
+                if len(head) == 5:
+                    blocked += self._release_head(doc, head)
+                    head = None
+            if head is not None:
+                blocked += self._release_head(doc, head)
+        finally:
+            windows.close()
+            captioner.close()
+
+        return blocked
+
+    def _release_head(self, doc: DocumentProgress, head: List[str]) -> float:
+        """
+        Extract the local metadata of a PDF from its first windows, start resolving it, then pass the windows on.
+
+        The metadata is resolved while the rest of the document is parsed, the upserts wait for it.
+
+        Returns:
+            float: Seconds spent blocked on the full clean queue
+        """
+        doc.info = "".join(head)
+        doc.metadata, doc.metadata_confidence = extract_local_metadata(doc.info, pdf_path=doc.pdf_path)
+        self._loop.call_soon_threadsafe(self._metadata_found, doc)
+        return sum(self._put_threadsafe("parse", self.windows, (doc, window)) for window in head)
+
+    @staticmethod
+    def _document_key(doc: DocumentProgress) -> str:
+        """Key the chunk ids of a document are scoped by, its content hash so every URL of a paper shares them, else its URL."""
+        return doc.content_hash or normalize_url(doc.url)
+
+    def _clean_batch(self, payloads: List[Payload], document: str) -> List[Dict[str, Any]]:
+        records = []
+        for payload in payloads:
+            if isinstance(payload, dict):
+                records.append(payload)
+                continue
+            text = clean_window(payload)
+            if text.strip():
+                records.append({"_id": content_chunk_id(text, document), "text": text})
+        return records
+
+    async def _clean_worker(self) -> None:
+        """Clean raw chunks in batches per document and queue the batches for upserting."""
+        buffers: Dict[str, List[Payload]] = {}
+
+        async def flush(doc: DocumentProgress) -> None:
+            payloads = buffers.pop(doc.url, [])
+            if not payloads:
+                return
+            started = time.monotonic()
+            records = await asyncio.to_thread(self._clean_batch, payloads, self._document_key(doc))
+            self.stages["clean"].record(len(records), time.monotonic() - started)
+            if not records:
+                return
+            doc.chunks += len(records)
+            if INGESTION_CACHE_ENABLED and doc.cached is None:
+                if doc.records is None:
+                    doc.records = []
+                doc.records.extend(records)
+            doc.pending_batches += 1
+            await self._put("clean", self.batches, (doc, records))
+
+        while True:
+            self.stages["clean"].sample()
+            doc, payload = await self.windows.get()
+            if payload is not None:
+                buffer = buffers.setdefault(doc.url, [])
+                buffer.append(payload)
+                if len(buffer) >= self.batch_size:
+                    await flush(doc)
+                continue
+
+            await flush(doc)
+            doc.parsed = True
+            if doc.pending_batches == 0:
+                await self._finish(doc)
+            else:
+                doc.status = "upserting"
+                await self._notify(doc)
+
+    async def _upsert_worker(self) -> None:
+        """Upsert batches of records with the sink."""
+        while True:
+            self.stages["upsert"].sample()
+            doc, records = await self.batches.get()
+            started = time.monotonic()
+            try:
+                fields = await self._citation_fields(doc)
+                report = await asyncio.to_thread(self.sink, [{**record, **fields} for record in records])
+                if not report:
+                    doc.failed_batches += 1
+                doc.skipped += getattr(report, "skipped", 0)
+                doc.upserted += getattr(report, "records", len(records))
+            except Exception as e:
+                logging.error(f"Error upserting chunks of {doc.url}: {str(e)}")
+                doc.failed_batches += 1
+            self.stages["upsert"].record(len(records), time.monotonic() - started)
+
+            doc.pending_batches -= 1
+            if doc.parsed and doc.pending_batches == 0:
+                await self._finish(doc)
+            else:
+                await self._notify(doc)
+
+    async def _finish(self, doc: DocumentProgress) -> None:
+        """Settle the status of a document whose chunks are all upserted, caching it when it fully succeeded."""
+        if doc.error is None and doc.failed_batches:
+            doc.error = "Some chunks could not be upserted"
+        doc.status = "failed" if doc.error else "completed"
+
+        if doc.status == "completed" and doc.records is not None:
+            processed = {
+                "info": doc.info,
+                "vector_data": doc.records,
+                "metadata": doc.metadata,
+                "metadata_confidence": doc.metadata_confidence,
+                "metadata_resolved": doc.metadata_resolved,
+            }
+            if self.strategy == "chunkr":
+                processed["title"] = doc.title
+            await ingestion_cache.aput(doc.url, self.strategy, processed, doc.content_hash)
+        doc.records = None
+
+        logging.info(f"Completed processing URL: {doc.url} ({doc.status}, {doc.upserted} chunks upserted)")
+        await self._notify(doc)
+        await self.results.put(doc)
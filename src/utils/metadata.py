@@ -0,0 +1,226 @@
+import os
+import re
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from models import DocumentMetadata
+from utils.pdf_parsing import open_mapped_pdf
+
+# documents whose local metadata scores below this are sent to Gemini
+METADATA_CONFIDENCE_THRESHOLD = float(os.getenv("METADATA_CONFIDENCE_THRESHOLD", "0.7"))
+
+DOI_PATTERN = re.compile(r'\b10\.\d{4,9}/[^\s"<>]+[^\s"<>.,;)\]]', re.IGNORECASE)
+ARXIV_PATTERN = re.compile(r'\barXiv:\s?(\d{2})(\d{2})\.\d{4,5}(?:v\d+)?', re.IGNORECASE)
+YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20\d{2})\b')
+PDF_DATE_PATTERN = re.compile(r'^(?:D:)?(\d{4})')
+ABSTRACT_PATTERN = re.compile(r'\babstract\b[\s.:\-—]*(.+)', re.IGNORECASE | re.DOTALL)
+# superscript markers, footnote symbols and emails trailing author names
+AUTHOR_NOISE_PATTERN = re.compile(r'[\d*†‡§¶∗⋆]+|\S+@\S+')
+AUTHOR_SEPARATOR_PATTERN = re.compile(r'\s*(?:;|,|\band\b|&)\s*')
+NAME_PATTERN = re.compile(r"^[A-Z][\w'’\-]*\.?(?:\s+[A-Z][\w'’\-]*\.?){1,3}$")
+# title fields some PDF producers fill in instead of the real title
+JUNK_TITLE_PATTERN = re.compile(r'^(?:untitled|microsoft word|title|document\d*)\b|\.(?:pdf|docx?|tex|dvi)$', re.IGNORECASE)
+
+# lines of the largest text on the first page kept as its title
+MAX_TITLE_LINES = 4
+
+# how much each locally found field adds to the confidence, by where it was found
+FIELD_WEIGHTS = {
+    "title": {"chunkr": 0.4, "document_info": 0.4, "layout": 0.3},
+    "authors": {"document_info": 0.3, "layout": 0.25},
+    "year": {"arxiv": 0.3, "text": 0.25, "document_info": 0.15},
+}
+
+def parse_authors(value: str) -> List[str]:
+    """
+    Split an author field or byline into names, dropping affiliation markers and emails.
+
+    Args:
+        value: Authors separated by semicolons, commas, "and" or "&"
+
+    Returns:
+        List[str]: The names that look like person names, in order
+    """
+    value = AUTHOR_NOISE_PATTERN.sub(' ', value)
+    names = []
+    for part in AUTHOR_SEPARATOR_PATTERN.split(value):
+        name = ' '.join(part.split())
+        if NAME_PATTERN.match(name) and name not in names:
+            names.append(name)
+    return names
+
+def format_author(name: str) -> str:
+    """Format a full name the way the citations use it, "Ada Lovelace" becomes "Lovelace, A."."""
+    parts = name.replace(',', ' ').split()
+    if len(parts) < 2:
+        return name
+    initials = ' '.join(f"{part[0]}." for part in parts[:-1])
+    return f"{parts[-1]}, {initials}"
+
+def format_in_text_citation(authors: List[str], year: str) -> str:
+    """
+    Format an APA style in-text citation.
+
+    Args:
+        authors: Authors formatted as "Surname, I."
+        year: Year of publication, "n.d." is used when empty
+
+    Returns:
+        str: The citation, e.g. "(Smith & Jones, 2024)", or "" without authors
+    """
+    surnames = [author.split(',')[0].strip() for author in authors if author.strip()]
+    if not surnames:
+        return ""
+    if len(surnames) == 1:
+        names = surnames[0]
+    elif len(surnames) == 2:
+        names = f"{surnames[0]} & {surnames[1]}"
+    else:
+        names = f"{surnames[0]} et al."
+    return f"({names}, {year or 'n.d.'})"
+
+def find_year(text: str) -> Tuple[str, Optional[str]]:
+    """
+    Find the publication year of a document in its text.
+
+    Args:
+        text: Header, footer and first page text
+
+    Returns:
+        tuple: The year and where it was found, "arxiv" or "text", or ("", None)
+    """
+    arxiv = ARXIV_PATTERN.search(text)
+    if arxiv:
+        return f"20{arxiv.group(1)}", "arxiv"
+
+    this_year = datetime.date.today().year
+    years = [year for year in YEAR_PATTERN.findall(text) if int(year) <= this_year]
+    if years:
+        return max(set(years), key=years.count), "text"
+    return "", None
+
+def find_identifier(text: str) -> str:
+    """Find the DOI or arXiv id of a document in its text, "" if there is none."""
+    doi = DOI_PATTERN.search(text)
+    if doi:
+        return doi.group(0)
+    arxiv = ARXIV_PATTERN.search(text)
+    return arxiv.group(0).replace(' ', '') if arxiv else ""
+
+def read_pdf_metadata(path: str) -> Dict[str, Any]:
+    """
+    Read the document info of a PDF and guess its title and byline from the first page layout.
+
+    The title is the largest text in the top half of the first page, when it is larger than the
+    body text, the byline the lines right below it up to the abstract.
+
+    Args:
+        path: Path of the PDF
+
+    Returns:
+        Dict[str, Any]: The "document_info" dict and the first page "layout_title", "layout_authors" and "first_page" text
+    """
+    with open_mapped_pdf(path) as doc:
+        document_info = dict(doc.metadata or {})
+        if doc.page_count == 0:
+            return {"document_info": document_info, "layout_title": "", "layout_authors": [], "first_page": ""}
+        page = doc[0]
+        first_page = page.get_text()
+        blocks = page.get_text("dict")["blocks"]
+        half = page.rect.height / 2
+
+    lines = []
+    for block in blocks:
+        for line in block.get("lines", []):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if spans:
+                text = ' '.join(' '.join(span["text"] for span in spans).split())
+                lines.append((max(span["size"] for span in spans), line["bbox"][1], text))
+    lines.sort(key=lambda line: line[1])
+
+    candidates = [line for line in lines if line[1] < half and len(line[2]) > 3 and not YEAR_PATTERN.fullmatch(line[2])]
+    if not candidates:
+        return {"document_info": document_info, "layout_title": "", "layout_authors": [], "first_page": first_page}
+
+    title_size = max(line[0] for line in candidates)
+    body_size = sorted(line[0] for line in lines)[len(lines) // 2]
+    if title_size <= body_size:
+        return {"document_info": document_info, "layout_title": "", "layout_authors": [], "first_page": first_page}
+
+    title_lines = [i for i, line in enumerate(lines) if line in candidates and abs(line[0] - title_size) < 0.5]
+    first, last = title_lines[0], title_lines[0]
+    while last + 1 < len(lines) and last - first < MAX_TITLE_LINES - 1 and abs(lines[last + 1][0] - title_size) < 0.5:
+        last += 1
+    layout_title = ' '.join(line[2] for line in lines[first:last + 1])
+
+    layout_authors = []
+    for size, _, text in lines[last + 1:last + 6]:
+        if ABSTRACT_PATTERN.match(text) or size >= title_size:
+            break
+        layout_authors += [name for name in parse_authors(text) if name not in layout_authors]
+
+    return {"document_info": document_info, "layout_title": layout_title, "layout_authors": layout_authors, "first_page": first_page}
+
+def extract_local_metadata(info: str = "", title: str = "", byline: str = "", pdf_path: Optional[str] = None) -> Tuple[DocumentMetadata, float]:
+    """
+    Extract the metadata of a paper without an LLM call.
+
+    Fields come from the Chunkr title and byline, the PDF document info, the first page layout and patterns
+    in the header, footer and first page text, each adding to the confidence by how reliable its
+    source is. Callers fall back to Gemini below `METADATA_CONFIDENCE_THRESHOLD`.
+
+    Args:
+        info: Header, footer and first chunk text collected while chunking
+        title: Title segment found by Chunkr
+        byline: Segment following the Chunkr title, usually the authors
+        pdf_path: Path of the PDF, when it is still on disk
+
+    Returns:
+        tuple: The DocumentMetadata and its confidence between 0 and 1
+    """
+    pdf = read_pdf_metadata(pdf_path) if pdf_path else {}
+    document_info = pdf.get("document_info", {})
+    text = f"{info}\n{pdf.get('first_page', '')}"
+    confidence = 0.0
+
+    info_title = ' '.join((document_info.get("title") or "").split())
+    found_title, title_source = "", None
+    for candidate, source in ((title, "chunkr"), (info_title, "document_info"), (pdf.get("layout_title", ""), "layout")):
+        candidate = ' '.join((candidate or "").split())
+        if len(candidate) > 3 and not JUNK_TITLE_PATTERN.search(candidate):
+            found_title, title_source = candidate, source
+            break
+    if title_source:
+        confidence += FIELD_WEIGHTS["title"][title_source]
+
+    authors, authors_source = parse_authors(document_info.get("author") or ""), "document_info"
+    if not authors:
+        authors, authors_source = pdf.get("layout_authors") or parse_authors(byline), "layout"
+    if authors:
+        confidence += FIELD_WEIGHTS["authors"][authors_source]
+    authors = [format_author(author) for author in authors]
+
+    year, year_source = find_year(text)
+    if not year:
+        date = PDF_DATE_PATTERN.match(document_info.get("creationDate") or "")
+        if date:
+            year, year_source = date.group(1), "document_info"
+    if year_source:
+        confidence += FIELD_WEIGHTS["year"][year_source]
+
+    abstract = ABSTRACT_PATTERN.search(pdf.get("first_page", "") or info)
+    description = ' '.join(abstract.group(1).split())[:500] if abstract else ""
+
+    metadata = DocumentMetadata(
+        title=found_title,
+        description=description,
+        year=year,
+        authors=authors,
+        citations={
+            "in_text": format_in_text_citation(authors, year)
+        }
+    )
+    identifier = find_identifier(text)
+    if identifier:
+        metadata["identifier"] = identifier
+
+    return metadata, round(min(confidence, 1.0), 2)
@@ -0,0 +1,206 @@
+import io
+import os
+import mmap
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+import httpx
+import pymupdf
+from langchain_core.documents import Document
+from langchain_core.documents.base import Blob
+from langchain_community.document_loaders.parsers.pdf import PyMuPDFParser
+from langchain_community.document_loaders.parsers.images import BaseImageBlobParser
+from utils.image_captions import ImageCaptioner, IMAGE_PLACEHOLDER, image_hash, is_captionable
+
+# worker processes parsing page ranges, pages per task, and seconds allowed for a download
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+PDF_DOWNLOAD_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_TIMEOUT", "120"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Get the process pool page ranges are parsed in, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max(1, PDF_PARSE_WORKERS))
+        return _executor
+
+def download_pdf(url: str, timeout: float = PDF_DOWNLOAD_TIMEOUT, deadline: Optional[float] = None) -> Tuple[str, str]:
+    """
+    Stream a PDF to a temporary file, hashing it on the way.
+
+    Args:
+        url: URL of the PDF
+        timeout: Seconds allowed for the download
+        deadline: `time.monotonic()` by which the download has to finish, checked between blocks so a trickling stream is given up too
+
+    Returns:
+        Tuple[str, str]: Path of the temporary file, which the caller deletes, and the SHA-256 of its content
+
+    Raises:
+        httpx.HTTPError: If the download fails
+        TimeoutError: If the deadline passes first
+    """
+    if deadline is not None:
+        timeout = max(0.001, min(timeout, deadline - time.monotonic()))
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        try:
+            with httpx.stream("GET", url, follow_redirects=True, timeout=timeout) as response:
+                response.raise_for_status()
+                # without a fixed block size blocks are yielded as they arrive, so the deadline is checked on time
+                for block in response.iter_bytes(None if deadline is not None else 1 << 16):
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise TimeoutError(f"Download of {url} did not finish in time")
+                    digest.update(block)
+                    f.write(block)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    return f.name, digest.hexdigest()
+
+@contextmanager
+def open_mapped_pdf(path: str) -> Iterator[pymupdf.Document]:
+    """
+    Open a PDF through a read-only memory map, so its pages are paged in by the OS instead of read into memory.
+
+    Args:
+        path: Path of the PDF
+
+    Yields:
+        pymupdf.Document: The open document, only valid inside the block
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        doc = pymupdf.open(stream=view, filetype="pdf")
+        try:
+            yield doc
+        finally:
+            doc.close()
+            del doc
+            view.release()
+
+class ImageCollector(BaseImageBlobParser):
+    """
+    Stands in for the captioning parser while parsing, collecting the images instead of captioning them.
+
+    Each image large enough to caption is PNG encoded, kept once per hash and replaced in the page
+    text by a placeholder `ImageCaptioner.resolve` fills in later, smaller ones are dropped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.images: Dict[str, bytes] = {}
+
+    def _analyze_image(self, img) -> str:
+        if not is_captionable(img.width, img.height):
+            return ""
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        png = buffer.getvalue()
+        key = image_hash(png)
+        self.images.setdefault(key, png)
+        return IMAGE_PLACEHOLDER.format(key)
+
+def parse_page_range(path: str, start: int, end: int, extract_images: bool = False) -> Tuple[List[str], Dict[str, bytes]]:
+    """
+    Extract the text, markdown tables and optionally the images of pages [start, end) of a PDF.
+
+    Runs in the worker processes, the pages are copied into a small document parsed with the same
+    PyMuPDFParser settings the loader used, so the page texts are unchanged apart from images,
+    which get a placeholder instead of a caption.
+
+    Args:
+        path: Path of the PDF
+        start: First page, zero based
+        end: Page after the last one
+        extract_images: Collect images large enough to caption, images are skipped when False
+
+    Returns:
+        tuple: The page contents in page order, and the PNG bytes of their images by hash
+    """
+    with open_mapped_pdf(path) as doc:
+        pages = pymupdf.open()
+        pages.insert_pdf(doc, from_page=start, to_page=end - 1)
+        data = pages.tobytes()
+        pages.close()
+
+    collector = ImageCollector() if extract_images else None
+    parser = PyMuPDFParser(
+        mode="page",
+        extract_tables="markdown",
+        images_inner_format="markdown-img",
+        images_parser=collector,
+    )
+    contents = [page.page_content for page in parser.lazy_parse(Blob.from_data(data, mime_type="application/pdf"))]
+    return contents, collector.images if collector else {}
+
+def iter_pdf_pages(
+    path: str,
+    captioner: Optional[ImageCaptioner] = None,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    deadline: Optional[float] = None,
+) -> Iterator[Document]:
+    """
+    Parse a PDF with its page ranges spread across the process pool, yielding the pages in order.
+
+    Documents no longer than one range are parsed in the calling process unless there is a
+    deadline, and so is every range when the caller already runs in a worker process, pools are
+    never nested. The images of a range are handed to the captioner as soon as the range is
+    parsed, so captioning overlaps the parsing of the next ranges.
+
+    Args:
+        path: Path of the PDF
+        captioner: Captions the images, images are skipped when None
+        pages_per_task: Pages parsed per worker task
+        deadline: `time.monotonic()` by which every range has to be parsed, a range parsed in the pool that
+            is still running then is left behind
+
+    Yields:
+        Document: One document per page, with its zero based "page" in the metadata
+
+    Raises:
+        TimeoutError: If a range parsed in the pool is not done by the deadline
+    """
+    with open_mapped_pdf(path) as doc:
+        page_count = doc.page_count
+
+    def remaining() -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    futures = []
+    if multiprocessing.parent_process() is not None or (len(ranges) <= 1 and deadline is None):
+        results = (parse_page_range(path, start, end, captioner is not None) for start, end in ranges)
+    else:
+        executor = get_pdf_executor()
+        futures = [executor.submit(parse_page_range, path, start, end, captioner is not None) for start, end in ranges]
+        results = (future.result(timeout=remaining()) for future in futures)
+        logging.info(f"Parsing {page_count} pages of {path} in {len(ranges)} ranges")
+
+    page_number = 0
+    try:
+        for contents, images in results:
+            if captioner is not None:
+                captioner.submit(images)
+            for content in contents:
+                if captioner is not None:
+                    content = captioner.resolve(content)
+                yield Document(page_content=content, metadata={"page": page_number})
+                page_number += 1
+    finally:
+        for future in futures:
+            future.cancel()
+        # ranges already being parsed still read the file, the caller may delete it once this returns,
+        # past the deadline a hanging range is left behind with the file it already opened
+        wait(futures, timeout=remaining())
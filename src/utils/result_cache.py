@@ -0,0 +1,234 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+from utils.semantic_cache import normalize_cache_text, register_cache
+
+MISSING = object()
+
+def result_cache_key(kind: str, query: str, candidate_ids: Optional[Sequence[str]] = None) -> str:
+    """
+    Build the cache key for a query or rerank result, the namespace is scoped by the cache itself.
+
+    Args:
+        kind: "query" or "rerank"
+        query: The query text, normalized before hashing
+        candidate_ids: Ids of the reranked candidates, order does not matter
+
+    Returns:
+        str: A compact key
+    """
+    payload = json.dumps([normalize_cache_text(query), sorted(candidate_ids) if candidate_ids is not None else None])
+    return f"{kind}:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+class ResultCache:
+    """
+    A bounded LRU + TTL cache of JSON serializable results, scoped by namespace.
+
+    The in-process tier is always used. When a Redis URL is given, results are also written
+    to Redis so other workers share them. Invalidating a namespace bumps a generation counter
+    that is part of every key, in Redis too, which orphans the old entries until their TTL ends.
+
+    Attributes:
+        max_entries (int): Maximum number of in-process entries
+        ttl (float): Seconds an entry stays valid
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300, redis_url: Optional[str] = None, prefix: str = "paperal:results"):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of in-process entries
+            ttl: Seconds an entry stays valid
+            redis_url: Optional Redis URL for the shared tier
+            prefix: Prefix of every Redis key
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prefix = prefix
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+        self._redis = None
+        self._aredis = None
+
+        if redis_url:
+            try:
+                import redis
+                import redis.asyncio
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+                self._aredis = redis.asyncio.Redis.from_url(redis_url, socket_timeout=0.5)
+            except Exception as e:
+                logging.error(f"Error creating Redis client for result cache: {str(e)}")
+
+        register_cache(self)
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.prefix}:generation:{namespace}"
+
+    def _redis_key(self, namespace: str, generation: int, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{generation}:{key}"
+
+    def _local_get(self, namespace: str, generation: int, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get((namespace, generation, key))
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[(namespace, generation, key)]
+                return MISSING
+            self._entries.move_to_end((namespace, generation, key))
+            return value
+
+    def _local_set(self, namespace: str, generation: int, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[(namespace, generation, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((namespace, generation, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _generation(self, namespace: str) -> int:
+        if self._redis is not None:
+            try:
+                return int(self._redis.get(self._generation_key(namespace)) or 0)
+            except Exception as e:
+                logging.warning(f"Result cache Redis tier unavailable: {str(e)}")
+        return self._generations.get(namespace, 0)
+
+    async def ageneration(self, namespace: str) -> int:
+        """
+        Get the generation of a namespace, bumped by every invalidation in any worker sharing the Redis tier.
+
+        Args:
+            namespace: The namespace
+
+        Returns:
+            int: The generation, 0 until the namespace is first invalidated
+        """
+        if self._aredis is not None:
+            try:
+                return int(await self._aredis.get(self._generation_key(namespace)) or 0)
+            except Exception as e:
+                logging.warning(f"Result cache Redis tier unavailable: {str(e)}")
+        return self._generations.get(namespace, 0)
+
+    def get(self, namespace: str, key: str) -> Any:
+        """
+        Get a cached result.
+
+        Args:
+            namespace: Namespace the result was computed from
+            key: Key built with `result_cache_key`
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        generation = self._generation(namespace)
+        value = self._local_get(namespace, generation, key)
+        if value is not MISSING:
+            self._count("hits")
+            return value
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(self._redis_key(namespace, generation, key))
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._local_set(namespace, generation, key, value)
+                    self._count("redis_hits")
+                    return value
+            except Exception as e:
+                logging.warning(f"Result cache Redis tier unavailable: {str(e)}")
+
+        self._count("misses")
+        return None
+
+    async def aget(self, namespace: str, key: str) -> Any:
+        """Async version of `get`."""
+        generation = await self.ageneration(namespace)
+        value = self._local_get(namespace, generation, key)
+        if value is not MISSING:
+            self._count("hits")
+            return value
+
+        if self._aredis is not None:
+            try:
+                raw = await self._aredis.get(self._redis_key(namespace, generation, key))
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._local_set(namespace, generation, key, value)
+                    self._count("redis_hits")
+                    return value
+            except Exception as e:
+                logging.warning(f"Result cache Redis tier unavailable: {str(e)}")
+
+        self._count("misses")
+        return None
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """
+        Cache a result.
+
+        Args:
+            namespace: Namespace the result was computed from
+            key: Key built with `result_cache_key`
+            value: JSON serializable result
+        """
+        generation = self._generation(namespace)
+        self._local_set(namespace, generation, key, value)
+
+        if self._redis is not None:
+            try:
+                self._redis.set(self._redis_key(namespace, generation, key), json.dumps(value), ex=int(self.ttl))
+            except Exception as e:
+                logging.warning(f"Result cache Redis tier unavailable: {str(e)}")
+
+    async def aset(self, namespace: str, key: str, value: Any) -> None:
+        """Async version of `set`."""
+        generation = await self.ageneration(namespace)
+        self._local_set(namespace, generation, key, value)
+
+        if self._aredis is not None:
+            try:
+                await self._aredis.set(self._redis_key(namespace, generation, key), json.dumps(value), ex=int(self.ttl))
+            except Exception as e:
+                logging.warning(f"Result cache Redis tier unavailable: {str(e)}")
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        """
+        Invalidate every result computed from a namespace, in this process and in Redis.
+
+        Args:
+            namespace: The namespace whose contents changed
+        """
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == namespace]:
+                del self._entries[entry_key]
+            self._counters["invalidations"] += 1
+
+        if self._redis is not None:
+            try:
+                self._redis.incr(self._generation_key(namespace))
+            except Exception as e:
+                logging.warning(f"Result cache Redis tier unavailable: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: Hit, Redis hit, miss and invalidation counts and current size
+        """
+        with self._lock:
+            return {**self._counters, "size": len(self._entries)}
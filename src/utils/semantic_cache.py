@@ -0,0 +1,275 @@
+import time
+import asyncio
+import weakref
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+BatchEmbedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+Generation = Callable[[str], Awaitable[int]]
+
+# every object with an `invalidate_namespace(namespace)` method that caches namespace derived data
+_caches: weakref.WeakSet = weakref.WeakSet()
+
+def normalize_cache_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different inputs share an exact key."""
+    return " ".join(text.lower().split())
+
+def register_cache(cache: Any) -> None:
+    """
+    Register a cache so `invalidate_namespace` reaches it, only a weak reference is kept.
+
+    Args:
+        cache: Object with an `invalidate_namespace(namespace)` method
+    """
+    _caches.add(cache)
+
+def invalidate_namespace(namespace: str) -> None:
+    """
+    Drop every cached entry tied to a namespace in all live registered caches of this process.
+
+    Args:
+        namespace: The vector store namespace whose contents changed
+    """
+    for cache in list(_caches):
+        cache.invalidate_namespace(namespace)
+
+@dataclass
+class CacheEntry:
+    namespace: str
+    text: str
+    vector: Optional[np.ndarray]
+    value: Any
+    expires_at: float
+    generation: int = 0
+
+class SemanticCache:
+    """
+    An in-process LRU + TTL cache that matches queries by embedding similarity.
+
+    An exact match on the normalized query text is served without embedding anything. Otherwise
+    the query is embedded and compared with cosine similarity against the cached entries of the
+    same namespace, and the closest one is returned if it clears the threshold.
+
+    Entries are dropped by `invalidate_namespace`, which upserts call from worker threads, so every
+    access to the entries holds a lock. That only reaches the caches of the upserting process, an
+    optional `generation` function, like `ResultCache.ageneration` with a Redis tier, lets entries
+    stored before an invalidation in another worker be ignored too.
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a semantic hit
+        max_entries (int): Maximum number of entries before the least recently used is evicted
+        ttl (float): Seconds an entry stays valid
+    """
+
+    def __init__(self, embed: Embedder, threshold: float = 0.95, max_entries: int = 512, ttl: float = 600, embed_many: Optional[BatchEmbedder] = None, generation: Optional[Generation] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            embed: Coroutine function returning the embedding of a text
+            embed_many: Coroutine function returning the embeddings of several texts in one call, used by `lookup_many`
+            threshold: Minimum cosine similarity for a semantic hit
+            max_entries: Maximum number of cached entries
+            ttl: Seconds an entry stays valid
+            generation: Coroutine function returning the current generation of a namespace, entries of older generations are ignored
+        """
+        self.embed = embed
+        self.embed_many = embed_many
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = generation
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        register_cache(self)
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await self.embed(text), dtype=np.float32)
+        except Exception as e:
+            logging.error(f"Error embedding text for semantic cache: {str(e)}")
+            return None
+        return self._normalize(vector)
+
+    async def _embed_all(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        if self.embed_many is None:
+            return list(await asyncio.gather(*(self._embed(text) for text in texts)))
+        try:
+            embeddings = await self.embed_many(texts)
+        except Exception as e:
+            logging.error(f"Error embedding texts for semantic cache: {str(e)}")
+            return [None] * len(texts)
+        return [self._normalize(np.asarray(embedding, dtype=np.float32)) for embedding in embeddings]
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> Optional[np.ndarray]:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    async def _generation(self, namespace: str) -> int:
+        if self.generation is None:
+            return 0
+        try:
+            return await self.generation(namespace)
+        except Exception as e:
+            logging.error(f"Error getting the semantic cache generation of {namespace}: {str(e)}")
+            return 0
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+                del self._entries[key]
+                self._counters["evictions"] += 1
+
+    def _exact(self, namespace: str, text: str, generation: int) -> Optional[CacheEntry]:
+        key = (namespace, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generation != generation:
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry
+
+    def _closest(self, namespace: str, vector: Optional[np.ndarray], generation: int) -> Optional[Any]:
+        """Get the value of the most similar entry of a namespace if it clears the threshold, counting the hit or miss."""
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry.namespace == namespace and entry.generation == generation and entry.vector is not None
+            ]
+            if vector is not None and candidates:
+                matrix = np.stack([entry.vector for _, entry in candidates])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    best_key, best_entry = candidates[best]
+                    self._entries.move_to_end(best_key)
+                    self._counters["hits"] += 1
+                    self._counters["semantic_hits"] += 1
+                    return best_entry.value
+
+            self._counters["misses"] += 1
+            return None
+
+    async def lookup(self, query: str, namespace: str) -> Tuple[Optional[Any], Optional[np.ndarray]]:
+        """
+        Look a query up in the cache.
+
+        Args:
+            query: The query text
+            namespace: Namespace the cached value was derived from
+
+        Returns:
+            tuple: The cached value (or None on a miss) and the query embedding, which can be passed
+                back to `store` to avoid embedding the same text twice
+        """
+        self._expire()
+        text = normalize_cache_text(query)
+        generation = await self._generation(namespace)
+        entry = self._exact(namespace, text, generation)
+        if entry is not None:
+            return entry.value, entry.vector
+
+        vector = await self._embed(text)
+        return self._closest(namespace, vector, generation), vector
+
+    async def lookup_many(self, queries: List[str], namespace: str) -> List[Tuple[Optional[Any], Optional[np.ndarray]]]:
+        """
+        Look several queries up in the cache, embedding all the ones without an exact match in one call.
+
+        Args:
+            queries: The query texts
+            namespace: Namespace the cached values were derived from
+
+        Returns:
+            list: One (cached value or None, query embedding) pair per query, as `lookup` returns
+        """
+        self._expire()
+        texts = [normalize_cache_text(query) for query in queries]
+        generation = await self._generation(namespace)
+        results: List[Tuple[Optional[Any], Optional[np.ndarray]]] = [(None, None)] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            entry = self._exact(namespace, text, generation)
+            if entry is not None:
+                results[i] = (entry.value, entry.vector)
+            else:
+                missing.append(i)
+
+        if missing:
+            vectors = await self._embed_all([texts[i] for i in missing])
+            for i, vector in zip(missing, vectors):
+                results[i] = (self._closest(namespace, vector, generation), vector)
+        return results
+
+    async def store(self, query: str, namespace: str, value: Any, vector: Optional[np.ndarray] = None) -> None:
+        """
+        Store a value for a query.
+
+        Args:
+            query: The query text
+            namespace: Namespace the value was derived from
+            value: The value to cache
+            vector: Embedding returned by `lookup`, computed here if not given
+        """
+        text = normalize_cache_text(query)
+        generation = await self._generation(namespace)
+        if vector is None:
+            vector = await self._embed(text)
+
+        key = (namespace, text)
+        with self._lock:
+            self._entries[key] = CacheEntry(
+                namespace=namespace,
+                text=text,
+                vector=vector,
+                value=value,
+                expires_at=time.monotonic() + self.ttl,
+                generation=generation,
+            )
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        """
+        Drop every entry derived from a namespace, safe to call from any thread.
+
+        Args:
+            namespace: The namespace whose contents changed
+        """
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.namespace == namespace]:
+                del self._entries[key]
+                self._counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: Hit, miss, eviction and invalidation counts, hit rate and current size
+        """
+        with self._lock:
+            counters, size = dict(self._counters), len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "size": size,
+        }
@@ -1,11 +1,12 @@
+import os
 import re
 import json
 import regex  
-import requests
 import unicodedata
-from io import BytesIO
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from unidecode import unidecode
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, List
 from models import CitedResponse
 
 def has_date_in_content(content: str) -> bool:
@@ -104,10 +105,75 @@ def format_structured_response(text: str, citation_info: Optional[Dict[str, Any]
     else:
         return {"text": text, "is_referenced": False, "href": None}
     
+# Characters mapped before transliteration. The first entry is a historical multi-character key
+# (three quotes opened a triple-quoted string in the original literal), it is kept so the output stays
+# identical and applied with `str.replace` ahead of the single-character table.
+CHAR_MAPPINGS_PREFIX = (': "\'",  # U+2018 LEFT SINGLE QUOTATION MARK\n        ', "'")
+CHAR_MAPPINGS = {
+    # Quotes
+    '‚': ',',  # U+201A SINGLE LOW-9 QUOTATION MARK
+    '„': '"',  # U+201E DOUBLE LOW-9 QUOTATION MARK
+
+    # Dashes and Hyphens
+    '—': '-',  # U+2014 EM DASH
+    '–': '-',  # U+2013 EN DASH
+    '‐': '-',  # U+2010 HYPHEN
+    '‑': '-',  # U+2011 NON-BREAKING HYPHEN
+    '−': '-',  # U+2212 MINUS SIGN
+
+    # Spaces and Breaks
+    '\u00A0': ' ',  # NO-BREAK SPACE
+    '\u2000': ' ',  # EN QUAD
+    '\u2001': ' ',  # EM QUAD
+    '\u2002': ' ',  # EN SPACE
+    '\u2003': ' ',  # EM SPACE
+    '\u2004': ' ',  # THREE-PER-EM SPACE
+    '\u2005': ' ',  # FOUR-PER-EM SPACE
+    '\u2006': ' ',  # SIX-PER-EM SPACE
+    '\u2007': ' ',  # FIGURE SPACE
+    '\u2008': ' ',  # PUNCTUATION SPACE
+    '\u2009': ' ',  # THIN SPACE
+    '\u200A': ' ',  # HAIR SPACE
+    '\u200B': '',   # ZERO WIDTH SPACE
+    '\u200C': '',   # ZERO WIDTH NON-JOINER
+    '\u200D': '',   # ZERO WIDTH JOINER
+    '\u2028': ' ',  # LINE SEPARATOR
+    '\u2029': ' ',  # PARAGRAPH SEPARATOR
+
+    # Other Special Characters
+    '…': '...',  # U+2026 HORIZONTAL ELLIPSIS
+    '•': '*',    # U+2022 BULLET
+    '·': '*',    # U+00B7 MIDDLE DOT
+    '‹': '<',    # U+2039 SINGLE LEFT-POINTING ANGLE QUOTATION MARK
+    '›': '>',    # U+203A SINGLE RIGHT-POINTING ANGLE QUOTATION MARK
+    '«': '<<',   # U+00AB LEFT-POINTING DOUBLE ANGLE QUOTATION MARK
+    '»': '>>',   # U+00BB RIGHT-POINTING DOUBLE ANGLE QUOTATION MARK
+    '™': '(TM)', # U+2122 TRADE MARK SIGN
+    '®': '(R)',  # U+00AE REGISTERED SIGN
+    '©': '(C)',  # U+00A9 COPYRIGHT SIGN
+}
+CHAR_MAPPINGS_PATTERN = re.compile('[' + ''.join(re.escape(char) for char in CHAR_MAPPINGS) + ']')
+
+WHITESPACE_PATTERN = regex.compile(r'\s+')
+# separator controls str.split() treats as whitespace but regex's \s does not
+SEPARATOR_CONTROLS_PATTERN = re.compile('[\x1c-\x1f]')
+SYMBOLS_PATTERN = regex.compile(r'[\p{S}]')
+
+# batches of at least this many texts are cleaned in a process pool by `clean_many`
+CLEAN_PARALLEL_MIN_TEXTS = int(os.getenv("CLEAN_PARALLEL_MIN_TEXTS", "5000"))
+
+# ASCII control characters, and ASCII control characters plus symbols, the only ones left after transliteration
+ASCII_CONTROLS = {i: None for i in range(128) if unicodedata.category(chr(i))[0] == 'C' and chr(i) not in ('\n', '\t')}
+ASCII_CONTROLS_AND_SYMBOLS = {**ASCII_CONTROLS, **{i: None for i in range(128) if SYMBOLS_PATTERN.match(chr(i))}}
+
 def clean_split_text(text: str, preserve_unicode: bool = False) -> str:
     """
     Clean and split text by removing special characters and normalizing whitespace.
 
+    The character mappings are applied in one precompiled pass that ASCII text skips entirely, and
+    once the text is ASCII (always after transliteration) control characters and symbols are dropped
+    with a single translation table.
+
     Args:
         text: The text to clean and split
         
@@ -118,101 +184,50 @@ def clean_split_text(text: str, preserve_unicode: bool = False) -> str:
         return ""
         
     text = unicodedata.normalize('NFKC', text)
+    text = text.replace(*CHAR_MAPPINGS_PREFIX)
+
+    if not text.isascii():
+        text = CHAR_MAPPINGS_PATTERN.sub(lambda match: CHAR_MAPPINGS[match.group()], text)
+        if not preserve_unicode:
+            text = unidecode(text)
     
-    char_mappings = {
-        # Quotes
-        '"': '"',  # U+201C LEFT DOUBLE QUOTATION MARK
-        '"': '"',  # U+201D RIGHT DOUBLE QUOTATION MARK
-        ''': "'",  # U+2018 LEFT SINGLE QUOTATION MARK
-        ''': "'",  # U+2019 RIGHT SINGLE QUOTATION MARK
-        '‚': ',',  # U+201A SINGLE LOW-9 QUOTATION MARK
-        '„': '"',  # U+201E DOUBLE LOW-9 QUOTATION MARK
-        
-        # Dashes and Hyphens
-        '—': '-',  # U+2014 EM DASH
-        '–': '-',  # U+2013 EN DASH
-        '‐': '-',  # U+2010 HYPHEN
-        '‑': '-',  # U+2011 NON-BREAKING HYPHEN
-        '−': '-',  # U+2212 MINUS SIGN
-        
-        # Spaces and Breaks
-        '\u00A0': ' ',  # NO-BREAK SPACE
-        '\u2000': ' ',  # EN QUAD
-        '\u2001': ' ',  # EM QUAD
-        '\u2002': ' ',  # EN SPACE
-        '\u2003': ' ',  # EM SPACE
-        '\u2004': ' ',  # THREE-PER-EM SPACE
-        '\u2005': ' ',  # FOUR-PER-EM SPACE
-        '\u2006': ' ',  # SIX-PER-EM SPACE
-        '\u2007': ' ',  # FIGURE SPACE
-        '\u2008': ' ',  # PUNCTUATION SPACE
-        '\u2009': ' ',  # THIN SPACE
-        '\u200A': ' ',  # HAIR SPACE
-        '\u200B': '',   # ZERO WIDTH SPACE
-        '\u200C': '',   # ZERO WIDTH NON-JOINER
-        '\u200D': '',   # ZERO WIDTH JOINER
-        '\u2028': ' ',  # LINE SEPARATOR
-        '\u2029': ' ',  # PARAGRAPH SEPARATOR
-        
-        # Other Special Characters
-        '…': '...',  # U+2026 HORIZONTAL ELLIPSIS
-        '•': '*',    # U+2022 BULLET
-        '·': '*',    # U+00B7 MIDDLE DOT
-        '‹': '<',    # U+2039 SINGLE LEFT-POINTING ANGLE QUOTATION MARK
-        '›': '>',    # U+203A SINGLE RIGHT-POINTING ANGLE QUOTATION MARK
-        '«': '<<',   # U+00AB LEFT-POINTING DOUBLE ANGLE QUOTATION MARK
-        '»': '>>',   # U+00BB RIGHT-POINTING DOUBLE ANGLE QUOTATION MARK
-        '™': '(TM)', # U+2122 TRADE MARK SIGN
-        '®': '(R)',  # U+00AE REGISTERED SIGN
-        '©': '(C)',  # U+00A9 COPYRIGHT SIGN
-    }
-    
-    for old, new in char_mappings.items():
-        text = text.replace(old, new)
-    
-    if not preserve_unicode:
-        text = unidecode(text)
-    
-    text = regex.sub(r'\r\n|\r|\n', ' ', text)
-    text = regex.sub(r'\s+', ' ', text)
-    text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C' or char in ('\n', '\t'))
-    
-    if not preserve_unicode:
-        text = regex.sub(r'[\p{S}]', '', text)
+    # leading and trailing whitespace is stripped at the end anyway, so split/join matches the regex
+    if SEPARATOR_CONTROLS_PATTERN.search(text):
+        text = WHITESPACE_PATTERN.sub(' ', text)
+    else:
+        text = ' '.join(text.split())
+
+    if text.isascii():
+        text = text.translate(ASCII_CONTROLS if preserve_unicode else ASCII_CONTROLS_AND_SYMBOLS)
+    else:
+        text = ''.join(char for char in text if unicodedata.category(char)[0] != 'C' or char in ('\n', '\t'))
+        if not preserve_unicode:
+            text = SYMBOLS_PATTERN.sub('', text)
     
     return text.strip()
 
-# def get_pdf_page_count(pdf_url: str) -> int:
+
+def clean_many(texts: Iterable[str], preserve_unicode: bool = False, workers: Optional[int] = None, min_parallel: int = CLEAN_PARALLEL_MIN_TEXTS) -> List[str]:
     """
-    Get the number of pages in a PDF from a URL.
-    
+    Clean a batch of texts with `clean_split_text`, fanning out to a process pool for large batches.
+
     Args:
-        pdf_url: URL of the PDF file
-        
+        texts: The texts to clean
+        preserve_unicode: Passed to `clean_split_text`
+        workers: Number of processes, defaults to the CPU count, 1 cleans in this process
+        min_parallel: Batches smaller than this are cleaned in this process
+
     Returns:
-        int: Number of pages in the PDF
-        
-    Raises:
-        requests.RequestException: If there's an error downloading the PDF
-        PyPDF2.PdfReadError: If there's an error reading the PDF
-        ValueError: If the URL doesn't point to a valid PDF
+        List[str]: The cleaned texts, in input order
     """
-    try:
-        response = requests.get(pdf_url, stream=True)
-        response.raise_for_status()
-        
-        if 'application/pdf' not in response.headers.get('content-type', '').lower():
-            raise ValueError("URL does not point to a PDF file")
-            
-        pdf_file = BytesIO(response.content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        return len(pdf_reader.pages)
-        
-    except requests.RequestException as e:
-        raise requests.RequestException(f"Error downloading PDF: {str(e)}")
-    except PyPDF2.PdfReadError as e:
-        raise PyPDF2.PdfReadError(f"Error reading PDF: {str(e)}")
-    finally:
-        if 'pdf_file' in locals():
-            pdf_file.close()
\ No newline at end of file
+    texts = list(texts)
+    if workers == 1 or len(texts) < min_parallel:
+        return [clean_split_text(text, preserve_unicode) for text in texts]
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            partial(clean_split_text, preserve_unicode=preserve_unicode),
+            texts,
+            chunksize=max(1, len(texts) // (4 * workers)),
+        ))
@@ -0,0 +1,79 @@
+import tiktoken
+from functools import lru_cache
+from typing import Iterator, Tuple
+
+DEFAULT_ENCODING = "cl100k_base"
+
+@lru_cache(maxsize=None)
+def get_encoder(encoding_name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """
+    Get a tiktoken encoder, created once per encoding and reused afterwards.
+
+    Args:
+        encoding_name: Name of the tiktoken encoding
+
+    Returns:
+        tiktoken.Encoding: The cached encoder
+    """
+    return tiktoken.get_encoding(encoding_name)
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """
+    Count the tokens in a text.
+
+    Args:
+        text: The text to count
+        encoding_name: Name of the tiktoken encoding
+
+    Returns:
+        int: Number of tokens
+    """
+    return len(get_encoder(encoding_name).encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> str:
+    """
+    Cut a text down to at most `max_tokens` tokens.
+
+    Args:
+        text: The text to cut
+        max_tokens: Maximum number of tokens to keep
+        encoding_name: Name of the tiktoken encoding
+
+    Returns:
+        str: The text, truncated if it was longer than the limit
+    """
+    encoder = get_encoder(encoding_name)
+    tokens = encoder.encode(text, disallowed_special=())
+    return encoder.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+
+def iter_token_windows(text: str, chunk_size: int, chunk_overlap: int, encoding_name: str = DEFAULT_ENCODING) -> Iterator[Tuple[str, int]]:
+    """
+    Encode a text once and yield fixed-size overlapping windows of its tokens.
+
+    Windows start every `chunk_size - chunk_overlap` tokens and the last one ends at the end of the
+    text, the same windows langchain's TokenTextSplitter produces.
+
+    Args:
+        text: The text to split
+        chunk_size: Tokens per window
+        chunk_overlap: Tokens shared by consecutive windows
+        encoding_name: Name of the tiktoken encoding
+
+    Yields:
+        Tuple[str, int]: The decoded window and its token count
+
+    Raises:
+        ValueError: If the overlap is not smaller than the window
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"Chunk overlap {chunk_overlap} must be smaller than chunk size {chunk_size}")
+
+    encoder = get_encoder(encoding_name)
+    tokens = encoder.encode(text, disallowed_special=())
+    step = chunk_size - chunk_overlap
+
+    for start in range(0, len(tokens), step):
+        window = tokens[start:start + chunk_size]
+        yield encoder.decode(window), len(window)
+        if start + chunk_size >= len(tokens):
+            break
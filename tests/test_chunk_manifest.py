@@ -0,0 +1,112 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from utils.chunk_manifest import ChunkManifest, content_chunk_id
+
+def record(text, document="paper", **fields):
+    return {"_id": content_chunk_id(text, document), "text": text, **fields}
+
+class ContentChunkIdTest(unittest.TestCase):
+
+    def test_same_text_of_the_same_document_shares_an_id(self):
+        self.assertEqual(content_chunk_id("A  residual\nblock.", "paper"), content_chunk_id("A residual block.", "paper"))
+
+    def test_same_text_of_two_documents_gets_two_ids(self):
+        self.assertNotEqual(content_chunk_id("A residual block.", "paper"), content_chunk_id("A residual block.", "other"))
+
+class ChunkManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self._root = tempfile.TemporaryDirectory()
+        self.root = self._root.name
+
+    def tearDown(self):
+        self._root.cleanup()
+
+    def manifest(self):
+        return ChunkManifest("index", "library", root=self.root)
+
+    def test_skips_records_already_written(self):
+        manifest = self.manifest()
+        records = [record("first chunk"), record("second chunk")]
+        manifest.add(records[:1])
+
+        pending, unchanged = manifest.split_unchanged(records)
+
+        self.assertEqual(pending, records[1:])
+        self.assertEqual(unchanged, records[:1])
+
+    def test_changed_fields_do_not_rewrite_a_record(self):
+        manifest = self.manifest()
+        manifest.add([record("chunk", file_url="https://a.org/p.pdf", citation="(He, 2016)")])
+
+        pending, _ = manifest.split_unchanged([record("chunk", file_url="https://b.org/p.pdf", citation="(He et al., 2016)")])
+
+        self.assertEqual(pending, [])
+
+    def test_rewrites_a_record_whose_text_changed(self):
+        manifest = self.manifest()
+        manifest.add([{"_id": "chunk-1", "text": "old text"}])
+
+        pending, _ = manifest.split_unchanged([{"_id": "chunk-1", "text": "new text"}])
+
+        self.assertEqual(len(pending), 1)
+
+    def test_same_text_of_another_document_is_written(self):
+        manifest = self.manifest()
+        manifest.add([record("quoted passage", "paper")])
+
+        pending, _ = manifest.split_unchanged([record("quoted passage", "other")])
+
+        self.assertEqual(len(pending), 1)
+
+    def test_entries_survive_a_reload(self):
+        self.manifest().add([record("chunk")])
+
+        _, unchanged = self.manifest().split_unchanged([record("chunk")])
+
+        self.assertEqual(len(unchanged), 1)
+
+    def test_skips_records_the_index_confirms(self):
+        manifest = self.manifest()
+        manifest.add([record("chunk")])
+        looked_up = []
+
+        def exists(ids):
+            looked_up.extend(ids)
+            return set(ids)
+
+        pending, unchanged = manifest.split_unchanged([record("chunk"), record("new chunk")], exists=exists)
+
+        self.assertEqual([r["text"] for r in pending], ["new chunk"])
+        self.assertEqual(len(unchanged), 1)
+        self.assertEqual(looked_up, [record("chunk")["_id"]])
+
+    def test_rewrites_records_missing_from_a_recreated_namespace(self):
+        manifest = self.manifest()
+        manifest.add([record("first chunk"), record("second chunk")])
+        kept = {record("first chunk")["_id"]}
+
+        pending, unchanged = manifest.split_unchanged([record("first chunk"), record("second chunk")], exists=lambda ids: kept & set(ids))
+
+        self.assertEqual([r["text"] for r in pending], ["second chunk"])
+        self.assertEqual([r["text"] for r in unchanged], ["first chunk"])
+        pending, _ = self.manifest().split_unchanged([record("second chunk")])
+        self.assertEqual(len(pending), 1)
+
+    def test_clear_forgets_every_entry(self):
+        manifest = self.manifest()
+        manifest.add([record("chunk")])
+        manifest.clear()
+
+        pending, _ = self.manifest().split_unchanged([record("chunk")])
+
+        self.assertEqual(len(pending), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from utils.fusion import RerankPolicy, fuse, reciprocal_rank_fusion, weighted_score_fusion
+
+def ranking(*ids):
+    return [{"_id": hit_id, "_score": 1.0 / (rank + 1)} for rank, hit_id in enumerate(ids)]
+
+def scored(**scores):
+    return [{"_id": hit_id, "_score": score} for hit_id, score in scores.items()]
+
+class ReciprocalRankFusionTest(unittest.TestCase):
+
+    def test_hits_ranked_well_in_both_lists_come_first(self):
+        fused = reciprocal_rank_fusion([ranking("a", "b", "c"), ranking("b", "d", "a")])
+
+        self.assertEqual([hit["_id"] for hit in fused], ["b", "a", "d", "c"])
+        self.assertAlmostEqual(fused[0]["_fused_score"], 1 / 62 + 1 / 61)
+
+    def test_weights_favour_a_list(self):
+        fused = reciprocal_rank_fusion([ranking("a", "b"), ranking("b", "a")], weights=[1.0, 2.0])
+
+        self.assertEqual([hit["_id"] for hit in fused], ["b", "a"])
+
+    def test_keeps_the_first_copy_of_a_hit(self):
+        dense = [{"_id": "a", "_score": 0.9, "fields": {"text": "dense"}}]
+        sparse = [{"_id": "a", "_score": 12.0, "fields": {"text": "sparse"}}]
+
+        fused = reciprocal_rank_fusion([dense, sparse])
+
+        self.assertEqual(len(fused), 1)
+        self.assertEqual(fused[0]["fields"], {"text": "dense"})
+
+class WeightedScoreFusionTest(unittest.TestCase):
+
+    def test_equal_weights_sum_the_normalized_scores(self):
+        fused = weighted_score_fusion([scored(a=0.9, b=0.5, c=0.1), scored(c=10.0, a=5.0, b=0.0)])
+
+        self.assertEqual([hit["_id"] for hit in fused], ["a", "c", "b"])
+        self.assertAlmostEqual(fused[0]["_fused_score"], 0.75)
+
+    def test_weights_change_the_order(self):
+        fused = weighted_score_fusion([scored(a=0.9, b=0.5, c=0.1), scored(c=10.0, a=5.0, b=0.0)], weights=[0.2, 0.8])
+
+        self.assertEqual([hit["_id"] for hit in fused], ["c", "a", "b"])
+
+    def test_a_list_of_equal_scores_counts_fully(self):
+        fused = weighted_score_fusion([scored(a=0.3, b=0.3), []])
+
+        self.assertEqual([hit["_fused_score"] for hit in fused], [0.5, 0.5])
+
+    def test_fuse_rejects_unknown_methods(self):
+        with self.assertRaises(ValueError):
+            fuse([ranking("a")], method="borda")
+
+class RerankPolicyTest(unittest.TestCase):
+
+    def test_skips_when_rankings_agree(self):
+        policy = RerankPolicy()
+        rankings = [ranking("a", "b", "c"), ranking("a", "b", "c")]
+
+        self.assertFalse(policy.should_rerank(rankings, ranking("a", "b", "c")))
+        self.assertEqual(policy.stats()["skipped_agreement"], 1)
+
+    def test_skips_too_few_candidates(self):
+        policy = RerankPolicy(min_candidates=2)
+
+        self.assertFalse(policy.should_rerank([ranking("a"), []], ranking("a")))
+        self.assertEqual(policy.stats()["skipped_few_candidates"], 1)
+
+    def test_reranks_when_rankings_disagree(self):
+        policy = RerankPolicy()
+        rankings = [ranking("a", "b", "c"), ranking("c", "b", "a")]
+
+        self.assertTrue(policy.should_rerank(rankings, ranking("a", "c", "b")))
+        self.assertEqual(policy.stats()["reranked"], 1)
+
+    def test_scores_required_reranks_agreeing_rankings(self):
+        policy = RerankPolicy(scores_required=True)
+        rankings = [ranking("a", "b", "c"), ranking("a", "b", "c")]
+
+        self.assertTrue(policy.should_rerank(rankings, ranking("a", "b", "c")))
+        self.assertTrue(policy.should_rerank([ranking("a"), []], ranking("a")))
+        self.assertFalse(policy.should_rerank([[], []], []))
+
+    def test_stats_report_skip_rate(self):
+        policy = RerankPolicy()
+        policy.should_rerank([ranking("a", "b", "c"), ranking("a", "b", "c")], ranking("a", "b", "c"))
+        policy.should_rerank([ranking("a", "b", "c"), ranking("c", "b", "a")], ranking("a", "c", "b"))
+
+        stats = policy.stats()
+        self.assertEqual(stats["decisions"], 2)
+        self.assertEqual(stats["skip_rate"], 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import utils.ingestion_pipeline as ingestion_pipeline
+from utils.ingestion_pipeline import IngestionPipeline
+
+class FakeChunkr:
+    """Stands in for the Chunkr client, returning a titled paper with a byline and three chunks."""
+
+    uploads = []
+
+    def __init__(self, api_key=None):
+        pass
+
+    async def upload(self, url, config):
+        self.uploads.append((url, os.path.exists(url)))
+        segments = [
+            SimpleNamespace(segment_type="Title", content="Deep Residual Learning"),
+            SimpleNamespace(segment_type="Text", content="Kaiming He, Xiangyu Zhang"),
+            SimpleNamespace(segment_type="PageHeader", content="Published 2016"),
+        ]
+        chunks = [SimpleNamespace(embed="Deep Residual Learning", segments=segments)]
+        chunks += [SimpleNamespace(embed=f"Residual block {i} learns a residual mapping.", segments=[]) for i in range(3)]
+        return SimpleNamespace(output=SimpleNamespace(chunks=chunks))
+
+    async def close(self):
+        pass
+
+class IngestionPipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self._chunkr = ingestion_pipeline.Chunkr
+        self._cache_enabled = ingestion_pipeline.INGESTION_CACHE_ENABLED
+        ingestion_pipeline.Chunkr = FakeChunkr
+        ingestion_pipeline.INGESTION_CACHE_ENABLED = False
+        FakeChunkr.uploads = []
+
+    def tearDown(self):
+        ingestion_pipeline.Chunkr = self._chunkr
+        ingestion_pipeline.INGESTION_CACHE_ENABLED = self._cache_enabled
+
+    def ingest(self, urls, **kwargs):
+        upserted = []
+
+        def sink(records):
+            upserted.extend(records)
+            return True
+
+        async def run():
+            pipeline = IngestionPipeline(sink, **{"strategy": "chunkr", "batch_size": 2, **kwargs})
+            return [doc async for doc in pipeline.run(urls)]
+
+        return asyncio.run(run()), upserted
+
+    def test_upserted_records_carry_source_url_and_citation(self):
+        docs, upserted = self.ingest(["https://example.org/resnet.pdf"])
+
+        self.assertEqual(docs[0].status, "completed")
+        self.assertEqual(len(upserted), 4)
+        for record in upserted:
+            self.assertEqual(set(record), {"_id", "text", "file_url", "citation"})
+            self.assertEqual(record["file_url"], "https://example.org/resnet.pdf")
+            self.assertEqual(record["citation"], "(He & Zhang, 2016)")
+
+    def test_records_wait_for_resolved_metadata(self):
+        async def resolve(doc):
+            await asyncio.sleep(0.05)
+            return {**doc.metadata, "citations": {"in_text": "(He et al., 2016)"}}
+
+        docs, upserted = self.ingest(["https://example.org/resnet.pdf"], resolve_metadata=resolve)
+
+        self.assertTrue(docs[0].metadata_resolved)
+        self.assertEqual({record["citation"] for record in upserted}, {"(He et al., 2016)"})
+
+    def test_chunkr_parses_the_file_hashed_for_the_cache(self):
+        class MissingCache:
+            async def aget_by_url(self, url, strategy):
+                return None
+
+            async def aget_by_content(self, content_hash, strategy, url=None):
+                return None
+
+            async def aput(self, url, strategy, document, content_hash=None):
+                pass
+
+        downloads = []
+
+        def download_pdf(url, deadline=None):
+            downloads.append(url)
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                f.write(b"%PDF-1.4")
+            return f.name, "hash"
+
+        cache, download = ingestion_pipeline.ingestion_cache, ingestion_pipeline.download_pdf
+        ingestion_pipeline.ingestion_cache, ingestion_pipeline.download_pdf = MissingCache(), download_pdf
+        ingestion_pipeline.INGESTION_CACHE_ENABLED = True
+        try:
+            docs, _ = self.ingest(["https://example.org/resnet.pdf"])
+        finally:
+            ingestion_pipeline.ingestion_cache, ingestion_pipeline.download_pdf = cache, download
+
+        self.assertEqual(docs[0].status, "completed")
+        self.assertEqual(downloads, ["https://example.org/resnet.pdf"])
+        [(path, existed)] = FakeChunkr.uploads
+        self.assertTrue(existed)
+        self.assertFalse(os.path.exists(path))
+
+    def test_stalled_download_times_out(self):
+        def download_pdf(url, deadline=None):
+            while time.monotonic() < deadline + 10:
+                if time.monotonic() > deadline:
+                    raise TimeoutError()
+                time.sleep(0.01)
+
+        download = ingestion_pipeline.download_pdf
+        ingestion_pipeline.download_pdf = download_pdf
+        try:
+            started = time.monotonic()
+            docs, upserted = self.ingest(["https://example.org/stalled.pdf"], strategy="langchain", timeout=0.2)
+        finally:
+            ingestion_pipeline.download_pdf = download
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(docs[0].status, "failed")
+        self.assertEqual(docs[0].error, "Timed out downloading the document")
+        self.assertEqual(upserted, [])
+
+    def test_process_urls_yields_the_records_of_each_document(self):
+        from utils.chunking import process_urls
+
+        async def run():
+            return [result async for result in process_urls(["https://example.org/resnet.pdf"])]
+
+        [result] = asyncio.run(run())
+
+        self.assertEqual(result["url"], "https://example.org/resnet.pdf")
+        self.assertEqual(result["title"], "Deep Residual Learning")
+        self.assertEqual(len(result["vector_data"]), 4)
+        self.assertEqual(result["metadata"]["citations"]["in_text"], "(He & Zhang, 2016)")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pymupdf
+from utils.pdf_parsing import download_pdf, iter_pdf_pages
+
+class TricklingHandler(BaseHTTPRequestHandler):
+    """Sends a PDF a few bytes at a time, each read well within the HTTP read timeout."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.end_headers()
+        try:
+            for _ in range(100):
+                self.wfile.write(b"%PDF-")
+                self.wfile.flush()
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+class DownloadPdfTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), TricklingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/paper.pdf"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_trickling_download_stops_at_the_deadline(self):
+        before = set(os.listdir(tempfile.gettempdir()))
+        started = time.monotonic()
+
+        with self.assertRaises(TimeoutError):
+            download_pdf(self.url, timeout=30, deadline=started + 0.3)
+
+        self.assertLess(time.monotonic() - started, 2)
+        leftover = [name for name in set(os.listdir(tempfile.gettempdir())) - before if name.endswith(".pdf")]
+        self.assertEqual(leftover, [])
+
+class IterPdfPagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "paper.pdf")
+        doc = pymupdf.open()
+        for i in range(3):
+            doc.new_page().insert_text((72, 72), f"Page {i} of the paper.")
+        doc.save(self.path)
+        doc.close()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_pages_are_yielded_in_order(self):
+        pages = list(iter_pdf_pages(self.path, pages_per_task=1, deadline=time.monotonic() + 60))
+
+        self.assertEqual([page.metadata["page"] for page in pages], [0, 1, 2])
+        self.assertIn("Page 2", pages[2].page_content)
+
+    def test_parsing_past_the_deadline_times_out(self):
+        with self.assertRaises(TimeoutError):
+            list(iter_pdf_pages(self.path, deadline=time.monotonic() - 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import asyncio
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from utils.result_cache import ResultCache, result_cache_key
+
+class ResultCacheKeyTest(unittest.TestCase):
+
+    def test_candidate_order_and_query_spacing_do_not_matter(self):
+        self.assertEqual(
+            result_cache_key("rerank", "Residual  Networks", ["b", "a"]),
+            result_cache_key("rerank", "residual networks", ["a", "b"]),
+        )
+
+    def test_kinds_do_not_collide(self):
+        self.assertNotEqual(result_cache_key("query", "residual networks"), result_cache_key("rerank", "residual networks"))
+
+class ResultCacheTest(unittest.TestCase):
+
+    def test_hit_within_the_namespace_only(self):
+        cache = ResultCache()
+        cache.set("library", "key", [1, 2])
+
+        self.assertEqual(cache.get("library", "key"), [1, 2])
+        self.assertIsNone(cache.get("other", "key"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = ResultCache(ttl=0)
+        cache.set("library", "key", [1, 2])
+
+        self.assertIsNone(cache.get("library", "key"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResultCache(max_entries=2)
+        cache.set("library", "a", 1)
+        cache.set("library", "b", 2)
+        cache.get("library", "a")
+        cache.set("library", "c", 3)
+
+        self.assertEqual([cache.get("library", key) for key in ("a", "b", "c")], [1, None, 3])
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_invalidate_namespace_drops_only_its_entries(self):
+        cache = ResultCache()
+        cache.set("library", "key", 1)
+        cache.set("other", "key", 2)
+        cache.invalidate_namespace("library")
+
+        self.assertIsNone(cache.get("library", "key"))
+        self.assertEqual(cache.get("other", "key"), 2)
+        self.assertEqual(asyncio.run(cache.ageneration("library")), 1)
+
+    def test_async_and_sync_calls_share_entries(self):
+        cache = ResultCache()
+
+        async def run():
+            await cache.aset("library", "key", {"hits": []})
+            return await cache.aget("library", "key"), cache.get("library", "key")
+
+        self.assertEqual(asyncio.run(run()), ({"hits": []}, {"hits": []}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import asyncio
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from utils.semantic_cache import SemanticCache
+
+VECTORS = {
+    "residual networks": [1.0, 0.0, 0.0],
+    "residual nets": [0.99, 0.1, 0.0],
+    "attention is all you need": [0.0, 1.0, 0.0],
+    "graph neural networks": [0.0, 0.0, 1.0],
+}
+
+class SemanticCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.embedded = []
+        self.batches = []
+
+    async def embed(self, text):
+        self.embedded.append(text)
+        return VECTORS.get(text, [1.0, 1.0, 1.0])
+
+    async def embed_many(self, texts):
+        self.batches.append(texts)
+        return [VECTORS[text] for text in texts]
+
+    def cache(self, **kwargs):
+        return SemanticCache(embed=self.embed, embed_many=self.embed_many, threshold=0.95, **kwargs)
+
+    def test_exact_hit_skips_the_embedding(self):
+        async def run():
+            cache = self.cache()
+            await cache.store("Residual  Networks", "library", "answer")
+            self.embedded.clear()
+            return await cache.lookup("residual networks", "library")
+
+        value, _ = asyncio.run(run())
+        self.assertEqual(value, "answer")
+        self.assertEqual(self.embedded, [])
+
+    def test_semantic_hit_within_a_namespace(self):
+        async def run():
+            cache = self.cache()
+            await cache.store("residual networks", "library", "answer")
+            return await cache.lookup("residual nets", "library"), await cache.lookup("residual nets", "other")
+
+        (value, _), (other, _) = asyncio.run(run())
+        self.assertEqual(value, "answer")
+        self.assertIsNone(other)
+
+    def test_lookup_many_embeds_misses_in_one_call(self):
+        async def run():
+            cache = self.cache()
+            await cache.store("residual networks", "library", "answer")
+            self.batches.clear()
+            return await cache.lookup_many(["residual networks", "residual nets", "graph neural networks"], "library")
+
+        results = asyncio.run(run())
+        self.assertEqual([value for value, _ in results], ["answer", "answer", None])
+        self.assertEqual(self.batches, [["residual nets", "graph neural networks"]])
+
+    def test_entries_expire_after_the_ttl(self):
+        async def run():
+            cache = self.cache(ttl=0)
+            await cache.store("residual networks", "library", "answer")
+            return await cache.lookup("residual networks", "library")
+
+        value, _ = asyncio.run(run())
+        self.assertIsNone(value)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        async def run():
+            cache = self.cache(max_entries=2)
+            await cache.store("residual networks", "library", "resnet")
+            await cache.store("attention is all you need", "library", "transformer")
+            await cache.lookup("residual networks", "library")
+            await cache.store("graph neural networks", "library", "gnn")
+            return cache, [(await cache.lookup(query, "library"))[0] for query in ("residual networks", "attention is all you need")]
+
+        cache, values = asyncio.run(run())
+        self.assertEqual(values, ["resnet", None])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_invalidate_namespace_drops_only_its_entries(self):
+        async def run():
+            cache = self.cache()
+            await cache.store("residual networks", "library", "resnet")
+            await cache.store("residual networks", "other", "resnet")
+            cache.invalidate_namespace("library")
+            return [(await cache.lookup("residual networks", namespace))[0] for namespace in ("library", "other")]
+
+        self.assertEqual(asyncio.run(run()), [None, "resnet"])
+
+    def test_invalidation_from_another_thread_while_storing(self):
+        errors = []
+
+        async def run():
+            cache = self.cache(max_entries=64)
+            stop = threading.Event()
+
+            def invalidate():
+                while not stop.is_set():
+                    try:
+                        cache.invalidate_namespace("library")
+                    except Exception as e:
+                        errors.append(e)
+
+            thread = threading.Thread(target=invalidate)
+            thread.start()
+            try:
+                for i in range(2000):
+                    await cache.store(f"query {i}", "library", i, vector=[1.0, 0.0, 0.0])
+                    await cache.lookup(f"query {i}", "library")
+            finally:
+                stop.set()
+                thread.join()
+
+        asyncio.run(run())
+        self.assertEqual(errors, [])
+
+    def test_newer_generation_hides_entries_of_another_worker(self):
+        generations = {"library": 0}
+
+        async def generation(namespace):
+            return generations[namespace]
+
+        async def run():
+            cache = self.cache(generation=generation)
+            await cache.store("residual networks", "library", "answer")
+            before = await cache.lookup("residual nets", "library")
+            generations["library"] += 1
+            after = await cache.lookup("residual networks", "library")
+            return before[0], after[0]
+
+        self.assertEqual(asyncio.run(run()), ("answer", None))
+
+if __name__ == "__main__":
+    unittest.main()
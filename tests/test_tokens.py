@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from utils.tokens import DEFAULT_ENCODING, get_encoder, iter_token_windows
+
+def encoding_available() -> bool:
+    try:
+        get_encoder(DEFAULT_ENCODING)
+        return True
+    except Exception:
+        return False
+
+TEXT = " ".join(
+    f"Section {i}: residual connections let gradients flow through {i * 7} layers without vanishing, "
+    f"which made networks of unprecedented depth trainable."
+    for i in range(40)
+)
+
+class IterTokenWindowsTest(unittest.TestCase):
+
+    def test_overlap_must_be_smaller_than_the_window(self):
+        with self.assertRaises(ValueError):
+            list(iter_token_windows(TEXT, chunk_size=10, chunk_overlap=10))
+
+    @unittest.skipUnless(encoding_available(), f"the {DEFAULT_ENCODING} encoding could not be loaded")
+    def test_windows_match_the_token_text_splitter(self):
+        from langchain_text_splitters import TokenTextSplitter
+
+        for chunk_size, chunk_overlap in ((50, 0), (64, 16), (100, 99), (10000, 200)):
+            with self.subTest(chunk_size=chunk_size, chunk_overlap=chunk_overlap):
+                splitter = TokenTextSplitter(encoding_name=DEFAULT_ENCODING, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+                windows = list(iter_token_windows(TEXT, chunk_size, chunk_overlap))
+
+                self.assertEqual([window for window, _ in windows], splitter.split_text(TEXT))
+                self.assertTrue(all(length <= chunk_size for _, length in windows))
+
+    @unittest.skipUnless(encoding_available(), f"the {DEFAULT_ENCODING} encoding could not be loaded")
+    def test_last_window_ends_at_the_end_of_the_text(self):
+        windows = list(iter_token_windows(TEXT, chunk_size=64, chunk_overlap=16))
+
+        self.assertTrue(TEXT.endswith(windows[-1][0]))
+
+if __name__ == "__main__":
+    unittest.main()